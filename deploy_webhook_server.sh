@@ -55,7 +55,7 @@ User=$USER
 Group=$USER
 WorkingDirectory=$APP_DIR
 Environment=PATH=$APP_DIR/venv/bin
-ExecStart=$APP_DIR/venv/bin/gunicorn --bind 127.0.0.1:5000 --workers 2 --timeout 300 meraki_netbox.src.automation.webhook_server:app
+ExecStart=$APP_DIR/venv/bin/gunicorn --bind 127.0.0.1:5000 --workers 2 --timeout 300 -k uvicorn.workers.UvicornWorker 'meraki_netbox.src.automation.webhook_ingest:create_app()'
 Restart=always
 RestartSec=10
 
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark for sync_networks.py startup time.
+
+Times fresh interpreter runs of the CLI's --help path and of importing the
+CLI module plus constructing both clients (the work done before the first
+API call of a single-network sync), and lists the slowest imports.
+
+Usage:
+    python benchmarks/bench_cli_startup.py [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SYNC_SCRIPT = os.path.join(PROJECT_DIR, 'src', 'sync_networks.py')
+
+CONSTRUCT_CLIENTS = (
+    "import sys; sys.path.insert(0, {root!r});"
+    "import src.sync_networks;"
+    "from src.clients.meraki_client import MerakiClient;"
+    "from src.clients.netbox_client import NetBoxClient;"
+    "MerakiClient(api_key='benchmark'); NetBoxClient(url='https://netbox.invalid', token='benchmark')"
+).format(root=PROJECT_DIR)
+
+
+def time_command(cmd, runs):
+    """Run a command several times and return the wall clock seconds of each run."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True, cwd=PROJECT_DIR)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def slowest_imports(cmd, count):
+    """Return the slowest cumulative imports reported by -X importtime."""
+    result = subprocess.run(cmd[:1] + ['-X', 'importtime'] + cmd[1:], capture_output=True, text=True,
+                            cwd=PROJECT_DIR)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sync_networks.py startup time.')
+    parser.add_argument('--runs', type=int, default=10, help='Number of runs per scenario')
+    args = parser.parse_args()
+
+    scenarios = {
+        '--help': [sys.executable, SYNC_SCRIPT, '--help'],
+        'import + construct clients': [sys.executable, '-c', CONSTRUCT_CLIENTS],
+    }
+
+    baseline = statistics.median(time_command([sys.executable, '-c', 'pass'], args.runs))
+    print(f"bare interpreter: {baseline * 1000:.0f} ms")
+
+    for label, cmd in scenarios.items():
+        median = statistics.median(time_command(cmd, args.runs))
+        print(f"{label}: {median * 1000:.0f} ms ({(median - baseline) * 1000:.0f} ms over bare interpreter)")
+        for cumulative, name in slowest_imports(cmd, 5):
+            print(f"    {cumulative / 1000:7.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for DNS name sanitization.
+
+Compares the original per-call regex implementation with the precompiled,
+memoized sanitizer on a client name mix with realistic repetition.
+
+Usage:
+    python benchmarks/bench_dns_sanitizer.py [--names 100000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sync.dns_names import sanitize_dns_name, sanitize_dns_names
+
+COMMON_NAMES = ["iPhone", "Unknown Device", "Galaxy-S23", "Johns MacBook Pro", "HP LaserJet 400",
+                "android-3f2a9c", "Office Printer", "None", "DESKTOP-7QK2L1", "Meeting Room TV"]
+
+
+def legacy_sanitize(name):
+    """The original IPSynchronizer._sanitize_dns_name implementation."""
+    if not name or name.lower() in ['unknown device', 'none', 'unknown']:
+        return None
+    sanitized = re.sub(r'[^a-zA-Z0-9\-\.\*_]', '-', name)
+    sanitized = re.sub(r'-+', '-', sanitized)
+    sanitized = sanitized.strip('-')
+    if not sanitized:
+        return None
+    return sanitized
+
+
+def build_names(count, unique_ratio):
+    """Build a name list where roughly unique_ratio of the names are distinct."""
+    rng = random.Random(42)
+    names = []
+    for index in range(count):
+        if rng.random() < unique_ratio:
+            names.append(f"Client {index} ({rng.choice(COMMON_NAMES)})")
+        else:
+            names.append(rng.choice(COMMON_NAMES))
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark DNS name sanitization.')
+    parser.add_argument('--names', type=int, default=100000, help='Number of names per run')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs')
+    args = parser.parse_args()
+
+    for unique_ratio in (0.05, 0.5):
+        names = build_names(args.names, unique_ratio)
+        legacy = min(timeit.repeat(lambda: [legacy_sanitize(n) for n in names], number=1, repeat=args.repeat))
+        single = min(timeit.repeat(lambda: [sanitize_dns_name(n) for n in names], number=1, repeat=args.repeat))
+        batch = min(timeit.repeat(lambda: sanitize_dns_names(names), number=1, repeat=args.repeat))
+
+        print(f"{args.names} names, {unique_ratio:.0%} unique:")
+        print(f"  legacy:  {legacy / args.names * 1e9:8.0f} ns/name")
+        print(f"  cached:  {single / args.names * 1e9:8.0f} ns/name")
+        print(f"  batch:   {batch / args.names * 1e9:8.0f} ns/name")
+        print(f"  cache:   {sanitize_dns_name.cache_info()}")
+        sanitize_dns_name.cache_clear()
+
+
+if __name__ == '__main__':
+    main()
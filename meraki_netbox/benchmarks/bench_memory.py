@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the memory a sync run needs per synced object.
+
+Runs the real SubnetSynchronizer and IPSynchronizer with the real
+NetBoxClient and pynetbox against an in-memory NetBox, so the records and
+indexes held during a run are the ones a production run holds. The first
+run creates every object and the second updates them; both run under
+MemoryTracker, which reports each phase's peak of traced memory and the
+bytes per synced object. With --max-bytes-per-object the benchmark fails
+when a run needs more, to catch memory regressions.
+
+Usage:
+    python benchmarks/bench_memory.py [--networks 20] [--clients 50] [--max-bytes-per-object 0]
+"""
+import argparse
+import contextlib
+import copy
+import io
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clients.client_table import ClientTable
+from clients.netbox_client import NetBoxClient
+from sync.ip_sync import IPSynchronizer
+from sync.subnet_sync import SubnetSynchronizer
+from utils.profiling import MemoryTracker, track_sync_phases
+
+NETBOX_URL = "http://netbox.bench"
+
+# Fields of other objects that NetBox returns as nested objects rather than IDs
+NESTED_FIELDS = {"vrf": "vrfs", "vlan": "vlans", "group": "vlan_groups"}
+
+
+class SimulatedMeraki:
+    """Meraki client serving networks with a few VLANs and a full client table each."""
+
+    def __init__(self, networks, vlans, clients):
+        self.networks = [{"id": f"N_{n}", "name": f"Site {n}"} for n in range(networks)]
+        self.vlans = [{"id": 10 + v, "name": f"VLAN {v}", "subnet": f"10.{v}.0.0/16"} for v in range(vlans)]
+        self.clients = clients
+
+    def get_networks(self, org_id):
+        return self.networks
+
+    def get_vlans(self, network_id):
+        return self.vlans
+
+    def get_dhcp_reservations(self, network_id, vlan_id):
+        return {}
+
+    def get_network_client_table(self, network_id, limit=None):
+        table = ClientTable()
+        for n in range(min(limit or self.clients, self.clients)):
+            vlan = n % len(self.vlans)
+            table.append(network_id, f"10.{vlan}.{n // 250}.{n % 250 + 2}",
+                         f"aa:bb:cc:{vlan:02x}:{n // 256:02x}:{n % 256:02x}", f"Client {n}")
+        return table
+
+
+class FakeResponse:
+    """The parts of a requests response pynetbox and NetBoxClient read."""
+
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.reason = "OK" if self.ok else "Not Found"
+        self.headers = {"API-Version": "4.1"}
+        self.url = NETBOX_URL
+        self.text = ""
+        self._body = body
+
+    def json(self):
+        # A fresh copy, like a parsed response body
+        return copy.deepcopy(self._body)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class InMemoryNetBox:
+    """HTTP session answering NetBox REST API calls from dictionaries."""
+
+    def __init__(self):
+        self.tables = {}
+        self.next_id = 1
+
+    def _route(self, url):
+        parts = [part.replace("-", "_") for part in urlparse(url).path.split("/") if part][1:]
+        if len(parts) == 3:
+            return parts[1], int(parts[2])
+        return (parts[1], None) if len(parts) == 2 else (None, None)
+
+    def _store(self, kind, values, object_id=None):
+        table = self.tables.setdefault(kind, {})
+        obj = table.get(object_id) or {"id": self.next_id}
+        if object_id is None:
+            self.next_id += 1
+        obj.update(values)
+        app = "extras" if kind == "tags" else "ipam"
+        obj["url"] = f"{NETBOX_URL}/api/{app}/{kind.replace('_', '-')}/{obj['id']}/"
+        for field, related in NESTED_FIELDS.items():
+            if isinstance(obj.get(field), int):
+                target = self.tables[related][obj[field]]
+                obj[field] = {"id": target["id"], "url": target["url"], "name": target.get("name")}
+        obj["tags"] = [self._tag(tag) for tag in obj.get("tags", [])]
+        table[obj["id"]] = obj
+        return obj
+
+    def _tag(self, tag):
+        slug = tag.get("slug") if isinstance(tag, dict) else None
+        for stored in self.tables.get("tags", {}).values():
+            if stored["slug"] == slug or stored["id"] == tag.get("id"):
+                return {"id": stored["id"], "url": stored["url"], "name": stored["name"], "slug": stored["slug"]}
+        return tag
+
+    @staticmethod
+    def _matches(obj, params):
+        for key, value in params.items():
+            if key in ("limit", "offset", "fields", "parent", "brief"):
+                continue
+            if key == "tag":
+                actual = [tag["slug"] for tag in obj.get("tags", [])]
+                if value not in actual:
+                    return False
+                continue
+            if key.endswith("_id"):
+                nested = obj.get(key[:-3])
+                actual = nested["id"] if nested else None
+                if actual != (None if value == "null" else int(value)):
+                    return False
+            elif obj.get(key) != value:
+                return False
+        return True
+
+    def get(self, url, headers=None, params=None, json=None):
+        kind, object_id = self._route(url)
+        if kind is None:
+            return FakeResponse(200, {})
+        table = self.tables.get(kind, {})
+        if object_id is not None:
+            return FakeResponse(200, table[object_id]) if object_id in table else FakeResponse(404)
+        params = params or {}
+        matches = [obj for obj in table.values() if self._matches(obj, params)]
+        offset, limit = int(params.get("offset", 0)), int(params.get("limit", 50)) or len(matches)
+        page = matches[offset:offset + limit]
+        more = offset + limit < len(matches)
+        return FakeResponse(200, {"count": len(matches), "next": f"{url}?offset={offset + limit}" if more else None,
+                                  "previous": None, "results": page})
+
+    def post(self, url, headers=None, params=None, json=None):
+        kind, _ = self._route(url)
+        if isinstance(json, list):
+            return FakeResponse(201, [self._store(kind, values) for values in json])
+        return FakeResponse(201, self._store(kind, json))
+
+    def patch(self, url, headers=None, params=None, json=None):
+        kind, object_id = self._route(url)
+        if isinstance(json, list):
+            return FakeResponse(200, [self._store(kind, values, values["id"]) for values in json])
+        return FakeResponse(200, self._store(kind, json, object_id))
+
+    def delete(self, url, headers=None, params=None, json=None):
+        kind, object_id = self._route(url)
+        for value in ([item["id"] for item in json] if json else [object_id]):
+            self.tables.get(kind, {}).pop(value, None)
+        return FakeResponse(204)
+
+
+def run_sync(meraki, session):
+    """Run a subnet and IP sync under a MemoryTracker.
+
+    Returns:
+        tuple: (MemoryTracker report, objects synced, seconds)
+    """
+    netbox = NetBoxClient(url=NETBOX_URL, token="bench")
+    netbox.api.http_session = session
+    tracker = track_sync_phases(MemoryTracker(), meraki, netbox)
+    start = time.perf_counter()
+    try:
+        # The synchronizers print a line per object
+        with contextlib.redirect_stdout(io.StringIO()):
+            SubnetSynchronizer(meraki, netbox).sync_organization("org")
+            IPSynchronizer(meraki, netbox).sync_organization_ips("org", sync_reservations=False)
+    finally:
+        tracker.stop()
+    elapsed = time.perf_counter() - start
+    objects = sum(len(ids) for ids in netbox.seen_ids.values())
+    return tracker.report(objects), objects, elapsed
+
+
+def print_report(label, report, objects, elapsed):
+    print(f"\n{label}: {objects} objects in {elapsed:.1f}s, peak {report['peak'] / 1e6:.1f} MB, "
+          f"{report['bytes_per_object'] or 0:.0f} bytes/object")
+    for phase, usage in sorted(report["phases"].items(), key=lambda item: -item[1]["peak"]):
+        rss = f", RSS {usage['rss'] / 1e6:.0f} MB" if usage["rss"] else ""
+        print(f"  {phase:<14} peak {usage['peak'] / 1e6:7.2f} MB{rss}")
+    for site, size, count in report["top_sites"][:5]:
+        print(f"  {size / 1e6:7.2f} MB in {count:>7} blocks  {os.path.relpath(site)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--networks', type=int, default=20, help='Simulated networks')
+    parser.add_argument('--vlans', type=int, default=4, help='VLANs per network')
+    parser.add_argument('--clients', type=int, default=50, help='Clients per network')
+    parser.add_argument('--max-bytes-per-object', type=float, default=0,
+                        help='Fail when a run needs more traced bytes per synced object (0: no limit)')
+    args = parser.parse_args()
+
+    meraki = SimulatedMeraki(args.networks, args.vlans, args.clients)
+    session = InMemoryNetBox()
+    print(f"{args.networks} networks x {args.vlans} VLANs, {args.clients} clients each")
+
+    worst = 0.0
+    for label in ("create run", "update run"):
+        report, objects, elapsed = run_sync(meraki, session)
+        print_report(label, report, objects, elapsed)
+        worst = max(worst, report["bytes_per_object"] or 0)
+
+    if args.max_bytes_per_object and worst > args.max_bytes_per_object:
+        print(f"\nFAIL: {worst:.0f} bytes/object exceeds the limit of {args.max_bytes_per_object:.0f}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Meraki SDK settings profiles.
+
+Serves a canned getOrganizationNetworks response from a local HTTP server and
+measures request throughput through MerakiClient with each SDK profile, using
+several threads to mimic concurrent syncs. Each profile runs in its own
+interpreter so SDK logging handlers don't leak between runs.
+
+Usage:
+    python benchmarks/bench_meraki_profiles.py [--requests 500] [--threads 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+NETWORKS = json.dumps([
+    {"id": f"N_{index}", "organizationId": "1", "name": f"Branch {index}", "productTypes": ["appliance"]}
+    for index in range(50)
+]).encode()
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    """Answers every GET with the same list of networks."""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(NETWORKS)))
+        self.end_headers()
+        self.wfile.write(NETWORKS)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_worker(profile, base_url, requests, threads):
+    """Time requests through one profile and return requests per second."""
+    from clients.meraki_client import MerakiClient
+
+    client = MerakiClient(api_key="benchmark", profile=profile, base_url=base_url)
+    client.get_networks("1")  # warm up the SDK and connection pool
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: client.get_networks("1"), range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Meraki SDK settings profiles.')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per profile')
+    parser.add_argument('--threads', type=int, default=4, help='Concurrent request threads')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        rate = run_worker(args.worker, args.base_url, args.requests, args.threads)
+        sys.stderr.write(json.dumps({"rate": rate}) + "\n")
+        return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DashboardHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/api/v1"
+
+    from clients.meraki_client import SDK_PROFILES
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for profile in SDK_PROFILES:
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', profile, '--base-url', base_url,
+                 '--requests', str(args.requests), '--threads', str(args.threads)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=workdir
+            )
+            lines = [line for line in result.stderr.splitlines() if line.startswith('{"rate"')]
+            if not lines:
+                print(f"{profile:>8}: failed\n{result.stderr[-2000:]}")
+                continue
+            print(f"{profile:>8}: {json.loads(lines[-1])['rate']:8.0f} requests/s")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the streaming sync pipeline.
+
+Simulates an organization whose Meraki fetches and NetBox writes each take a
+fixed latency per network, then compares running the stages back to back,
+network by network, with running them through SyncPipeline.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--networks 40] [--meraki-ms 50] [--netbox-ms 50]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clients.client_table import ClientTable
+from sync.pipeline import SyncPipeline
+from sync.plan import build_network_plan
+
+VLANS = [{"id": 10, "name": "Data", "subnet": "192.168.10.0/24"}]
+
+
+class SimulatedMeraki:
+    """Blocking Meraki client with a fixed latency per network."""
+
+    def __init__(self, networks, latency):
+        self.networks = [{"id": f"N_{n}", "name": f"Site {n}"} for n in range(networks)]
+        self.latency = latency
+
+    def get_networks(self, org_id):
+        return self.networks
+
+    def get_vlans(self, network_id):
+        time.sleep(self.latency)
+        return VLANS
+
+    def get_dhcp_reservations(self, network_id, vlan_id):
+        return {}
+
+    def get_network_client_table(self, network_id, limit=None):
+        table = ClientTable()
+        for host in range(2, 2 + (limit or 50)):
+            table.append(network_id, f"192.168.10.{host}", f"aa:bb:cc:dd:ee:{host:02x}", "Client")
+        return table
+
+
+class SimulatedNetBox:
+    """Async NetBox client with a fixed latency per write batch."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.seen_ids = {"prefixes": set(), "ip_addresses": set()}
+
+    async def get_network_scope(self, network_id, network_name):
+        return {"vlan_group": None, "vrf": None}
+
+    async def create_or_update_prefix(self, **kwargs):
+        pass
+
+    async def bulk_apply_ip_addresses(self, items):
+        await asyncio.sleep(self.latency)
+
+
+async def run_sequential(meraki, netbox):
+    """Fetch, transform and write one network at a time."""
+    pipeline = SyncPipeline(meraki, netbox)
+    for network in meraki.get_networks("org"):
+        fetched = pipeline.fetch_network(network)
+        plan = build_network_plan(network["id"], network["name"], fetched["vlans"],
+                                  fetched["reservations"], fetched["clients"])
+        await pipeline.write_plan(plan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--networks", type=int, default=40)
+    parser.add_argument("--meraki-ms", type=float, default=50)
+    parser.add_argument("--netbox-ms", type=float, default=50)
+    parser.add_argument("--fetch-workers", type=int, default=4)
+    parser.add_argument("--write-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    meraki = SimulatedMeraki(args.networks, args.meraki_ms / 1000)
+    netbox = SimulatedNetBox(args.netbox_ms / 1000)
+
+    # Per-network progress lines are not part of the benchmark output
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        asyncio.run(run_sequential(meraki, netbox))
+        sequential = time.perf_counter() - start
+
+        pipeline = SyncPipeline(meraki, netbox, fetch_workers=args.fetch_workers, write_workers=args.write_workers)
+        start = time.perf_counter()
+        asyncio.run(pipeline.run(org_ids=["org"]))
+        pipelined = time.perf_counter() - start
+
+    print(f"{args.networks} networks, {args.meraki_ms:.0f} ms Meraki + {args.netbox_ms:.0f} ms NetBox per network")
+    print(f"  sequential: {sequential:.2f}s")
+    print(f"  pipeline:   {pipelined:.2f}s ({args.fetch_workers} fetch / {args.write_workers} write workers)")
+    print(f"  speedup:    {sequential / pipelined:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark for bulk client-to-subnet assignment.
+
+Builds an organization-wide ClientTable with clients spread across many
+networks that all reuse the same RFC1918 subnets, then times the NumPy and
+pure Python assignment paths.
+
+Usage:
+    python benchmarks/bench_subnet_assign.py [--clients 1000000] [--networks 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clients.client_table import ClientTable
+from sync.prefix_registry import PrefixRegistry
+from sync.subnet_assign import assign_subnets, get_numpy
+
+VLANS = [
+    {"id": "10", "name": "Data", "subnet": "192.168.10.0/24"},
+    {"id": "20", "name": "Voice", "subnet": "192.168.20.0/24"},
+    {"id": "30", "name": "Guest", "subnet": "10.30.0.0/16"},
+    {"id": "31", "name": "Guest Printers", "subnet": "10.30.5.0/24"},
+]
+
+
+def build(clients, networks):
+    """Build a registry and a client table for the benchmark."""
+    rng = random.Random(7)
+    registry = PrefixRegistry()
+    for network in range(networks):
+        registry.register_network(f"N_{network}", VLANS)
+
+    table = ClientTable()
+    code_of = {}
+    for row in range(clients):
+        network_id = f"N_{rng.randrange(networks)}"
+        code = code_of.get(network_id)
+        if code is None:
+            code = code_of[network_id] = table._network_code(network_id)
+        base = rng.choice((0xC0A80A00, 0xC0A81400, 0x0A1E0000, 0x0A1E0500, 0xAC100000))
+        table.ips.append(base + rng.randrange(1, 250))
+        table.macs.append(row)
+        table.descriptions.append(None)
+        table.network_codes.append(code)
+    return registry, table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk subnet assignment.')
+    parser.add_argument('--clients', type=int, default=1000000, help='Number of clients')
+    parser.add_argument('--networks', type=int, default=1000, help='Number of networks')
+    parser.add_argument('--skip-python', action='store_true', help='Skip the pure Python path')
+    args = parser.parse_args()
+
+    registry, table = build(args.clients, args.networks)
+    print(f"{len(table)} clients across {args.networks} networks, {len(registry)} registered subnets")
+
+    if get_numpy() is not None:
+        start = time.perf_counter()
+        assignments, _ = assign_subnets(table, registry, use_numpy=True)
+        elapsed = time.perf_counter() - start
+        print(f"  numpy:  {elapsed:.3f}s ({int((assignments >= 0).sum())} assigned)")
+    else:
+        print("  numpy:  not installed")
+
+    if not args.skip_python:
+        start = time.perf_counter()
+        assignments, _ = assign_subnets(table, registry, use_numpy=False)
+        elapsed = time.perf_counter() - start
+        print(f"  python: {elapsed:.3f}s ({sum(1 for index in assignments if index >= 0)} assigned)")
+
+
+if __name__ == '__main__':
+    main()
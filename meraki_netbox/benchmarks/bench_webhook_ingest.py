@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark for webhook ingestion.
+
+Pushes signed Meraki alerts through the Flask route and through the ASGI
+front end in-process (no network server), with the sync itself replaced by
+a no-op, and reports requests per second on one core. A third of the alerts
+trigger a sync, spread over --networks networks.
+
+Usage:
+    python benchmarks/bench_webhook_ingest.py [--requests 5000]
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+SECRET = 'benchmark-secret'
+os.environ['MERAKI_WEBHOOK_SECRET'] = SECRET
+
+from automation import webhook_server
+from automation.webhook_ingest import SyncQueue, WebhookApp
+
+ALERT_TYPES = ['VLAN configuration changed', 'Motion detected', 'Client connectivity changed']
+
+
+def build_requests(count, networks):
+    """Build signed (body, signature) pairs for a mix of alerts."""
+    requests = []
+    for index in range(count):
+        body = json.dumps({
+            'alertType': ALERT_TYPES[index % len(ALERT_TYPES)],
+            'networkId': f'N_{index % networks}',
+            'organizationId': 'org_1',
+            'alertData': {'details': 'x' * 500},
+        }).encode()
+        signature = 'sha256=' + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+        requests.append((body, signature))
+    return requests
+
+
+def bench_flask(requests):
+    webhook_server.trigger_sync = lambda network_id=None, org_id=None: (True, '')
+    webhook_server.invalidate_inventory_cache = lambda network_id=None, org_id=None: None
+    client = webhook_server.app.test_client()
+    start = time.perf_counter()
+    for body, signature in requests:
+        client.post('/webhook/meraki', data=body, content_type='application/json',
+                    headers={'X-Meraki-Signature': signature})
+    return time.perf_counter() - start
+
+
+def bench_asgi(requests):
+    async def runner(network_id=None, org_id=None, priority=None):
+        pass
+
+    app = WebhookApp(secret=SECRET, queue=SyncQueue(runner))
+
+    async def send(message):
+        pass
+
+    async def run():
+        start = time.perf_counter()
+        for body, signature in requests:
+            messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+            scope = {'type': 'http', 'method': 'POST', 'path': '/webhook/meraki',
+                     'headers': [(b'content-type', b'application/json'),
+                                 (b'x-meraki-signature', signature.encode())]}
+            await app(scope, lambda: asyncio.sleep(0, messages.pop()), send)
+        elapsed = time.perf_counter() - start
+        await app.queue.stop()
+        return elapsed
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark webhook ingestion.')
+    parser.add_argument('--requests', type=int, default=5000, help='Number of webhooks per front end')
+    parser.add_argument('--networks', type=int, default=50, help='Distinct networks named by the alerts')
+    args = parser.parse_args()
+
+    requests = build_requests(args.requests, args.networks)
+    # Keep the per-request log lines out of the measurement's output
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        flask_seconds = bench_flask(requests)
+        asgi_seconds = bench_asgi(requests)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    for label, seconds in (('flask', flask_seconds), ('asgi', asgi_seconds)):
+        print(f"{label}: {args.requests / seconds:8.0f} requests/s ({seconds * 1e6 / args.requests:.0f} us each)")
+
+
+if __name__ == '__main__':
+    main()
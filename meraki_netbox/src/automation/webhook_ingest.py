@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Async Webhook Ingestion Front End for Automated Meraki NetBox Sync
+
+A plain ASGI application that takes Meraki webhooks off the wire as fast as
+possible: it verifies the HMAC signature, matches the alert type against a
+precompiled pattern, queues a sync for the alert's network or organization
+and answers 202 straight away. Queued syncs run in the background. A
+SyncRegistry shared by all worker processes makes sure a network is synced
+by one process at a time: a trigger for a sync that is already waiting
+attaches to it, and one for a running sync asks for a single follow-up run.
+
+Every other path is served by the Flask app in webhook_server.py, so its
+routes stay available. The app is built by create_app(), so importing this
+module loads no configuration and opens no registry. Run it with any ASGI
+server in factory mode, e.g.:
+
+    gunicorn -k uvicorn.workers.UvicornWorker 'meraki_netbox.src.automation.webhook_ingest:create_app()'
+    uvicorn --factory meraki_netbox.src.automation.webhook_ingest:create_app
+"""
+
+import asyncio
+import hashlib
+import hmac
+import io
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.sync.priorities import PRIORITY_INTERACTIVE, PRIORITY_NAMES
+from src.sync.scheduler import SyncScheduler
+from src.utils.config import get_state_dir, load_config
+from src.utils.sync_registry import SyncRegistry
+
+# Alert types that change what the sync writes to NetBox
+SYNC_TRIGGERS = (
+    'VLAN configuration changed',
+    'Network configuration changed',
+    'DHCP settings changed',
+    'IP assignment changed',
+    'Subnet changed',
+    'appliance_connectivity_change',
+)
+
+SYNC_SCRIPT_PATH = os.path.join(os.path.dirname(__file__), '..', 'sync_networks.py')
+
+# Largest webhook body accepted; Meraki alerts are a few kilobytes
+MAX_BODY_BYTES = 1024 * 1024
+
+# Default syncs waiting to run before new webhooks are turned away, and seconds a sync may take
+DEFAULT_QUEUE_SIZE = 1000
+SYNC_TIMEOUT = 300
+
+
+def inventory_cache_path():
+    """Path of the Meraki inventory cache shared with sync_networks.py.
+
+    Resolved on use rather than at import, so a state directory set in .env is
+    honoured once load_config() has run.
+    """
+    return os.path.join(get_state_dir(), 'inventory_cache.sqlite')
+
+
+def sync_registry_path():
+    """Path of the sync registry shared by the webhook workers and sync runs."""
+    return os.path.join(get_state_dir(), 'sync_registry.sqlite')
+
+
+def compile_alert_matcher(triggers=SYNC_TRIGGERS):
+    """Compile alert types into one case-insensitive search, built once instead of per request.
+
+    Args:
+        triggers (iterable): Alert type fragments that trigger a sync
+
+    Returns:
+        callable: Takes an alert type and returns a match object if it triggers a sync
+    """
+    return re.compile('|'.join(re.escape(trigger) for trigger in triggers), re.IGNORECASE).search
+
+
+class SignatureVerifier:
+    """Checks 'sha256=<hex>' webhook signatures against a secret keyed once up front."""
+
+    def __init__(self, secret):
+        """Initialize the verifier.
+
+        Args:
+            secret (str): Shared webhook secret
+        """
+        self._mac = hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+
+    def __call__(self, payload, signature):
+        """Verify the signature of a raw request body.
+
+        Args:
+            payload (bytes): Raw request body
+            signature (str or bytes): Value of the X-Meraki-Signature header
+
+        Returns:
+            bool: True if the signature matches
+        """
+        if not signature:
+            return False
+        if isinstance(signature, bytes):
+            signature = signature.decode('latin-1')
+        # Meraki sends signature as 'sha256=<hash>'
+        if not signature.startswith('sha256='):
+            return False
+
+        mac = self._mac.copy()
+        mac.update(payload)
+        return hmac.compare_digest(mac.hexdigest(), signature[7:])
+
+
+def invalidate_inventory_cache(network_id=None, org_id=None):
+    """Drop cached Meraki inventory for the network named in an alert.
+
+    The sync run triggered next then re-fetches exactly what the alert changed.
+    """
+    from src.utils.inventory_cache import InventoryCache
+
+    try:
+        InventoryCache(inventory_cache_path()).invalidate_network(network_id, org_id)
+    except Exception as e:
+        print(f"⚠️  Could not invalidate inventory cache: {e}")
+
+
+async def run_sync(network_id=None, org_id=None, priority='interactive'):
+    """Run sync_networks.py for a network or organization without blocking the event loop.
+
+    Args:
+        network_id (str, optional): Network to sync
+        org_id (str, optional): Organization to sync when no network is given
+        priority (str): Priority class the sync runs with, so full syncs yield to it
+
+    Returns:
+        bool: True if the sync completed successfully
+    """
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, invalidate_inventory_cache, network_id, org_id)
+
+    cmd = [sys.executable, SYNC_SCRIPT_PATH, '--priority', priority]
+    if network_id:
+        cmd.extend(['--network', network_id])
+    elif org_id:
+        cmd.extend(['--org', org_id])
+    print(f"🔄 Triggering sync: {' '.join(cmd)}")
+
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), SYNC_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        print(f"⏰ Sync timed out after {SYNC_TIMEOUT // 60} minutes")
+        return False
+
+    if process.returncode == 0:
+        print("✅ Sync completed successfully")
+        return True
+    print(f"❌ Sync failed: {stderr.decode(errors='replace')}")
+    return False
+
+
+class SyncQueue:
+    """Queue of syncs to run, holding each network or organization at most once while it waits.
+
+    Syncs run through a SyncScheduler in the shared priority classes; webhooks are interactive.
+    """
+
+    def __init__(self, runner=run_sync, maxsize=None, workers=1, registry=None):
+        """Initialize the queue.
+
+        Args:
+            runner (callable): Coroutine function taking network_id, org_id and priority that runs a sync
+            maxsize (int, optional): Syncs allowed to wait at once
+            workers (int): Syncs run concurrently
+            registry (SyncRegistry, optional): Shares pending and running syncs with other processes
+        """
+        self.runner = runner
+        self.registry = registry
+        self.scheduler = SyncScheduler(
+            workers=workers,
+            maxsize=maxsize or int(os.getenv('WEBHOOK_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)),
+            contention=registry.busy if registry is not None else None
+        )
+
+    def start(self):
+        """Start the workers; safe to call more than once."""
+        self.scheduler.start()
+
+    async def join(self):
+        """Wait until every queued sync has run."""
+        await self.scheduler.join()
+
+    async def stop(self):
+        """Cancel the workers, dropping syncs that have not started."""
+        dropped = await self.scheduler.stop()
+        if self.registry is not None:
+            # Let other workers queue these syncs again instead of attaching to them
+            for kind, object_id in dropped:
+                self.registry.forget(f"{kind}:{object_id}")
+
+    def submit(self, network_id=None, org_id=None, priority=PRIORITY_INTERACTIVE):
+        """Queue a sync for a network, or for an organization when no network is given.
+
+        Args:
+            network_id (str, optional): Network to sync
+            org_id (str, optional): Organization to sync when no network is given
+            priority (int): Priority class of the sync
+
+        Returns:
+            str: "queued", "pending" if the same sync is already waiting, "running" if it
+                will run again after the sync in progress, or "full"
+        """
+        key = ('network', network_id) if network_id else ('org', org_id)
+        if self.scheduler.is_queued(key):
+            return self.scheduler.submit(key, priority, None)
+        if self.scheduler.full():
+            return 'full'
+        if self.registry is not None:
+            status = self.registry.request(f"{key[0]}:{key[1]}", priority)
+            if status != 'queued':
+                return status
+            job = lambda: self._run_exclusive(key, priority)
+        else:
+            job = lambda: self._run(key, priority)
+        return self.scheduler.submit(key, priority, job)
+
+    async def _run(self, key, priority):
+        kind, object_id = key
+        if kind == 'network':
+            await self.runner(network_id=object_id, priority=PRIORITY_NAMES[priority])
+        else:
+            await self.runner(org_id=object_id, priority=PRIORITY_NAMES[priority])
+
+    async def _run_exclusive(self, key, priority):
+        """Run a sync holding its registry lock, once more for each burst of triggers during the run."""
+        loop = asyncio.get_event_loop()
+        registry_key = f"{key[0]}:{key[1]}"
+        if not await loop.run_in_executor(None, lambda: self.registry.acquire(registry_key, priority=priority)):
+            print(f"ℹ️  Sync for {registry_key} already running in another worker")
+            return
+        while True:
+            try:
+                await self._run(key, priority)
+            except BaseException:
+                # Leave no lock behind when the run fails or the worker is cancelled
+                while self.registry.release(registry_key):
+                    pass
+                raise
+            if not await loop.run_in_executor(None, self.registry.release, registry_key):
+                return
+
+
+def _header(scope, name):
+    """Get a request header from an ASGI scope, or None."""
+    for key, value in scope['headers']:
+        if key == name:
+            return value
+    return None
+
+
+async def _read_body(receive, limit=MAX_BODY_BYTES):
+    """Read a request body, or return None once it grows past limit."""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _send_json(send, status, data, headers=()):
+    body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+                   + list(headers),
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _wsgi_environ(scope, body):
+    """Build the WSGI environ for an ASGI HTTP request."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for key, value in scope['headers']:
+        name = key.decode('latin-1').upper().replace('-', '_')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value.decode('latin-1')
+        else:
+            environ[f'HTTP_{name}'] = value.decode('latin-1')
+    return environ
+
+
+def _call_wsgi(wsgi_app, environ):
+    """Run a WSGI app to completion (blocking) and return its status, headers and body."""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                               for name, value in headers]
+
+    result = wsgi_app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], body
+
+
+class WebhookApp:
+    """ASGI app serving the webhook fast path and handing every other request to Flask."""
+
+    def __init__(self, secret=None, queue=None, matcher=None, fallback=None):
+        """Initialize the app.
+
+        Args:
+            secret (str, optional): Webhook secret (default: MERAKI_WEBHOOK_SECRET)
+            queue (SyncQueue, optional): Queue that runs triggered syncs
+            matcher (callable, optional): Alert type matcher from compile_alert_matcher
+            fallback (optional): WSGI app serving other paths (default: the Flask app, loaded on first use)
+        """
+        if secret is None or queue is None:
+            # The secret and the state directory may both come from .env
+            load_config()
+        if secret is None:
+            secret = os.getenv('MERAKI_WEBHOOK_SECRET', 'your-webhook-secret-here')
+        self.verify = SignatureVerifier(secret)
+        self.queue = queue or SyncQueue(registry=SyncRegistry(sync_registry_path()))
+        self.matcher = matcher or compile_alert_matcher()
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            if scope['path'] == '/webhook/meraki' and scope['method'] == 'POST':
+                await self.meraki_webhook(scope, receive, send)
+            else:
+                await self._forward(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.queue.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.queue.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def meraki_webhook(self, scope, receive, send):
+        """Verify, match and queue a Meraki webhook."""
+        payload = await _read_body(receive)
+        if payload is None:
+            await _send_json(send, 413, {'error': 'Payload too large'})
+            return
+        if not self.verify(payload, _header(scope, b'x-meraki-signature')):
+            await _send_json(send, 401, {'error': 'Invalid signature'})
+            return
+
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict) or not data:
+            await _send_json(send, 400, {'error': 'No JSON data'})
+            return
+
+        alert_type = data.get('alertType') or ''
+        if not self.matcher(alert_type):
+            await _send_json(send, 200, {
+                'status': 'ignored',
+                'message': 'Alert does not require sync',
+                'alert_type': alert_type
+            })
+            return
+
+        network_id = data.get('networkId')
+        org_id = data.get('organizationId')
+        if not network_id and not org_id:
+            await _send_json(send, 400, {'error': 'Alert names no network or organization'})
+            return
+
+        status = self.queue.submit(network_id=network_id, org_id=org_id)
+        if status == 'full':
+            await _send_json(send, 503, {'error': 'Sync queue is full'}, [(b'retry-after', b'30')])
+            return
+        print(f"🎯 Sync {status} for alert: {alert_type} ({network_id or org_id})")
+        await _send_json(send, 202, {
+            'status': status,
+            'network_id': network_id,
+            'organization_id': org_id,
+            'timestamp': datetime.now().isoformat()
+        })
+
+    async def _forward(self, scope, receive, send):
+        """Serve a request with the Flask app in a worker thread."""
+        if self.fallback is None:
+            from src.automation.webhook_server import app as flask_app
+            self.fallback = flask_app
+
+        body = await _read_body(receive)
+        if body is None:
+            await _send_json(send, 413, {'error': 'Payload too large'})
+            return
+        loop = asyncio.get_event_loop()
+        status, headers, content = await loop.run_in_executor(
+            None, _call_wsgi, self.fallback, _wsgi_environ(scope, body)
+        )
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+
+def create_app():
+    """Build the webhook app with its configuration from the environment and .env.
+
+    Returns:
+        WebhookApp: The ASGI app
+    """
+    return WebhookApp()
@@ -8,10 +8,8 @@ when network changes occur.
 
 import os
 import sys
-import json
-import hmac
-import hashlib
 import subprocess
+import threading
 from datetime import datetime
 from flask import Flask, request, jsonify
 from dotenv import load_dotenv
@@ -19,6 +17,14 @@ from dotenv import load_dotenv
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
+from src.automation.webhook_ingest import (
+    SignatureVerifier,
+    compile_alert_matcher,
+    invalidate_inventory_cache,
+    sync_registry_path,
+)
+from src.utils.sync_registry import SyncRegistry, default_owner
+
 # Load environment variables
 load_dotenv()
 
@@ -28,30 +34,17 @@ app = Flask(__name__)
 WEBHOOK_SECRET = os.getenv('MERAKI_WEBHOOK_SECRET', 'your-webhook-secret-here')
 SYNC_SCRIPT_PATH = os.path.join(os.path.dirname(__file__), '..', 'sync_networks.py')
 
-def verify_webhook_signature(payload, signature):
-    """Verify the webhook signature from Meraki."""
-    if not signature:
-        return False
-    
-    # Meraki sends signature as 'sha256=<hash>'
-    if not signature.startswith('sha256='):
-        return False
-    
-    expected_signature = signature[7:]  # Remove 'sha256=' prefix
-    
-    # Calculate the expected signature
-    calculated_signature = hmac.new(
-        WEBHOOK_SECRET.encode('utf-8'),
-        payload,
-        hashlib.sha256
-    ).hexdigest()
-    
-    return hmac.compare_digest(calculated_signature, expected_signature)
+# Keyed once at startup rather than on every request
+verify_webhook_signature = SignatureVerifier(WEBHOOK_SECRET)
+should_sync = compile_alert_matcher()
+
+# Shared with the other gunicorn workers, so two alerts for one network don't sync it twice at once
+sync_registry = SyncRegistry(sync_registry_path())
 
 def trigger_sync(network_id=None, org_id=None):
     """Trigger the synchronization script."""
     try:
-        cmd = ['python3', SYNC_SCRIPT_PATH]
+        cmd = ['python3', SYNC_SCRIPT_PATH, '--priority', 'interactive']
         
         if network_id:
             cmd.extend(['--network', network_id])
@@ -77,6 +70,34 @@ def trigger_sync(network_id=None, org_id=None):
         print(f"❌ Error triggering sync: {e}")
         return False, str(e)
 
+def trigger_sync_once(network_id=None, org_id=None):
+    """Trigger a sync unless the same one is already waiting or running in another worker.
+
+    Returns:
+        tuple: (status, success, output); status is "completed", or "pending"/"running"
+            when the alert was attached to a sync another worker will run
+    """
+    key = f"network:{network_id}" if network_id else f"org:{org_id}"
+    status = sync_registry.request(key)
+    if status != 'queued':
+        print(f"ℹ️  Sync for {key} already {status}, attached alert to it")
+        return status, True, ''
+
+    # Threads of one worker need their own owner IDs
+    owner = f"{default_owner()}:{threading.get_ident()}"
+    if not sync_registry.acquire(key, owner):
+        return 'running', True, ''
+    while True:
+        try:
+            success, output = trigger_sync(network_id=network_id, org_id=org_id)
+        except BaseException:
+            while sync_registry.release(key, owner):
+                pass
+            raise
+        # Alerts that came in during the run need one more
+        if not sync_registry.release(key, owner):
+            return 'completed', success, output
+
 @app.route('/webhook/meraki', methods=['POST'])
 def meraki_webhook():
     """Handle incoming Meraki webhooks."""
@@ -96,28 +117,23 @@ def meraki_webhook():
         if not data:
             return jsonify({'error': 'No JSON data'}), 400
         
-        print(f"📨 Received webhook: {json.dumps(data, indent=2)}")
-        
         # Extract relevant information
-        alert_type = data.get('alertType', '')
+        alert_type = data.get('alertType') or ''
         network_id = data.get('networkId')
         org_id = data.get('organizationId')
+        print(f"📨 Received webhook: {alert_type} ({network_id or org_id})")
         
         # Determine if this is a change that requires sync
-        sync_triggers = [
-            'VLAN configuration changed',
-            'Network configuration changed', 
-            'DHCP settings changed',
-            'IP assignment changed',
-            'Subnet changed',
-            'appliance_connectivity_change'
-        ]
-        
-        should_sync = any(trigger.lower() in alert_type.lower() for trigger in sync_triggers)
-        
-        if should_sync:
+        if should_sync(alert_type):
             print(f"🎯 Triggering sync for alert: {alert_type}")
-            success, output = trigger_sync(network_id=network_id, org_id=org_id)
+            invalidate_inventory_cache(network_id=network_id, org_id=org_id)
+            sync_status, success, output = trigger_sync_once(network_id=network_id, org_id=org_id)
+            if sync_status != 'completed':
+                return jsonify({
+                    'status': sync_status,
+                    'message': 'Sync already in progress in another worker',
+                    'timestamp': datetime.now().isoformat()
+                }), 202
             
             return jsonify({
                 'status': 'success' if success else 'error',
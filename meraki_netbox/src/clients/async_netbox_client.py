@@ -0,0 +1,662 @@
+import asyncio
+import os
+
+import aiohttp
+
+from .netbox_client import (
+    BULK_CHUNK_SIZE,
+    DEFAULT_OWNER_TAG,
+    DEFAULT_PAGE_SIZE,
+    PREFETCH_FIELDS,
+    ip_key,
+    prefix_key,
+)
+
+# API paths of the object kinds the sync reads and writes
+ENDPOINTS = {
+    "vlans": "ipam/vlans",
+    "prefixes": "ipam/prefixes",
+    "ip_addresses": "ipam/ip-addresses",
+    "vlan_groups": "ipam/vlan-groups",
+    "vrfs": "ipam/vrfs",
+    "tags": "extras/tags",
+}
+
+# Object change log endpoints, newest NetBox first (the change log moved to core in NetBox 4.0)
+OBJECT_CHANGE_PATHS = ("core/object-changes", "extras/object-changes")
+
+# Default number of NetBox requests allowed in flight at once
+DEFAULT_MAX_IN_FLIGHT = 8
+
+
+class NetBoxAPIError(Exception):
+    """Raised when a NetBox request fails.
+
+    status is the HTTP status, or None when no response was received. retry_after
+    holds the seconds from a Retry-After header, if NetBox or its proxy sent one.
+    """
+
+    def __init__(self, status, message, method=None, url=None, retry_after=None):
+        if status is None:
+            super().__init__(f"{method} {url} failed: {message}")
+        else:
+            super().__init__(f"{method} {url} failed with HTTP {status}: {message}")
+        self.status = status
+        self.method = method
+        self.url = url
+        self.retry_after = retry_after
+
+
+def _retry_after(headers):
+    """Parse a Retry-After header given in seconds."""
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _slug_of(tag):
+    """Get the slug of a tag given as a nested object or a reference."""
+    return tag.get("slug") if isinstance(tag, dict) else None
+
+
+def _id_of(value):
+    """Get the ID of a nested object, which NetBox returns as a dict."""
+    return value.get("id") if isinstance(value, dict) else value
+
+
+def _value_of(value):
+    """Get the value of a choice field such as status."""
+    return value.get("value") if isinstance(value, dict) else value
+
+
+class AsyncNetBoxClient:
+    """Asynchronous client for the NetBox API on a pooled aiohttp session.
+
+    It mirrors NetBoxClient's create_or_update_* methods and in-memory indexes, and
+    adds bulk operations. Objects are plain dictionaries as returned by the REST API.
+    Use it as an async context manager so the session is closed:
+
+        async with AsyncNetBoxClient() as netbox:
+            await netbox.create_or_update_ip_address("10.0.0.5/24")
+    """
+
+    def __init__(self, url=None, token=None, owner_tag=None, vrf_per_network=None, page_size=None,
+                 max_in_flight=None, session=None, cassette=None):
+        """Initialize the async NetBox client.
+
+        Args:
+            url (str): NetBox API URL
+            token (str): NetBox API token
+            owner_tag (str, optional): Slug of the tag marking objects owned by the sync
+            vrf_per_network (bool, optional): Place each Meraki network's prefixes and IPs in its own VRF,
+                so subnets reused across networks become separate NetBox objects (default: off,
+                as objects of earlier runs live in the global table; see NETBOX_VRF_PER_NETWORK)
+            page_size (int, optional): Objects per page when preloading indexes
+            max_in_flight (int, optional): Maximum concurrent requests to NetBox
+            session (aiohttp.ClientSession, optional): Session to use instead of creating one
+            cassette (Cassette, optional): Cassette the created session records to or replays from
+
+        Raises:
+            ValueError: If URL or token is not provided and not in environment variables.
+        """
+        # Try to get URL from parameters or environment variables
+        self.url = url or os.getenv("NETBOX_URL")
+        if not self.url:
+            raise ValueError("NetBox URL not provided")
+
+        # Try to get token from parameters or environment variables
+        self.token = token or os.getenv("NETBOX_TOKEN")
+        if not self.token:
+            raise ValueError("NetBox token not provided")
+
+        self.base_url = self.url.rstrip("/")
+        if not self.base_url.endswith("/api"):
+            self.base_url += "/api"
+
+        self.owner_tag = owner_tag or os.getenv("NETBOX_OWNER_TAG", DEFAULT_OWNER_TAG)
+        if vrf_per_network is None:
+            vrf_per_network = os.getenv("NETBOX_VRF_PER_NETWORK", "false").lower() in ("1", "true", "yes")
+        self.vrf_per_network = vrf_per_network
+        self.page_size = page_size or int(os.getenv("NETBOX_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+        self.max_in_flight = max_in_flight or int(os.getenv("NETBOX_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT))
+
+        self._session = session
+        self._owns_session = session is None
+        self.cassette = cassette
+        self._semaphore = None
+        self._owner_tag_ready = False
+
+        # Same bookkeeping as NetBoxClient: owned IDs seen in this run, per-network
+        # scopes and indexes keyed by (scope ID, key)
+        self.seen_ids = {"prefixes": set(), "ip_addresses": set()}
+        self._scopes = {}
+        self._vlan_index = {}
+        self._prefix_index = {}
+        self._ip_index = {}
+        self._loaded = set()
+        self._load_locks = {}
+        self._object_changes_path = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Close the HTTP session if this client created it."""
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        """Create the pooled session and request semaphore on first use."""
+        if self._session is None:
+            auth_scheme = "Bearer" if self.token.startswith("nbt_") else "Token"
+            self._session = aiohttp.ClientSession(
+                headers={
+                    "Authorization": f"{auth_scheme} {self.token}",
+                    "Accept": "application/json",
+                    "Content-Type": "application/json",
+                },
+                connector=aiohttp.TCPConnector(limit=self.max_in_flight),
+            )
+            if self.cassette is not None:
+                self._session = self.cassette.wrap_aiohttp(self._session)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._session
+
+    async def request(self, method, path, params=None, json=None):
+        """Send a request to the NetBox API.
+
+        Args:
+            method (str): HTTP method
+            path (str): Path below /api, e.g. "ipam/prefixes/"
+            params (dict, optional): Query parameters
+            json (optional): JSON body
+
+        Returns:
+            The decoded JSON response, or None for empty responses
+
+        Raises:
+            NetBoxAPIError: If NetBox answers with an error status or can't be reached.
+        """
+        session = self._get_session()
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        async with self._semaphore:
+            try:
+                async with session.request(method, url, params=params, json=json) as response:
+                    if response.status >= 400:
+                        raise NetBoxAPIError(response.status, await response.text(), method, url,
+                                             _retry_after(response.headers))
+                    if response.status == 204:
+                        return None
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise NetBoxAPIError(None, str(e) or type(e).__name__, method, url) from e
+
+    async def fetch_all(self, kind, **filters):
+        """Fetch every object of a kind matching the filters, with only the fields the sync reads.
+
+        Args:
+            kind (str): "vlans", "prefixes" or "ip_addresses"
+            **filters: NetBox filter query parameters
+
+        Returns:
+            list: Object dictionaries
+        """
+        path = f"{ENDPOINTS[kind]}/"
+        params = {key: str(value) for key, value in filters.items()}
+        params["limit"] = str(self.page_size)
+        if kind in PREFETCH_FIELDS:
+            params["fields"] = ",".join(PREFETCH_FIELDS[kind])
+
+        first_page = await self.request("GET", path, params=dict(params, offset="0"))
+        results = list(first_page["results"])
+        count = first_page.get("count", len(results))
+
+        if first_page.get("next") and results:
+            # NetBox may serve fewer objects per page than requested
+            page_size = len(results)
+            pages = await asyncio.gather(*[
+                self.request("GET", path, params=dict(params, limit=str(page_size), offset=str(offset)))
+                for offset in range(page_size, count, page_size)
+            ])
+            for page in pages:
+                results.extend(page["results"])
+
+        return results
+
+    async def count_existing(self, kind, object_ids):
+        """Count how many of the given objects still exist, without fetching them.
+
+        Args:
+            kind (str): Object kind, e.g. "ip_addresses"
+            object_ids (iterable): IDs of the objects to look for
+
+        Returns:
+            int: Number of the objects found in NetBox
+        """
+        object_ids = sorted(set(object_ids))
+        path = f"{ENDPOINTS[kind]}/"
+        # Only the count is read, so ask for a single brief object per request
+        pages = await asyncio.gather(*[
+            self.request("GET", path, params=[("id", str(object_id)) for object_id in
+                                              object_ids[start:start + BULK_CHUNK_SIZE]]
+                         + [("brief", "1"), ("limit", "1")])
+            for start in range(0, len(object_ids), BULK_CHUNK_SIZE)
+        ])
+        return sum(page["count"] for page in pages)
+
+    async def _request_object_changes(self, params):
+        """GET the object change log, finding out once which endpoint this NetBox serves it at."""
+        paths = [self._object_changes_path] if self._object_changes_path else OBJECT_CHANGE_PATHS
+        for path in paths:
+            try:
+                page = await self.request("GET", f"{path}/", params=params)
+            except NetBoxAPIError as e:
+                if e.status == 404 and path != paths[-1]:
+                    continue
+                raise
+            self._object_changes_path = path
+            return page
+
+    async def latest_object_change_id(self):
+        """Get the ID of the newest entry in the object change log, or 0 when it is empty."""
+        page = await self._request_object_changes([("ordering", "-id"), ("limit", "1"), ("brief", "1")])
+        return page["results"][0]["id"] if page["results"] else 0
+
+    async def fetch_object_changes(self, after_id, object_types, exclude_user=None):
+        """Fetch the object change log entries newer than a known one.
+
+        Pages are read by ID rather than offset, so entries logged meanwhile are not skipped.
+
+        Args:
+            after_id (int): ID of the newest entry already processed
+            object_types (iterable): Content types to include, e.g. "ipam.prefix"
+            exclude_user (str, optional): User whose changes are left out, e.g. the sync's own
+
+        Returns:
+            list: Change dictionaries with "id", "time", "action", "changed_object_type"
+                and "changed_object_id", oldest first
+        """
+        filters = [("changed_object_type", object_type) for object_type in object_types]
+        filters += [("ordering", "id"), ("limit", str(self.page_size))]
+        if exclude_user:
+            filters.append(("user_name__n", exclude_user))
+
+        changes = []
+        while True:
+            page = await self._request_object_changes(filters + [("id__gt", str(after_id))])
+            changes.extend(page["results"])
+            if not page.get("next") or not page["results"]:
+                return changes
+            after_id = page["results"][-1]["id"]
+
+    def clear_indexes(self):
+        """Forget the scopes and indexes loaded so far, so the next writes read them from NetBox again.
+
+        A long-running process calls this now and then to pick up changes made in NetBox
+        by others; within a single run the indexes stay valid.
+        """
+        self._owner_tag_ready = False
+        self._scopes.clear()
+        self._vlan_index.clear()
+        self._prefix_index.clear()
+        self._ip_index.clear()
+        self._loaded.clear()
+        self._load_locks.clear()
+
+    async def _load_once(self, key, loader):
+        """Run an index loader once, even when many coroutines ask for it concurrently."""
+        if key in self._loaded:
+            return
+        lock = self._load_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key not in self._loaded:
+                await loader()
+                self._loaded.add(key)
+
+    async def _get_or_create(self, kind, lookup, data):
+        """Get a single object matching a lookup, creating it when missing."""
+        existing = await self.request("GET", f"{ENDPOINTS[kind]}/", params=dict(lookup, limit="1"))
+        if existing["results"]:
+            return existing["results"][0]
+        return await self.request("POST", f"{ENDPOINTS[kind]}/", json=data)
+
+    async def _ensure_owner_tag(self):
+        """Make sure the ownership tag exists in NetBox before it is referenced."""
+        if self._owner_tag_ready:
+            return
+
+        async def create():
+            await self._get_or_create("tags", {"slug": self.owner_tag}, {
+                "name": self.owner_tag,
+                "slug": self.owner_tag,
+                "description": "Managed by the Meraki to NetBox sync",
+            })
+        # Concurrent writes must not each try to create the tag
+        await self._load_once(("tags", self.owner_tag), create)
+        self._owner_tag_ready = True
+
+    def _owner_tags(self, existing_tags=None):
+        """Build a tag list that includes the ownership tag."""
+        slugs = [_slug_of(tag) for tag in existing_tags or []]
+        tags = [{"slug": slug} for slug in slugs if slug]
+        if self.owner_tag not in slugs:
+            tags.append({"slug": self.owner_tag})
+        return tags
+
+    async def get_network_scope(self, network_id, network_name):
+        """Get the NetBox VLAN group and VRF that hold a Meraki network's objects.
+
+        Args:
+            network_id (str): Meraki network ID
+            network_name (str): Meraki network name
+
+        Returns:
+            dict: {"vlan_group": VLAN group object, "vrf": VRF object or None}
+        """
+        if network_id in self._scopes:
+            return self._scopes[network_id]
+
+        async def create():
+            slug = f"meraki-{network_id}".lower()
+            vlan_group = await self._get_or_create("vlan_groups", {"slug": slug}, {
+                "name": f"Meraki {network_name} ({network_id})"[:100],
+                "slug": slug,
+                "description": f"VLANs of Meraki network {network_name}",
+            })
+
+            vrf = None
+            if self.vrf_per_network:
+                vrf = await self._get_or_create("vrfs", {"name": slug}, {
+                    "name": slug,
+                    "description": f"Meraki network {network_name}",
+                })
+
+            self._scopes[network_id] = {"vlan_group": vlan_group, "vrf": vrf}
+        # Concurrent prefix writes of one network must not each create its VLAN group and VRF
+        await self._load_once(("scope", network_id), create)
+        return self._scopes[network_id]
+
+    @staticmethod
+    def _scope_id(scope_object):
+        """Get the ID of a scope object, or None for the global scope."""
+        return scope_object.get("id") if scope_object else None
+
+    async def load_vlan_index(self, group_id):
+        """Index every VLAN of a VLAN group by (group ID, vid)."""
+        async def load():
+            for vlan in await self.fetch_all("vlans", group_id=group_id if group_id is not None else "null"):
+                self._vlan_index[(group_id, vlan["vid"])] = vlan
+        await self._load_once(("vlans", group_id), load)
+
+    async def load_prefix_index(self, vrf_id):
+        """Index every prefix of a VRF by (VRF ID, prefix)."""
+        async def load():
+            for prefix in await self.fetch_all("prefixes", vrf_id=vrf_id if vrf_id is not None else "null"):
+                self._prefix_index[(vrf_id, prefix_key(prefix["prefix"]))] = prefix
+        await self._load_once(("prefixes", vrf_id), load)
+
+    async def load_ip_index(self, vrf_id, parent):
+        """Index every IP address inside a parent prefix of a VRF by (VRF ID, host)."""
+        async def load():
+            ips = await self.fetch_all("ip_addresses", parent=prefix_key(parent),
+                                       vrf_id=vrf_id if vrf_id is not None else "null")
+            for ip in ips:
+                self._ip_index[(vrf_id, ip_key(ip["address"]))] = ip
+        await self._load_once(("ip_addresses", vrf_id, prefix_key(parent)), load)
+
+    async def _save(self, kind, existing, changes):
+        """PATCH only the fields that differ from an existing object, like pynetbox's save()."""
+        if not changes:
+            return existing
+        updated = await self.request("PATCH", f"{ENDPOINTS[kind]}/{existing['id']}/", json=changes)
+        existing.update(updated or changes)
+        return existing
+
+    def _ip_changes(self, existing, data):
+        """Work out which fields of an existing IP address a desired state would change."""
+        changes = {}
+        if data.get("description") and existing.get("description") != data["description"]:
+            changes["description"] = data["description"]
+        if data.get("dns_name") and existing.get("dns_name") != data["dns_name"]:
+            changes["dns_name"] = data["dns_name"]
+        if _value_of(existing.get("status")) != data.get("status", "active"):
+            changes["status"] = data.get("status", "active")
+        if self.owner_tag not in [_slug_of(tag) for tag in existing.get("tags") or []]:
+            changes["tags"] = self._owner_tags(existing.get("tags"))
+        return changes
+
+    async def create_or_update_vlan(self, vlan_id, name, description=None, vlan_group=None):
+        """Create a VLAN in NetBox or update it if it already exists.
+
+        Args:
+            vlan_id (int): The VLAN ID
+            name (str): The VLAN name
+            description (str, optional): Description for the VLAN
+            vlan_group (dict, optional): VLAN group the VLAN belongs to (None for ungrouped)
+
+        Returns:
+            dict: The created or updated VLAN object
+        """
+        group_id = self._scope_id(vlan_group)
+        await self.load_vlan_index(group_id)
+        existing_vlan = self._vlan_index.get((group_id, vlan_id))
+
+        if existing_vlan is not None:
+            changes = {}
+            if existing_vlan.get("name") != name:
+                changes["name"] = name
+            if description and existing_vlan.get("description") != description:
+                changes["description"] = description
+            return await self._save("vlans", existing_vlan, changes)
+
+        vlan_data = {"vid": vlan_id, "name": name}
+        if description:
+            vlan_data["description"] = description
+        if group_id is not None:
+            vlan_data["group"] = group_id
+
+        new_vlan = await self.request("POST", f"{ENDPOINTS['vlans']}/", json=vlan_data)
+        self._vlan_index[(group_id, vlan_id)] = new_vlan
+        return new_vlan
+
+    async def create_or_update_prefix(self, prefix, description=None, vlan_id=None, vlan_name=None,
+                                      vlan_group=None, vrf=None):
+        """Create a prefix in NetBox or update it if it already exists.
+
+        Args:
+            prefix (str): The network prefix in CIDR notation
+            description (str, optional): Description for the prefix
+            vlan_id (int, optional): ID of the associated VLAN
+            vlan_name (str, optional): Name of the associated VLAN
+            vlan_group (dict, optional): VLAN group the associated VLAN belongs to
+            vrf (dict, optional): VRF the prefix belongs to (None for the global table)
+
+        Returns:
+            dict: The created or updated prefix object
+        """
+        vlan_object = None
+        if vlan_id is not None:
+            vlan_object = await self.create_or_update_vlan(
+                vlan_id=vlan_id,
+                name=vlan_name or f"VLAN {vlan_id}",
+                description=f"Meraki VLAN {vlan_id}",
+                vlan_group=vlan_group
+            )
+
+        await self._ensure_owner_tag()
+        vrf_id = self._scope_id(vrf)
+        index_key = (vrf_id, prefix_key(prefix))
+        await self.load_prefix_index(vrf_id)
+        existing_prefix = self._prefix_index.get(index_key)
+
+        if existing_prefix is not None:
+            changes = {}
+            if description and existing_prefix.get("description") != description:
+                changes["description"] = description
+            if vlan_object is not None and _id_of(existing_prefix.get("vlan")) != vlan_object["id"]:
+                changes["vlan"] = vlan_object["id"]
+            if self.owner_tag not in [_slug_of(tag) for tag in existing_prefix.get("tags") or []]:
+                changes["tags"] = self._owner_tags(existing_prefix.get("tags"))
+            result = await self._save("prefixes", existing_prefix, changes)
+        else:
+            prefix_data = {"prefix": prefix, "tags": self._owner_tags()}
+            if description:
+                prefix_data["description"] = description
+            if vlan_object is not None:
+                prefix_data["vlan"] = vlan_object["id"]
+            if vrf_id is not None:
+                prefix_data["vrf"] = vrf_id
+            result = await self.request("POST", f"{ENDPOINTS['prefixes']}/", json=prefix_data)
+            self._prefix_index[index_key] = result
+
+        self.seen_ids["prefixes"].add(result["id"])
+        return result
+
+    async def create_or_update_ip_address(self, ip_address, description=None, dns_name=None, status="active",
+                                          vrf=None, parent=None):
+        """Create an IP address in NetBox or update it if it already exists.
+
+        Args:
+            ip_address (str): The IP address in CIDR notation
+            description (str, optional): Description for the IP address
+            dns_name (str, optional): DNS name for the IP address
+            status (str, optional): Status of the IP address (default: "active")
+            vrf (dict, optional): VRF the IP address belongs to (None for the global table)
+            parent (str, optional): Prefix containing the IP address, in CIDR notation
+
+        Returns:
+            dict: The created or updated IP address object
+        """
+        results = await self.bulk_apply_ip_addresses([{
+            "address": ip_address,
+            "description": description,
+            "dns_name": dns_name,
+            "status": status,
+            "vrf": self._scope_id(vrf),
+            "parent": parent,
+        }])
+        return results["objects"][0]
+
+    async def bulk_apply_ip_addresses(self, items):
+        """Create or update many IP addresses with bulk requests.
+
+        Existing addresses are diffed against the in-memory index; new ones are sent
+        in bulk POSTs and changed ones in bulk PATCHes, BULK_CHUNK_SIZE at a time.
+
+        Args:
+            items (list): Dictionaries with "address", "description", "dns_name", "status",
+                "vrf" (VRF ID or None) and "parent" (prefix or None)
+
+        Returns:
+            dict: "created", "updated" and "unchanged" counts, and "objects" in item order
+        """
+        await self._ensure_owner_tag()
+        await asyncio.gather(*[
+            self.load_ip_index(vrf_id, parent)
+            for vrf_id, parent in {(item.get("vrf"), item["parent"]) for item in items if item.get("parent")}
+        ])
+
+        objects = [None] * len(items)
+        creates = []
+        updates = []
+        unchanged = 0
+
+        for position, item in enumerate(items):
+            vrf_id = item.get("vrf")
+            index_key = (vrf_id, ip_key(item["address"]))
+            existing_ip = self._ip_index.get(index_key)
+            if existing_ip is None and not item.get("parent"):
+                matches = await self.request("GET", f"{ENDPOINTS['ip_addresses']}/", params={
+                    "address": item["address"],
+                    "vrf_id": str(vrf_id) if vrf_id is not None else "null",
+                })
+                existing_ip = matches["results"][0] if matches["results"] else None
+
+            if existing_ip is None:
+                data = {"address": item["address"], "status": item.get("status") or "active",
+                        "tags": self._owner_tags()}
+                for field in ("description", "dns_name"):
+                    if item.get(field):
+                        data[field] = item[field]
+                if vrf_id is not None:
+                    data["vrf"] = vrf_id
+                creates.append((position, index_key, data))
+                continue
+
+            changes = self._ip_changes(existing_ip, item)
+            if changes:
+                updates.append((position, existing_ip, dict(changes, id=existing_ip["id"])))
+            else:
+                objects[position] = existing_ip
+                self.seen_ids["ip_addresses"].add(existing_ip["id"])
+                unchanged += 1
+
+        created = await self.bulk_create("ip_addresses", [data for _, _, data in creates])
+        for (position, index_key, _), new_ip in zip(creates, created):
+            self._ip_index[index_key] = new_ip
+            objects[position] = new_ip
+            self.seen_ids["ip_addresses"].add(new_ip["id"])
+
+        updated = await self.bulk_update("ip_addresses", [patch for _, _, patch in updates])
+        for (position, existing_ip, _), result in zip(updates, updated):
+            existing_ip.update(result)
+            objects[position] = existing_ip
+            self.seen_ids["ip_addresses"].add(existing_ip["id"])
+
+        return {"created": len(created), "updated": len(updated), "unchanged": unchanged, "objects": objects}
+
+    async def bulk_create(self, kind, payloads):
+        """Create objects with bulk POST requests.
+
+        Args:
+            kind (str): Object kind, e.g. "ip_addresses"
+            payloads (list): Object dictionaries to create
+
+        Returns:
+            list: The created objects, in payload order
+        """
+        chunks = [payloads[start:start + BULK_CHUNK_SIZE] for start in range(0, len(payloads), BULK_CHUNK_SIZE)]
+        results = await asyncio.gather(*[
+            self.request("POST", f"{ENDPOINTS[kind]}/", json=chunk) for chunk in chunks
+        ])
+        return [obj for chunk in results for obj in chunk]
+
+    async def bulk_update(self, kind, updates):
+        """Patch objects with bulk PATCH requests.
+
+        Args:
+            kind (str): Object kind, e.g. "ip_addresses"
+            updates (list): Dictionaries each containing an "id" and the fields to change
+
+        Returns:
+            list: The updated objects, in update order
+        """
+        chunks = [updates[start:start + BULK_CHUNK_SIZE] for start in range(0, len(updates), BULK_CHUNK_SIZE)]
+        results = await asyncio.gather(*[
+            self.request("PATCH", f"{ENDPOINTS[kind]}/", json=chunk) for chunk in chunks
+        ])
+        return [obj for chunk in results for obj in chunk]
+
+    async def bulk_delete(self, kind, object_ids):
+        """Delete objects with bulk DELETE requests.
+
+        Args:
+            kind (str): Object kind, e.g. "ip_addresses"
+            object_ids (list): IDs of the objects to delete
+
+        Returns:
+            int: Number of objects deleted
+        """
+        object_ids = list(object_ids)
+        await asyncio.gather(*[
+            self.request("DELETE", f"{ENDPOINTS[kind]}/",
+                         json=[{"id": object_id} for object_id in object_ids[start:start + BULK_CHUNK_SIZE]])
+            for start in range(0, len(object_ids), BULK_CHUNK_SIZE)
+        ])
+        return len(object_ids)
@@ -0,0 +1,299 @@
+"""
+HTTP Cassette Module
+
+Records the Meraki and NetBox HTTP traffic of a sync run into a cassette
+file and serves it back later, so a run can be repeated offline against
+the exact responses (and response times) of a real one.
+
+Cassettes sit at the transport level: a requests session for the Meraki
+SDK, pynetbox and NetBoxClient, and a wrapper around the aiohttp session of
+AsyncNetBoxClient. Request headers are never stored, response headers are
+reduced to the few the clients read, and secrets in response bodies are
+redacted. Cassettes are gzip-compressed JSON.
+
+Replayed requests are matched by method, path, query and body. Requests
+that differ between runs only in their query, e.g. change log reads from a
+timestamp, fall back to matching by method and path. Responses to a
+repeated request are served in recorded order, the last one repeating.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_VERSION = 1
+
+# Response headers the clients read; all others are dropped
+KEPT_HEADERS = ("Content-Type", "Location", "Link", "Retry-After", "API-Version")
+
+# Keys whose values are replaced in recorded response bodies
+SECRET_KEYS = {"apikey", "api_key", "key", "passphrase", "password", "presharedkey", "psk", "secret",
+               "sharedsecret", "token"}
+
+REDACTED = "REDACTED"
+
+
+class CassetteMissError(Exception):
+    """Raised in replay when a request was never recorded."""
+
+
+def _redact(value):
+    """Replace the values of secret keys in a decoded JSON body."""
+    if isinstance(value, dict):
+        return {key: REDACTED if key.lower() in SECRET_KEYS and value[key] else _redact(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+
+def _sanitize_body(text):
+    """Redact secrets in a response body, leaving bodies that aren't JSON as they are."""
+    try:
+        decoded = json.loads(text)
+    except ValueError:
+        return text
+    return json.dumps(_redact(decoded), separators=(",", ":"))
+
+
+def request_keys(method, url, params=None, body=None):
+    """Build the exact and the loose replay keys of a request.
+
+    Args:
+        method (str): HTTP method
+        url (str): Request URL; the host is ignored, so a cassette replays against any base URL
+        params (dict, optional): Query parameters in addition to those in the URL
+        body (optional): JSON body
+
+    Returns:
+        tuple: (exact key, key of method and path only)
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    query.extend((str(key), str(value)) for key, value in (params or {}).items() if value is not None)
+    loose = f"{method.upper()} {parts.path}"
+    exact = f"{loose}?{urlencode(sorted(query))}"
+    if body is not None:
+        exact += " " + hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return exact, loose
+
+
+class Cassette:
+    """A recording of HTTP interactions, in record or replay mode."""
+
+    def __init__(self, path, mode, latency_scale=1.0):
+        """Initialize the cassette.
+
+        Args:
+            path (str): Path of the cassette file
+            mode (str): "record" to record a run, "replay" to serve a recorded one
+            latency_scale (float): Factor applied to recorded response times in replay (0: no delays)
+
+        Raises:
+            ValueError: If the mode is unknown or a cassette to replay is of another version.
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.interactions = []
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._exact = {}
+        self._loose = {}
+        self._served = set()
+        if mode == "replay":
+            with gzip.open(path, "rt") as cassette_file:
+                data = json.load(cassette_file)
+            if data.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version: {data.get('version')}")
+            self.interactions = data["interactions"]
+            for interaction in self.interactions:
+                self._exact.setdefault(interaction["key"], deque()).append(interaction)
+                self._loose.setdefault(interaction["loose"], deque()).append(interaction)
+
+    @property
+    def recording(self):
+        """Whether the cassette records, rather than replays."""
+        return self.mode == "record"
+
+    def record(self, method, url, params, body, status, headers, text, elapsed):
+        """Add an interaction to the recording.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            params (dict): Query parameters
+            body (optional): JSON request body
+            status (int): Response status
+            headers (Mapping): Response headers
+            text (str): Response body
+            elapsed (float): Seconds the response took
+        """
+        key, loose = request_keys(method, url, params, body)
+        interaction = {
+            "key": key,
+            "loose": loose,
+            "status": status,
+            "headers": {name: headers[name] for name in KEPT_HEADERS if name in headers},
+            "body": _sanitize_body(text),
+            "elapsed": round(elapsed, 4),
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def lookup(self, method, url, params=None, body=None):
+        """Find the recorded response of a request.
+
+        Returns:
+            dict: The interaction, with "status", "headers", "body" and "elapsed"
+
+        Raises:
+            CassetteMissError: If no request like it was recorded.
+        """
+        key, loose = request_keys(method, url, params, body)
+        with self._lock:
+            queue = self._exact.get(key)
+            if not queue:
+                queue = self._loose.get(loose)
+                # Prefer responses not served to an exact match already
+                while queue and len(queue) > 1 and id(queue[0]) in self._served:
+                    queue.popleft()
+            if not queue:
+                self.misses += 1
+                raise CassetteMissError(f"{method} {url} is not in cassette {self.path}")
+            # Serve in recorded order; the last response answers every repeat
+            interaction = queue.popleft() if len(queue) > 1 else queue[0]
+            self._served.add(id(interaction))
+            return interaction
+
+    def delay(self, interaction):
+        """Seconds to wait before serving a recorded response."""
+        return interaction["elapsed"] * self.latency_scale
+
+    def save(self):
+        """Write the recording to the cassette file atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt") as cassette_file:
+            json.dump({"version": CASSETTE_VERSION, "recorded_at": time.time(),
+                       "interactions": self.interactions}, cassette_file, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def requests_session(self):
+        """Create a requests session that records to or replays from this cassette."""
+        return CassetteSession(self)
+
+    def wrap_aiohttp(self, session):
+        """Wrap an aiohttp session so its requests record to or replay from this cassette."""
+        return AsyncCassetteSession(self, session)
+
+
+class CassetteSession(requests.Session):
+    """requests session for the Meraki SDK and pynetbox, backed by a cassette."""
+
+    def __init__(self, cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def request(self, method, url, params=None, json=None, **kwargs):
+        if self.cassette.recording:
+            start = time.perf_counter()
+            response = super().request(method, url, params=params, json=json, **kwargs)
+            self.cassette.record(method, url, params, json, response.status_code, response.headers,
+                                 response.text, time.perf_counter() - start)
+            return response
+
+        interaction = self.cassette.lookup(method, url, params, json)
+        delay = self.cassette.delay(interaction)
+        if delay:
+            time.sleep(delay)
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.reason = "Replayed"
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        response._content = interaction["body"].encode()
+        response.encoding = "utf-8"
+        response.url = url
+        response.elapsed = timedelta(seconds=interaction["elapsed"])
+        response.request = requests.Request(method, url, params=params, json=json).prepare()
+        return response
+
+
+class CassetteResponse:
+    """The parts of an aiohttp response AsyncNetBoxClient reads, from a recorded interaction."""
+
+    def __init__(self, interaction):
+        self.status = interaction["status"]
+        self.headers = CaseInsensitiveDict(interaction["headers"])
+        self._body = interaction["body"]
+
+    async def text(self):
+        return self._body
+
+    async def json(self, content_type=None):
+        return json.loads(self._body) if self._body else None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class AsyncCassetteSession:
+    """aiohttp session wrapper for AsyncNetBoxClient, backed by a cassette."""
+
+    def __init__(self, cassette, session):
+        self.cassette = cassette
+        self.session = session
+
+    def request(self, method, url, params=None, json=None):
+        return _AsyncRequest(self, method, url, params, json)
+
+    async def close(self):
+        await self.session.close()
+
+
+class _AsyncRequest:
+    """Async context manager of one request through an AsyncCassetteSession."""
+
+    def __init__(self, owner, method, url, params, body):
+        self.owner = owner
+        self.method = method
+        self.url = url
+        self.params = params
+        self.body = body
+
+    async def __aenter__(self):
+        cassette = self.owner.cassette
+        if cassette.recording:
+            start = time.perf_counter()
+            async with self.owner.session.request(self.method, self.url, params=self.params,
+                                                  json=self.body) as response:
+                text = await response.text()
+            elapsed = time.perf_counter() - start
+            cassette.record(self.method, self.url, self.params, self.body, response.status, response.headers,
+                            text, elapsed)
+            # Served from the recording, which holds the whole body
+            return CassetteResponse({"status": response.status, "headers": dict(response.headers), "body": text})
+
+        interaction = cassette.lookup(self.method, self.url, self.params, self.body)
+        delay = cassette.delay(interaction)
+        if delay:
+            await asyncio.sleep(delay)
+        return CassetteResponse(interaction)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
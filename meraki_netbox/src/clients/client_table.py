@@ -0,0 +1,139 @@
+"""
+Columnar storage for Meraki network clients.
+
+The Meraki clients endpoint returns a large dictionary per client, but the
+sync only reads the IP address, MAC address and description. ClientTable
+projects each client into array-backed columns as soon as it is fetched:
+IPv4 addresses and MAC addresses are stored as integers, descriptions are
+interned, and each row remembers which network it came from so a whole
+organization can be held and matched against subnets in one table.
+"""
+
+import ipaddress
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+def mac_to_int(mac: str) -> int:
+    """Convert a MAC address string such as "aa:bb:cc:dd:ee:ff" to an integer."""
+    return int(mac.replace(':', '').replace('-', '').replace('.', ''), 16)
+
+
+def int_to_mac(value: int) -> str:
+    """Convert an integer back to a colon separated lowercase MAC address."""
+    digits = f"{value:012x}"
+    return ':'.join(digits[i:i + 2] for i in range(0, 12, 2))
+
+
+def int_to_ip(value: int) -> str:
+    """Convert an integer back to a dotted-quad IPv4 address."""
+    return str(ipaddress.IPv4Address(value))
+
+
+class ClientTable:
+    """Compact, column-oriented list of Meraki clients."""
+
+    __slots__ = ('ips', 'macs', 'descriptions', 'network_codes', 'network_ids', '_network_index')
+
+    def __init__(self):
+        """Initialize an empty table."""
+        # IPv4 addresses as unsigned 32-bit integers
+        self.ips = array('I')
+
+        # MAC addresses as unsigned 64-bit integers
+        self.macs = array('Q')
+
+        # Interned client descriptions (None when Meraki has no description)
+        self.descriptions = []
+
+        # Index into network_ids for every row
+        self.network_codes = array('I')
+
+        # Distinct Meraki network IDs, in the order they were first added
+        self.network_ids = []
+        self._network_index = {}
+
+    def __len__(self):
+        return len(self.ips)
+
+    def _network_code(self, network_id: str) -> int:
+        """Get the integer code of a network, assigning one if needed."""
+        code = self._network_index.get(network_id)
+        if code is None:
+            code = len(self.network_ids)
+            self.network_ids.append(network_id)
+            self._network_index[network_id] = code
+        return code
+
+    def append(self, network_id: str, ip: str, mac: str, description: Optional[str] = None) -> bool:
+        """Add a single client row.
+
+        Args:
+            network_id (str): Meraki network ID the client belongs to
+            ip (str): The client's IPv4 address
+            mac (str): The client's MAC address
+            description (str, optional): The client's description
+
+        Returns:
+            bool: True if the row was added, False if the IP or MAC is missing or invalid
+        """
+        if not ip or not mac:
+            return False
+        try:
+            ip_int = int(ipaddress.IPv4Address(ip))
+            mac_int = mac_to_int(mac)
+        except ValueError:
+            return False
+
+        self.ips.append(ip_int)
+        self.macs.append(mac_int)
+        self.descriptions.append(sys.intern(description) if isinstance(description, str) else description)
+        self.network_codes.append(self._network_code(network_id))
+        return True
+
+    def extend(self, network_id: str, clients: Iterable[Dict], limit: Optional[int] = None) -> int:
+        """Project Meraki client dictionaries into the table.
+
+        Args:
+            network_id (str): Meraki network ID the clients belong to
+            clients (iterable): Client dictionaries from the Meraki API
+            limit (int, optional): Maximum number of rows to add
+
+        Returns:
+            int: Number of rows added
+        """
+        added = 0
+        for client in clients:
+            if limit is not None and added >= limit:
+                break
+            if self.append(network_id, client.get('ip'), client.get('mac'),
+                           client.get('description', 'Unknown Device')):
+                added += 1
+        return added
+
+    def network_id(self, row: int) -> str:
+        """Get the Meraki network ID of a row."""
+        return self.network_ids[self.network_codes[row]]
+
+    def row(self, row: int) -> Tuple[str, str, str, Optional[str]]:
+        """Get a row as (network ID, IP address, MAC address, description)."""
+        return (
+            self.network_id(row),
+            int_to_ip(self.ips[row]),
+            int_to_mac(self.macs[row]),
+            self.descriptions[row],
+        )
+
+    def __iter__(self) -> Iterator[Tuple[str, str, str, Optional[str]]]:
+        for row in range(len(self)):
+            yield self.row(row)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the table, excluding shared interned strings."""
+        return (
+            self.ips.itemsize * len(self.ips)
+            + self.macs.itemsize * len(self.macs)
+            + self.network_codes.itemsize * len(self.network_codes)
+            + sys.getsizeof(self.descriptions)
+        )
@@ -0,0 +1,183 @@
+"""
+API Key Pool Module
+
+Spreads Meraki API calls over several API keys. Meraki rate limits each
+organization and each API key separately, so with one key every concurrent
+organization sync queues behind that key's budget; with a pool, each
+organization sticks to one key (its affinity) and new affinities go to the
+least loaded key that can access the organization.
+
+The pool tracks each key's health: a key rejected as unauthorized (401) is
+benched for a cooldown, a key forbidden (403) from an organization is no
+longer used for it, and a key drawing many 429 responses counts as loaded,
+so organizations move off it while others have spare budget.
+"""
+
+import threading
+import time
+from collections import deque
+
+# Seconds a key rejected as unauthorized is left out of the pool
+AUTH_FAILURE_COOLDOWN = 600
+
+# Seconds 429 responses count toward a key's load
+RATE_LIMIT_WINDOW = 60
+
+# Load one 429 response within the window adds, in calls in flight
+RATE_LIMIT_PENALTY = 2
+
+# Extra load an organization's key may carry before the organization moves to a less loaded key
+AFFINITY_SLACK = 2
+
+
+def mask_key(key):
+    """Shorten an API key to a label that is safe to print."""
+    return f"...{key[-4:]}"
+
+
+class ApiKeyPool:
+    """Hands out API keys per organization, by affinity and load, and tracks their health."""
+
+    def __init__(self, keys, cooldown=AUTH_FAILURE_COOLDOWN, window=RATE_LIMIT_WINDOW):
+        """Initialize the pool.
+
+        Args:
+            keys (list): API keys, in order of preference
+            cooldown (float): Seconds a key rejected as unauthorized is left out
+            window (float): Seconds 429 responses count toward a key's load
+
+        Raises:
+            ValueError: If no keys are given.
+        """
+        if not keys:
+            raise ValueError("An API key pool needs at least one key")
+        self.keys = list(keys)
+        self.cooldown = cooldown
+        self.window = window
+        self._lock = threading.Lock()
+        self._in_flight = {key: 0 for key in self.keys}
+        self._calls = {key: 0 for key in self.keys}
+        self._rate_limits = {key: deque() for key in self.keys}
+        self._rate_limited = {key: 0 for key in self.keys}
+        self._auth_failures = {key: 0 for key in self.keys}
+        self._benched_until = {key: 0.0 for key in self.keys}
+        # Keys known to access each organization, and the key each organization sticks to
+        self._access = {}
+        self._affinity = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def grant(self, key, org_ids):
+        """Record that a key can access organizations, e.g. as listed by getOrganizations."""
+        with self._lock:
+            for org_id in org_ids:
+                self._access.setdefault(org_id, set()).add(key)
+
+    def _load(self, key, now):
+        rate_limits = self._rate_limits[key]
+        while rate_limits and rate_limits[0] < now - self.window:
+            rate_limits.popleft()
+        return self._in_flight[key] + RATE_LIMIT_PENALTY * len(rate_limits)
+
+    def _rank(self, key, now):
+        assigned = sum(1 for owner in self._affinity.values() if owner == key)
+        return self._load(key, now), assigned, self._calls[key]
+
+    def acquire(self, org_id=None, exclude=()):
+        """Pick the key for a call and count it as in flight until release.
+
+        Args:
+            org_id (str, optional): Organization the call is for; None for calls outside one
+            exclude (iterable): Keys not to use, e.g. ones that already failed the call
+
+        Returns:
+            str: The API key
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [key for key in self.keys if key not in exclude]
+            known = self._access.get(org_id)
+            if known:
+                candidates = [key for key in candidates if key in known] or candidates
+            healthy = [key for key in candidates if self._benched_until[key] <= now]
+            if healthy:
+                candidates = healthy
+            elif candidates:
+                # Every key is benched: try the one whose cooldown ends first
+                candidates = [min(candidates, key=lambda key: self._benched_until[key])]
+            else:
+                candidates = list(self.keys)
+
+            best = min(candidates, key=lambda key: self._rank(key, now))
+            key = best
+            if org_id is not None:
+                current = self._affinity.get(org_id)
+                if current in candidates and self._load(current, now) <= self._load(best, now) + AFFINITY_SLACK:
+                    key = current
+                else:
+                    self._affinity[org_id] = best
+            self._in_flight[key] += 1
+            self._calls[key] += 1
+            return key
+
+    def use(self, key):
+        """Count a call made with a given key as in flight until release.
+
+        Returns:
+            str: The key
+        """
+        with self._lock:
+            self._in_flight[key] += 1
+            self._calls[key] += 1
+            return key
+
+    def release(self, key):
+        """Mark a call made with a key as finished."""
+        with self._lock:
+            self._in_flight[key] -= 1
+
+    def record_rate_limit(self, key, now=None):
+        """Count a 429 response to a call made with a key."""
+        with self._lock:
+            self._rate_limits[key].append(time.monotonic() if now is None else now)
+            self._rate_limited[key] += 1
+
+    def record_auth_failure(self, key, org_id=None, status=401, now=None):
+        """Stop using a key that was refused.
+
+        Args:
+            key (str): The refused key
+            org_id (str, optional): Organization the call was for
+            status (int): 401 benches the key for the cooldown; 403 only drops it for org_id
+            now (float, optional): Current time.monotonic(), mainly for testing
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._auth_failures[key] += 1
+            if status == 403 and org_id is not None:
+                self._access.setdefault(org_id, set(self.keys)).discard(key)
+            else:
+                self._benched_until[key] = now + self.cooldown
+            if self._affinity.get(org_id) == key:
+                del self._affinity[org_id]
+
+    def stats(self):
+        """Summarize each key's use and health, with the keys masked.
+
+        Returns:
+            list: Per key a dict with "key", "calls", "in_flight", "rate_limited" (429 responses),
+                "rate_limits_per_call", "auth_failures", "organizations" and "healthy"
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                "key": mask_key(key),
+                "calls": self._calls[key],
+                "in_flight": self._in_flight[key],
+                "rate_limited": self._rate_limited[key],
+                "rate_limits_per_call": self._rate_limited[key] / self._calls[key] if self._calls[key] else 0.0,
+                "auth_failures": self._auth_failures[key],
+                "organizations": sum(1 for owner in self._affinity.values() if owner == key),
+                "healthy": self._benched_until[key] <= now,
+            } for key in self.keys]
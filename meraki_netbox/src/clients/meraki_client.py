@@ -1,33 +1,253 @@
+import hashlib
 import os
-import meraki
+import threading
+
+from .client_table import ClientTable
+from .key_pool import ApiKeyPool, mask_key
+
+# Meraki SDK settings that can be tuned per client, with the environment variable
+# each one is read from and the type its value is parsed as
+SDK_SETTINGS = {
+    "output_log": ("MERAKI_OUTPUT_LOG", bool),
+    "print_console": ("MERAKI_PRINT_CONSOLE", bool),
+    "suppress_logging": ("MERAKI_SUPPRESS_LOGGING", bool),
+    "maximum_retries": ("MERAKI_MAXIMUM_RETRIES", int),
+    "wait_on_rate_limit": ("MERAKI_WAIT_ON_RATE_LIMIT", bool),
+    "single_request_timeout": ("MERAKI_SINGLE_REQUEST_TIMEOUT", int),
+    "base_url": ("MERAKI_BASE_URL", str),
+}
+
+# Named groups of SDK settings. "default" keeps the SDK's own defaults; "tuned" drops
+# the per-run log file and console output and fails faster, which suits concurrent use.
+SDK_PROFILES = {
+    "default": {},
+    "tuned": {
+        "output_log": False,
+        "print_console": False,
+        "suppress_logging": True,
+        "maximum_retries": 3,
+        "wait_on_rate_limit": True,
+        "single_request_timeout": 30,
+    },
+}
+
+
+def _parse_setting(value, value_type):
+    """Parse an environment variable value into a setting of the given type."""
+    if value_type is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return value_type(value)
+
 
 class MerakiClient:
     """Client for interacting with Meraki API."""
 
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, profile=None, session=None, output_log=None, print_console=None,
+                 suppress_logging=None, maximum_retries=None, wait_on_rate_limit=None,
+                 single_request_timeout=None, base_url=None, cache=None, api_keys=None):
         """Initialize the Meraki client.
 
+        SDK settings are resolved in order of precedence: explicit arguments, then
+        MERAKI_* environment variables, then the selected profile, then the SDK defaults.
+
         Args:
             api_key (str): Meraki API key
+            profile (str, optional): Name of an SDK_PROFILES entry (default: MERAKI_SDK_PROFILE or "default")
+            session (optional): HTTP session the SDK should send requests through; with several
+                API keys, a callable creating one session per key
+            output_log (bool, optional): Write a log file per run
+            print_console (bool, optional): Echo SDK log lines to the console
+            suppress_logging (bool, optional): Disable SDK logging entirely
+            maximum_retries (int, optional): Retries for failed and rate-limited requests
+            wait_on_rate_limit (bool, optional): Sleep and retry when rate limited
+            single_request_timeout (int, optional): Timeout in seconds for each request
+            base_url (str, optional): Dashboard API base URL
+            cache (InventoryCache, optional): Disk cache for organizations, networks and VLANs
+            api_keys (list, optional): More API keys to spread calls over (default: the
+                comma-separated MERAKI_API_KEYS environment variable)
 
         Raises:
-            ValueError: If the API key is not provided and not in environment variables.
+            ValueError: If the API key is not provided and not in environment variables,
+                or the profile is unknown.
         """
         # Try to get API key from parameters or environment variables
         self.api_key = api_key or os.getenv("MERAKI_API_KEY")
-        if not self.api_key:
+        if api_keys is None:
+            api_keys = [key.strip() for key in os.getenv("MERAKI_API_KEYS", "").split(",")]
+        self.api_keys = list(dict.fromkeys(key for key in [self.api_key, *api_keys] if key))
+        if not self.api_keys:
             raise ValueError("Meraki API key not provided")
+        self.api_key = self.api_keys[0]
+
+        # With several keys, each organization's calls go to one key and the pool
+        # balances organizations over the keys
+        self.key_pool = ApiKeyPool(self.api_keys) if len(self.api_keys) > 1 else None
+        if self.key_pool is not None and session is not None and not callable(session):
+            raise ValueError("With several API keys, session must create one session per key")
+
+        profile = profile or os.getenv("MERAKI_SDK_PROFILE", "default")
+        if profile not in SDK_PROFILES:
+            raise ValueError(f"Unknown Meraki SDK profile: {profile}")
+        self.profile = profile
+
+        explicit = {
+            "output_log": output_log,
+            "print_console": print_console,
+            "suppress_logging": suppress_logging,
+            "maximum_retries": maximum_retries,
+            "wait_on_rate_limit": wait_on_rate_limit,
+            "single_request_timeout": single_request_timeout,
+            "base_url": base_url,
+        }
+        self.sdk_settings = dict(SDK_PROFILES[profile])
+        for name, (env_var, value_type) in SDK_SETTINGS.items():
+            if explicit[name] is not None:
+                self.sdk_settings[name] = explicit[name]
+            elif os.getenv(env_var):
+                self.sdk_settings[name] = _parse_setting(os.getenv(env_var), value_type)
+
+        self.session = session
+        self.cache = cache
+
+        # The Meraki SDK is imported and the dashboard built on first use
+        self._dashboard = None
+        # Dashboards of the pool's keys, and the organization each known network belongs to
+        self._key_dashboards = {}
+        self._key_dashboards_lock = threading.Lock()
+        self._network_orgs = {}
+
+    def _build_dashboard(self, api_key):
+        """Create a Meraki Dashboard API for one API key."""
+        import meraki
+
+        settings = dict(self.sdk_settings)
+        if settings.get("output_log", True):
+            # Create logs directory if it doesn't exist
+            logs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "logs")
+            os.makedirs(logs_dir, exist_ok=True)
+            settings["log_path"] = logs_dir
+
+        # Initialize the Meraki Dashboard API
+        dashboard = meraki.DashboardAPI(api_key=api_key, **settings)
+
+        if self.session is not None:
+            self._install_session(dashboard, self.session() if callable(self.session) else self.session)
+        return dashboard
+
+    @property
+    def dashboard(self):
+        """The Meraki Dashboard API of the first API key, created the first time it is needed."""
+        if self._dashboard is None:
+            self._dashboard = self._build_dashboard(self.api_key)
+        return self._dashboard
+
+    @dashboard.setter
+    def dashboard(self, dashboard):
+        self._dashboard = dashboard
+
+    @staticmethod
+    def _install_session(dashboard, session):
+        """Route the SDK's requests through a caller-supplied HTTP session.
+
+        The SDK has no public hook for this, so the session replaces the one the SDK
+        created: a requests.Session for meraki 1.x/2.x, an httpx.Client for later
+        releases. Authentication headers are copied over so the session works as-is.
+
+        Raises:
+            ValueError: If the installed SDK keeps its session somewhere unexpected.
+        """
+        rest_session = dashboard._session
+        for attribute in ("_req_session", "_client"):
+            current = getattr(rest_session, attribute, None)
+            if current is not None:
+                session.headers.update(current.headers)
+                setattr(rest_session, attribute, session)
+                return
+        raise ValueError("This version of the Meraki SDK does not support a custom session")
+
+    def _dashboard_for(self, api_key):
+        """The Dashboard API of a pool key, with its 429 responses counted toward the key's load."""
+        with self._key_dashboards_lock:
+            if api_key in self._key_dashboards:
+                return self._key_dashboards[api_key]
+            dashboard = self.dashboard if api_key == self.api_key else self._build_dashboard(api_key)
+            self._key_dashboards[api_key] = dashboard
+
+        # The SDK retries rate-limited requests itself, so 429s are only seen on its HTTP session
+        http_session = getattr(getattr(dashboard, "_session", None), "_req_session", None)
+        hooks = getattr(http_session, "hooks", None)
+        if isinstance(hooks, dict):
+            def count_rate_limits(response, *args, **kwargs):
+                if response.status_code == 429:
+                    self.key_pool.record_rate_limit(api_key)
 
-        # Create logs directory if it doesn't exist
-        logs_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "logs")
-        os.makedirs(logs_dir, exist_ok=True)
+            hooks.setdefault("response", []).append(count_rate_limits)
+        return dashboard
 
-        # Initialize the Meraki Dashboard API with custom log path
-        self.dashboard = meraki.DashboardAPI(api_key=self.api_key, log_path=logs_dir)
+    def _call(self, org_id, call, api_key=None):
+        """Make an SDK call with the right API key.
+
+        With one key the call simply uses the dashboard. With a pool it uses the key the
+        organization sticks to (or api_key, if given); a key refused with 401 or 403 is
+        reported to the pool and the call is retried with another key.
+
+        Args:
+            org_id (str): Organization the call is for, or None if it isn't known
+            call (callable): Function making the call with a Dashboard API
+            api_key (str, optional): Key the call must be made with
+
+        Returns:
+            The call's result
+        """
+        if self.key_pool is None:
+            return call(self.dashboard)
+
+        refused = set()
+        while True:
+            key = self.key_pool.use(api_key) if api_key else self.key_pool.acquire(org_id, exclude=refused)
+            try:
+                return call(self._dashboard_for(key))
+            except Exception as e:
+                # meraki.APIError carries the HTTP status of the failed request
+                status = getattr(e, "status", None)
+                if status not in (401, 403):
+                    raise
+                self.key_pool.record_auth_failure(key, org_id, status)
+                refused.add(key)
+                if api_key is not None or len(refused) >= len(self.key_pool):
+                    raise
+            finally:
+                self.key_pool.release(key)
+
+    def _cached(self, kind, key, fetch, on_change=None):
+        """Serve a call from the inventory cache when one is configured."""
+        if self.cache is None:
+            return fetch()
+        return self.cache.get_or_fetch(kind, key, fetch, on_change)
 
     def get_organizations(self):
-        """Get all organizations the API key has access to."""
-        return self.dashboard.organizations.getOrganizations()
+        """Get all organizations the API keys have access to."""
+        if self.key_pool is None:
+            # Different API keys see different organizations, so the key is part of the cache key
+            key = hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()[:16]
+            return self._cached("organizations", key, self.dashboard.organizations.getOrganizations)
+
+        organizations = {}
+        for api_key in self.api_keys:
+            cache_key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+            try:
+                key_orgs = self._cached("organizations", cache_key, lambda: self._call(
+                    None, lambda dashboard: dashboard.organizations.getOrganizations(), api_key=api_key))
+            except Exception as e:
+                if getattr(e, "status", None) not in (401, 403):
+                    raise
+                print(f"Warning: Meraki API key {mask_key(api_key)} was refused ({e.status})")
+                continue
+            # Which keys see an organization decides which keys its calls may use
+            self.key_pool.grant(api_key, [org["id"] for org in key_orgs])
+            for org in key_orgs:
+                organizations.setdefault(org["id"], org)
+        return list(organizations.values())
 
     def get_networks(self, organization_id):
         """Get all networks for a specific organization.
@@ -38,7 +258,28 @@ class MerakiClient:
         Returns:
             list: List of network dictionaries
         """
-        return self.dashboard.organizations.getOrganizationNetworks(organization_id)
+        networks = self._cached(
+            "networks", organization_id,
+            lambda: self._call(organization_id,
+                               lambda dashboard: dashboard.organizations.getOrganizationNetworks(organization_id))
+        )
+        for network in networks:
+            self._network_orgs[network["id"]] = organization_id
+        return networks
+
+    def get_configuration_changes(self, organization_id, t0):
+        """Get an organization's configuration change log from a point in time on.
+
+        Args:
+            organization_id (str): The Meraki organization ID
+            t0 (str): ISO 8601 time of the oldest change to return, at most 365 days ago
+
+        Returns:
+            list: Change dictionaries with "ts", "networkId", "page", "label" and the old and new values
+        """
+        return self._call(organization_id, lambda dashboard: (
+            dashboard.organizations.getOrganizationConfigurationChanges(organization_id, t0=t0, total_pages="all")
+        ))
 
     def get_vlans(self, network_id):
         """Get all VLANs for a specific network.
@@ -49,7 +290,14 @@ class MerakiClient:
         Returns:
             list: List of VLAN dictionaries
         """
-        return self.dashboard.appliance.getNetworkApplianceVlans(network_id)
+        # The VLAN list carries each VLAN's fixed IP assignments, so cached VLAN details
+        # are only read again once the list changes
+        return self._cached(
+            "vlans", network_id,
+            lambda: self._call(self._network_orgs.get(network_id),
+                               lambda dashboard: dashboard.appliance.getNetworkApplianceVlans(network_id)),
+            on_change=lambda: self.cache.invalidate("vlan_details", prefix=f"{network_id}/")
+        )
 
     def get_network_clients(self, network_id):
         """Get all clients (devices with IP addresses) for a specific network.
@@ -60,7 +308,27 @@ class MerakiClient:
         Returns:
             list: List of client dictionaries with IP addresses
         """
-        return self.dashboard.networks.getNetworkClients(network_id)
+        return self._call(self._network_orgs.get(network_id),
+                          lambda dashboard: dashboard.networks.getNetworkClients(network_id))
+
+    def get_network_client_table(self, network_id, table=None, limit=None):
+        """Get the clients of a network projected into a compact ClientTable.
+
+        Only the IP address, MAC address and description of each client are kept;
+        the full client dictionaries are dropped as soon as they are projected.
+
+        Args:
+            network_id (str): The Meraki network ID
+            table (ClientTable, optional): Existing table to append to, e.g. for a whole organization
+            limit (int, optional): Maximum number of clients to keep for this network
+
+        Returns:
+            ClientTable: The table the clients were added to
+        """
+        if table is None:
+            table = ClientTable()
+        table.extend(network_id, self.get_network_clients(network_id), limit=limit)
+        return table
 
     def get_vlan_details(self, network_id, vlan_id):
         """Get detailed information about a specific VLAN, including DHCP reservations.
@@ -72,7 +340,11 @@ class MerakiClient:
         Returns:
             dict: VLAN details including fixedIpAssignments (DHCP reservations)
         """
-        return self.dashboard.appliance.getNetworkApplianceVlan(network_id, vlan_id)
+        return self._cached(
+            "vlan_details", f"{network_id}/{vlan_id}",
+            lambda: self._call(self._network_orgs.get(network_id),
+                               lambda dashboard: dashboard.appliance.getNetworkApplianceVlan(network_id, vlan_id))
+        )
 
     def get_dhcp_reservations(self, network_id, vlan_id):
         """Get DHCP reservations (fixed IP assignments) for a specific VLAN.
@@ -1,15 +1,55 @@
+import ipaddress
 import os
-import pynetbox
+from concurrent.futures import ThreadPoolExecutor
+
+# Slug of the tag applied to every prefix and IP address the sync creates or updates
+DEFAULT_OWNER_TAG = "meraki-sync"
+
+# Number of objects sent in a single bulk PATCH/DELETE request
+BULK_CHUNK_SIZE = 200
+
+# Fields requested when preloading the indexes; everything else is left out of the response
+PREFETCH_FIELDS = {
+    "vlans": ("id", "url", "vid", "name", "description", "group"),
+    "prefixes": ("id", "url", "prefix", "description", "status", "vlan", "vrf", "tags"),
+    "ip_addresses": ("id", "url", "address", "description", "dns_name", "status", "vrf", "tags"),
+}
+
+# Default page size and number of pages fetched in parallel when preloading
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_PREFETCH_WORKERS = 4
+
+
+def prefix_key(prefix):
+    """Normalise a prefix so Meraki and NetBox spellings index the same way."""
+    try:
+        return str(ipaddress.ip_network(str(prefix), strict=False))
+    except ValueError:
+        return str(prefix)
+
+
+def ip_key(ip_address):
+    """Strip the mask from an IP address so lookups ignore prefix length."""
+    return str(ip_address).split("/", 1)[0]
+
 
 class NetBoxClient:
     """Client for interacting with NetBox API."""
 
-    def __init__(self, url=None, token=None):
+    def __init__(self, url=None, token=None, owner_tag=None, vrf_per_network=None, page_size=None,
+                 prefetch_workers=None, session=None):
         """Initialize the NetBox client.
 
         Args:
             url (str): NetBox API URL
             token (str): NetBox API token
+            owner_tag (str, optional): Slug of the tag marking objects owned by the sync
+            vrf_per_network (bool, optional): Place each Meraki network's prefixes and IPs in its own VRF,
+                so subnets reused across networks become separate NetBox objects (default: off,
+                as objects of earlier runs live in the global table; see NETBOX_VRF_PER_NETWORK)
+            page_size (int, optional): Objects per page when preloading indexes
+            prefetch_workers (int, optional): Pages fetched in parallel when preloading indexes
+            session (requests.Session, optional): HTTP session pynetbox should send requests through
 
         Raises:
             ValueError: If URL or token is not provided and not in environment variables.
@@ -24,26 +64,235 @@ class NetBoxClient:
         if not self.token:
             raise ValueError("NetBox token not provided")
 
-        # Initialize the NetBox API client
-        self.api = pynetbox.api(self.url, token=self.token)
+        # pynetbox is imported and the API client built on first use
+        self._api = None
+        self.session = session
+
+        # Paging used when preloading indexes (NetBox caps the page size at MAX_PAGE_SIZE)
+        self.page_size = page_size or int(os.getenv("NETBOX_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+        self.prefetch_workers = prefetch_workers or int(os.getenv("NETBOX_PREFETCH_WORKERS",
+                                                                  DEFAULT_PREFETCH_WORKERS))
+
+        # Tag used to recognise objects the sync owns during reconciliation
+        self.owner_tag = owner_tag or os.getenv("NETBOX_OWNER_TAG", DEFAULT_OWNER_TAG)
+        self._owner_tag_ready = False
+
+        # IDs of owned objects created or updated during this run
+        self.seen_ids = {"prefixes": set(), "ip_addresses": set()}
+
+        # Whether overlapping Meraki subnets are kept apart with one VRF per network
+        if vrf_per_network is None:
+            vrf_per_network = os.getenv("NETBOX_VRF_PER_NETWORK", "false").lower() in ("1", "true", "yes")
+        self.vrf_per_network = vrf_per_network
+
+        # Per-network NetBox scope (VLAN group and VRF), keyed by Meraki network ID
+        self._scopes = {}
+
+        # In-memory indexes keyed by (VLAN group ID, vid) and (VRF ID, prefix).
+        # Each scope is loaded from NetBox once, the first time it is used.
+        self._vlan_index = {}
+        self._prefix_index = {}
+        self._loaded_vlan_groups = set()
+        self._loaded_prefix_vrfs = set()
+
+        # IP addresses keyed by (VRF ID, host address), loaded one (VRF, parent prefix) at a time
+        self._ip_index = {}
+        self._loaded_ip_parents = set()
+
+    @property
+    def api(self):
+        """The pynetbox API client, created the first time it is needed."""
+        if self._api is None:
+            import pynetbox
+
+            self._api = pynetbox.api(self.url, token=self.token)
+            if self.session is not None:
+                self._api.http_session = self.session
+        return self._api
+
+    @api.setter
+    def api(self, api):
+        self._api = api
+
+    def _ensure_owner_tag(self):
+        """Make sure the ownership tag exists in NetBox before it is referenced."""
+        if self._owner_tag_ready:
+            return
+        if self.api.extras.tags.get(slug=self.owner_tag) is None:
+            self.api.extras.tags.create({
+                "name": self.owner_tag,
+                "slug": self.owner_tag,
+                "description": "Managed by the Meraki to NetBox sync",
+            })
+        self._owner_tag_ready = True
+
+    def _owner_tags(self, existing_tags=None):
+        """Build a tag list that includes the ownership tag.
+
+        Args:
+            existing_tags (list, optional): Tags already assigned to the object
+
+        Returns:
+            list: Tag references suitable for a create or update payload
+        """
+        self._ensure_owner_tag()
+        tags = []
+        for tag in existing_tags or []:
+            slug = tag.get("slug") if isinstance(tag, dict) else getattr(tag, "slug", None)
+            if slug == self.owner_tag:
+                return list(existing_tags)
+            tags.append({"slug": slug} if slug else tag)
+        tags.append({"slug": self.owner_tag})
+        return tags
+
+    def _mark_seen(self, kind, obj):
+        """Remember that an owned object is still part of the desired state."""
+        object_id = getattr(obj, "id", None)
+        if object_id is not None:
+            self.seen_ids[kind].add(object_id)
+
+    def get_network_scope(self, network_id, network_name):
+        """Get the NetBox VLAN group and VRF that hold a Meraki network's objects.
+
+        The VLAN group is created on first use so VLAN IDs reused across Meraki
+        networks no longer collide. When vrf_per_network is turned on, the network
+        also gets its own VRF, so a subnet reused by several networks maps to a separate
+        NetBox prefix (and separate IP addresses) per network.
+
+        Args:
+            network_id (str): Meraki network ID
+            network_name (str): Meraki network name
+
+        Returns:
+            dict: {"vlan_group": VLAN group record, "vrf": VRF record or None}
+        """
+        if network_id in self._scopes:
+            return self._scopes[network_id]
+
+        slug = f"meraki-{network_id}".lower()
+        vlan_group = self.api.ipam.vlan_groups.get(slug=slug)
+        if vlan_group is None:
+            vlan_group = self.api.ipam.vlan_groups.create({
+                "name": f"Meraki {network_name} ({network_id})"[:100],
+                "slug": slug,
+                "description": f"VLANs of Meraki network {network_name}",
+            })
+
+        vrf = None
+        if self.vrf_per_network:
+            vrf = self.api.ipam.vrfs.get(name=slug)
+            if vrf is None:
+                vrf = self.api.ipam.vrfs.create({
+                    "name": slug,
+                    "description": f"Meraki network {network_name}",
+                })
+
+        self._scopes[network_id] = {"vlan_group": vlan_group, "vrf": vrf}
+        return self._scopes[network_id]
+
+    def _get_page(self, url, params):
+        """Fetch one page of a list endpoint as raw JSON."""
+        auth_scheme = "Bearer" if self.token.startswith("nbt_") else "Token"
+        response = self.api.http_session.get(
+            url,
+            params=params,
+            headers={"Authorization": f"{auth_scheme} {self.token}", "Accept": "application/json"}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _fetch_all(self, kind, **filters):
+        """Fetch every object of a kind matching the filters, with only the fields the sync reads.
 
-    def create_or_update_vlan(self, vlan_id, name, description=None):
+        The first page reveals the total count; the remaining pages are then fetched
+        in parallel by offset. Objects come back as regular pynetbox records, so they
+        can be updated and saved like the results of filter().
+
+        Args:
+            kind (str): "vlans", "prefixes" or "ip_addresses"
+            **filters: NetBox filter query parameters
+
+        Returns:
+            list: pynetbox records
+        """
+        endpoint = getattr(self.api.ipam, kind)
+        params = dict(filters, limit=self.page_size, fields=",".join(PREFETCH_FIELDS[kind]))
+
+        first_page = self._get_page(endpoint.url, dict(params, offset=0))
+        results = list(first_page["results"])
+        count = first_page.get("count", len(results))
+
+        if first_page.get("next") and results:
+            # NetBox may serve fewer objects per page than requested
+            page_size = len(results)
+            offsets = range(page_size, count, page_size)
+            page_params = dict(params, limit=page_size)
+            workers = max(1, min(self.prefetch_workers, len(offsets)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                pages = pool.map(lambda offset: self._get_page(endpoint.url, dict(page_params, offset=offset)),
+                                 offsets)
+                for page in pages:
+                    results.extend(page["results"])
+
+        return [endpoint.return_obj(values, self.api, endpoint) for values in results]
+
+    @staticmethod
+    def _scope_id(scope_object):
+        """Get the ID of a scope object, or None for the global scope."""
+        return getattr(scope_object, "id", None) if scope_object is not None else None
+
+    def _load_vlan_index(self, group_id):
+        """Index every VLAN of a VLAN group by (group ID, vid)."""
+        if group_id in self._loaded_vlan_groups:
+            return
+        vlans = self._fetch_all("vlans", group_id=group_id if group_id is not None else "null")
+        for vlan in vlans:
+            self._vlan_index[(group_id, vlan.vid)] = vlan
+        self._loaded_vlan_groups.add(group_id)
+
+    def _load_prefix_index(self, vrf_id):
+        """Index every prefix of a VRF by (VRF ID, prefix)."""
+        if vrf_id in self._loaded_prefix_vrfs:
+            return
+        prefixes = self._fetch_all("prefixes", vrf_id=vrf_id if vrf_id is not None else "null")
+        for prefix in prefixes:
+            self._prefix_index[(vrf_id, prefix_key(prefix.prefix))] = prefix
+        self._loaded_prefix_vrfs.add(vrf_id)
+
+    def _load_ip_index(self, vrf_id, parent):
+        """Index every IP address inside a parent prefix of a VRF by (VRF ID, host)."""
+        parent_key = (vrf_id, prefix_key(parent))
+        if parent_key in self._loaded_ip_parents:
+            return
+        ips = self._fetch_all(
+            "ip_addresses",
+            parent=parent_key[1],
+            vrf_id=vrf_id if vrf_id is not None else "null"
+        )
+        for ip in ips:
+            self._ip_index[(vrf_id, ip_key(ip.address))] = ip
+        self._loaded_ip_parents.add(parent_key)
+
+    def create_or_update_vlan(self, vlan_id, name, description=None, vlan_group=None):
         """Create a VLAN in NetBox or update it if it already exists.
 
         Args:
             vlan_id (int): The VLAN ID
             name (str): The VLAN name
             description (str, optional): Description for the VLAN
+            vlan_group (optional): VLAN group record the VLAN belongs to (None for ungrouped)
 
         Returns:
             dict: The created or updated VLAN object
         """
-        # Check if the VLAN already exists
-        existing_vlans = list(self.api.ipam.vlans.filter(vid=vlan_id))
+        group_id = self._scope_id(vlan_group)
 
-        if existing_vlans:
+        # Check if the VLAN already exists in this group
+        self._load_vlan_index(group_id)
+        existing_vlan = self._vlan_index.get((group_id, vlan_id))
+
+        if existing_vlan is not None:
             # Update the existing VLAN
-            existing_vlan = existing_vlans[0]
             existing_vlan.name = name
             if description:
                 existing_vlan.description = description
@@ -59,9 +308,15 @@ class NetBoxClient:
             if description:
                 vlan_data["description"] = description
 
-            return self.api.ipam.vlans.create(vlan_data)
+            if group_id is not None:
+                vlan_data["group"] = group_id
+
+            new_vlan = self.api.ipam.vlans.create(vlan_data)
+            self._vlan_index[(group_id, vlan_id)] = new_vlan
+            return new_vlan
 
-    def create_or_update_prefix(self, prefix, description=None, vlan_id=None, vlan_name=None):
+    def create_or_update_prefix(self, prefix, description=None, vlan_id=None, vlan_name=None,
+                                vlan_group=None, vrf=None):
         """Create a prefix in NetBox or update it if it already exists.
 
         Args:
@@ -69,6 +324,8 @@ class NetBoxClient:
             description (str, optional): Description for the prefix
             vlan_id (int, optional): ID of the associated VLAN
             vlan_name (str, optional): Name of the associated VLAN
+            vlan_group (optional): VLAN group record the associated VLAN belongs to
+            vrf (optional): VRF record the prefix belongs to (None for the global table)
 
         Returns:
             dict: The created or updated prefix object
@@ -84,25 +341,32 @@ class NetBoxClient:
             vlan_object = self.create_or_update_vlan(
                 vlan_id=vlan_id,
                 name=vlan_name,
-                description=f"Meraki VLAN {vlan_id}"
+                description=f"Meraki VLAN {vlan_id}",
+                vlan_group=vlan_group
             )
 
-        # Check if the prefix already exists
-        existing_prefixes = list(self.api.ipam.prefixes.filter(prefix=prefix))
+        vrf_id = self._scope_id(vrf)
+        index_key = (vrf_id, prefix_key(prefix))
 
-        if existing_prefixes:
+        # Check if the prefix already exists in this VRF
+        self._load_prefix_index(vrf_id)
+        existing_prefix = self._prefix_index.get(index_key)
+
+        if existing_prefix is not None:
             # Update the existing prefix
-            existing_prefix = existing_prefixes[0]
             if description:
                 existing_prefix.description = description
             if vlan_object is not None:
                 existing_prefix.vlan = vlan_object.id
+            existing_prefix.tags = self._owner_tags(getattr(existing_prefix, "tags", None))
             existing_prefix.save()
+            self._mark_seen("prefixes", existing_prefix)
             return existing_prefix
         else:
             # Create a new prefix
             prefix_data = {
                 "prefix": prefix,
+                "tags": self._owner_tags(),
             }
 
             if description:
@@ -111,38 +375,63 @@ class NetBoxClient:
             if vlan_object is not None:
                 prefix_data["vlan"] = vlan_object.id
 
-            return self.api.ipam.prefixes.create(prefix_data)
+            if vrf_id is not None:
+                prefix_data["vrf"] = vrf_id
+
+            new_prefix = self.api.ipam.prefixes.create(prefix_data)
+            self._prefix_index[index_key] = new_prefix
+            self._mark_seen("prefixes", new_prefix)
+            return new_prefix
 
-    def create_or_update_ip_address(self, ip_address, description=None, dns_name=None, status="active"):
+    def create_or_update_ip_address(self, ip_address, description=None, dns_name=None, status="active",
+                                    vrf=None, parent=None):
         """Create an IP address in NetBox or update it if it already exists.
 
+        When the parent prefix is known, every IP address inside it is loaded with
+        a single query and later lookups in that prefix are served from memory.
+
         Args:
             ip_address (str): The IP address in CIDR notation (e.g., "192.168.10.100/24")
             description (str, optional): Description for the IP address
             dns_name (str, optional): DNS name for the IP address
             status (str, optional): Status of the IP address (default: "active")
+            vrf (optional): VRF record the IP address belongs to (None for the global table)
+            parent (str, optional): Prefix containing the IP address, in CIDR notation
 
         Returns:
             dict: The created or updated IP address object
         """
+        vrf_id = self._scope_id(vrf)
+        index_key = (vrf_id, ip_key(ip_address))
+
         # Check if the IP address already exists
-        existing_ips = list(self.api.ipam.ip_addresses.filter(address=ip_address))
+        if parent is not None:
+            self._load_ip_index(vrf_id, parent)
+            existing_ip = self._ip_index.get(index_key)
+        else:
+            existing_ips = list(self.api.ipam.ip_addresses.filter(
+                address=ip_address,
+                vrf_id=vrf_id if vrf_id is not None else "null"
+            ))
+            existing_ip = existing_ips[0] if existing_ips else None
 
-        if existing_ips:
+        if existing_ip is not None:
             # Update the existing IP address
-            existing_ip = existing_ips[0]
             if description:
                 existing_ip.description = description
             if dns_name:
                 existing_ip.dns_name = dns_name
             existing_ip.status = status
+            existing_ip.tags = self._owner_tags(getattr(existing_ip, "tags", None))
             existing_ip.save()
+            self._mark_seen("ip_addresses", existing_ip)
             return existing_ip
         else:
             # Create a new IP address
             ip_data = {
                 "address": ip_address,
                 "status": status,
+                "tags": self._owner_tags(),
             }
 
             if description:
@@ -151,4 +440,53 @@ class NetBoxClient:
             if dns_name:
                 ip_data["dns_name"] = dns_name
 
-            return self.api.ipam.ip_addresses.create(ip_data)
+            if vrf_id is not None:
+                ip_data["vrf"] = vrf_id
+
+            new_ip = self.api.ipam.ip_addresses.create(ip_data)
+            self._ip_index[index_key] = new_ip
+            self._mark_seen("ip_addresses", new_ip)
+            return new_ip
+
+    def get_owned_objects(self, kind):
+        """Get every object of a kind that carries the ownership tag.
+
+        Args:
+            kind (str): Either "prefixes" or "ip_addresses"
+
+        Returns:
+            list: Owned NetBox records
+        """
+        return self._fetch_all(kind, tag=self.owner_tag)
+
+    def bulk_delete(self, kind, object_ids):
+        """Delete objects in bulk.
+
+        Args:
+            kind (str): Either "prefixes" or "ip_addresses"
+            object_ids (list): IDs of the objects to delete
+
+        Returns:
+            int: Number of objects deleted
+        """
+        endpoint = getattr(self.api.ipam, kind)
+        object_ids = list(object_ids)
+        for start in range(0, len(object_ids), BULK_CHUNK_SIZE):
+            endpoint.delete(object_ids[start:start + BULK_CHUNK_SIZE])
+        return len(object_ids)
+
+    def bulk_update(self, kind, updates):
+        """Patch objects in bulk.
+
+        Args:
+            kind (str): Either "prefixes" or "ip_addresses"
+            updates (list): Dictionaries each containing an "id" and the fields to change
+
+        Returns:
+            int: Number of objects updated
+        """
+        endpoint = getattr(self.api.ipam, kind)
+        updates = list(updates)
+        for start in range(0, len(updates), BULK_CHUNK_SIZE):
+            endpoint.update(updates[start:start + BULK_CHUNK_SIZE])
+        return len(updates)
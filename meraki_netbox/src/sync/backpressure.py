@@ -0,0 +1,216 @@
+"""
+NetBox Backpressure Module
+
+This module keeps the pipeline's NetBox writer from overloading NetBox.
+WriteThrottle adjusts the write batch size and the number of batches in
+flight AIMD-style: both grow additively while NetBox answers quickly and
+are cut multiplicatively when requests are slow, rate limited (429) or fail
+with 5xx and transport errors. Items from failed batches wait in a
+RetryQueue with jittered exponential backoff.
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, List, Optional, Tuple
+
+# Requests slower than this many seconds count as a congestion signal
+DEFAULT_LATENCY_TARGET = 2.0
+
+# Retry backoff: base delay, cap and attempts before an item is given up on
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 30.0
+DEFAULT_MAX_ATTEMPTS = 5
+
+
+def is_overload_error(error) -> bool:
+    """Tell whether a failed request means NetBox is overloaded rather than the data being invalid.
+
+    Args:
+        error (Exception): Error raised by the NetBox client
+
+    Returns:
+        bool: True for rate limiting, server errors, timeouts and connection failures
+    """
+    if not hasattr(error, 'status'):
+        return isinstance(error, (asyncio.TimeoutError, ConnectionError))
+    # A NetBoxAPIError without a status got no answer at all
+    return error.status is None or error.status == 429 or error.status >= 500
+
+
+class AIMDLimit:
+    """An integer limit with additive increase and multiplicative decrease."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int, increase: int = 1, decrease: float = 0.5):
+        """Initialize the limit.
+
+        Args:
+            initial (int): Starting value
+            minimum (int): Lowest value the limit can be cut to
+            maximum (int): Highest value the limit can grow to
+            increase (int): Added after each success
+            decrease (float): Factor applied on each congestion signal
+        """
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.increase = increase
+        self.decrease = decrease
+        self.value = min(max(initial, minimum), self.maximum)
+
+    def grow(self):
+        self.value = min(self.maximum, self.value + self.increase)
+
+    def shrink(self):
+        self.value = max(self.minimum, int(self.value * self.decrease))
+
+
+class WriteThrottle:
+    """Adapts NetBox write batch size and concurrency to observed latency and errors."""
+
+    def __init__(self, batch_size: int = 50, max_batch_size: int = 200, concurrency: int = 2,
+                 max_concurrency: int = 8, latency_target: float = DEFAULT_LATENCY_TARGET):
+        """Initialize the throttle.
+
+        Args:
+            batch_size (int): Initial objects per write batch
+            max_batch_size (int): Largest batch size the throttle grows to
+            concurrency (int): Initial write batches in flight
+            max_concurrency (int): Most write batches the throttle allows in flight
+            latency_target (float): Seconds above which a request counts as slow
+        """
+        self.batch_size = AIMDLimit(batch_size, 1, max_batch_size, increase=max(1, batch_size // 4))
+        self.concurrency = AIMDLimit(concurrency, 1, max_concurrency)
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._condition = None
+
+        # Running statistics for the run summary
+        self.requests = 0
+        self.slow = 0
+        self.errors = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait until the current concurrency limit allows another batch in flight."""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.concurrency.value)
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def record_success(self, latency: float):
+        """Record a successful batch and adapt the limits to its latency.
+
+        Args:
+            latency (float): Seconds the batch took
+        """
+        self.requests += 1
+        if latency > self.latency_target:
+            self.slow += 1
+            self.batch_size.shrink()
+            self.concurrency.shrink()
+        else:
+            self.batch_size.grow()
+            self.concurrency.grow()
+
+    def record_failure(self, overloaded: bool):
+        """Record a failed batch.
+
+        Args:
+            overloaded (bool): Whether the failure signals NetBox overload
+        """
+        self.requests += 1
+        self.errors += 1
+        if overloaded:
+            self.batch_size.shrink()
+            self.concurrency.shrink()
+
+    def split(self, items: List) -> List[List]:
+        """Split items into batches of the current batch size."""
+        size = self.batch_size.value
+        return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+class RetryQueue:
+    """Items waiting to be retried, each released after a jittered exponential backoff."""
+
+    def __init__(self, base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_CAP,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, rng: Optional[random.Random] = None):
+        """Initialize the queue.
+
+        Args:
+            base (float): Backoff in seconds before the first retry, before jitter
+            cap (float): Longest backoff in seconds
+            max_attempts (int): Attempts after which an item is given up on
+            rng (random.Random, optional): Random source for the jitter, mainly for testing
+        """
+        self.base = base
+        self.cap = cap
+        self.max_attempts = max_attempts
+        self.rng = rng or random.Random()
+        self._heap = []
+        self._counter = itertools.count()
+
+        # (item, error) pairs that ran out of attempts
+        self.failed = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def backoff(self, attempt: int) -> float:
+        """Get a "full jitter" backoff for an attempt: uniform between 0 and the capped exponential."""
+        return self.rng.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+    def push(self, item: Any, attempt: int = 0, delay: float = 0.0, now: Optional[float] = None):
+        """Queue an item to be sent again after a delay."""
+        now = time.monotonic() if now is None else now
+        heapq.heappush(self._heap, (now + delay, next(self._counter), item, attempt))
+
+    def retry(self, item: Any, attempt: int, error: Exception, retry_after: Optional[float] = None,
+              now: Optional[float] = None) -> bool:
+        """Queue a failed item with backoff, or give up on it after too many attempts.
+
+        Args:
+            item: The item that failed
+            attempt (int): Attempts made so far
+            error (Exception): The error of the last attempt
+            retry_after (float, optional): Minimum delay requested by the server
+            now (float, optional): Current monotonic time, mainly for testing
+
+        Returns:
+            bool: True if the item was queued, False if it was given up on
+        """
+        if attempt >= self.max_attempts:
+            self.give_up(item, error)
+            return False
+        self.push(item, attempt, max(self.backoff(attempt), retry_after or 0.0), now)
+        return True
+
+    def give_up(self, item: Any, error: Exception):
+        """Record an item that must not be retried, e.g. because NetBox rejected its data."""
+        self.failed.append((item, error))
+
+    def next_delay(self, now: Optional[float] = None) -> float:
+        """Seconds until the next item is due, 0 if one is due already."""
+        if not self._heap:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._heap[0][0] - now)
+
+    def pop_ready(self, now: Optional[float] = None) -> List[Tuple[Any, int]]:
+        """Remove and return every due item as (item, attempts so far)."""
+        now = time.monotonic() if now is None else now
+        ready = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, item, attempt = heapq.heappop(self._heap)
+            ready.append((item, attempt))
+        return ready
@@ -0,0 +1,131 @@
+"""
+Change Log Module
+
+Works out which networks of an organization need their VLANs, prefixes and
+DHCP reservations synced again, from the organization's Meraki
+configuration change log since the last run. The time of the last run is
+kept as a cursor per organization, so the state directory must persist
+between runs; without a cursor the whole organization is synced.
+
+Client IPs change without any configuration change, so their sync has its
+own cadence, tracked by a second cursor.
+"""
+
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+# Change log entries touching what the sync reads, matched against their page and label
+RELEVANT_CHANGE_PATTERN = re.compile(r"vlan|dhcp|subnet|addressing|fixed ip|reserved ip", re.IGNORECASE)
+
+# Seconds the change log is read back before the last run, for entries that are logged late
+DEFAULT_OVERLAP_SECONDS = 300
+
+# Oldest change Meraki returns, with a day to spare
+MAX_LOOKBACK_SECONDS = 364 * 24 * 3600
+
+# Default minutes between client IP syncs of an organization
+DEFAULT_CLIENT_INTERVAL = 60
+
+
+def is_relevant(change: Dict) -> bool:
+    """Tell whether a change log entry may have changed VLANs, subnets or DHCP reservations."""
+    text = f"{change.get('page') or ''} {change.get('label') or ''}"
+    return bool(RELEVANT_CHANGE_PATTERN.search(text))
+
+
+def affected_networks(changes: List[Dict]) -> Optional[Set[str]]:
+    """Collect the networks whose relevant configuration changed.
+
+    Args:
+        changes (list): Change log entries as returned by MerakiClient.get_configuration_changes
+
+    Returns:
+        set: IDs of the networks to sync, or None when a relevant change is not tied to a
+            network (e.g. an organization-wide setting) and the whole organization needs a sync
+    """
+    networks = set()
+    for change in changes:
+        if not is_relevant(change):
+            continue
+        if not change.get('networkId'):
+            return None
+        networks.add(change['networkId'])
+    return networks
+
+
+class ChangeLogTracker:
+    """Reads organizations' change logs from where the last successful run left off."""
+
+    def __init__(self, meraki_client, cursors, overlap: float = DEFAULT_OVERLAP_SECONDS):
+        """Initialize the tracker.
+
+        Args:
+            meraki_client: Initialized MerakiClient instance
+            cursors (CursorStore): Store keeping the time of each organization's last run
+            overlap (float): Seconds read back before the last run
+        """
+        self.meraki = meraki_client
+        self.cursors = cursors
+        self.overlap = overlap
+
+    @staticmethod
+    def _changes_key(org_id: str) -> str:
+        return f"meraki-changes:{org_id}"
+
+    @staticmethod
+    def _clients_key(org_id: str) -> str:
+        return f"meraki-clients:{org_id}"
+
+    def changed_networks(self, org_id: str, now: Optional[float] = None) -> Optional[List[Dict]]:
+        """Find the networks of an organization to sync since its last recorded run.
+
+        Networks named in the log are dropped from the inventory cache, so their VLANs
+        are read fresh.
+
+        Args:
+            org_id (str): Meraki organization ID
+            now (float, optional): Current UNIX timestamp, mainly for testing
+
+        Returns:
+            list: Networks ("id" and "name") to sync, or None when the whole organization
+                needs a sync (no earlier run, a run too long ago, or a change the log
+                does not tie to one of the organization's networks)
+        """
+        now = time.time() if now is None else now
+        since = self.cursors.get(self._changes_key(org_id))
+        if since is None or now - since > MAX_LOOKBACK_SECONDS:
+            return None
+
+        t0 = datetime.fromtimestamp(since - self.overlap, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        network_ids = affected_networks(self.meraki.get_configuration_changes(org_id, t0))
+        if network_ids is None:
+            return None
+        if not network_ids:
+            return []
+
+        cache = getattr(self.meraki, "cache", None)
+        if cache is not None:
+            for network_id in network_ids:
+                cache.invalidate_network(network_id, org_id)
+        networks = {network["id"]: network for network in self.meraki.get_networks(org_id)}
+        # E.g. a configuration template, whose changes reach every network bound to it
+        if not network_ids <= set(networks):
+            return None
+        return [networks[network_id] for network_id in sorted(network_ids)]
+
+    def commit(self, org_id: str, started: float):
+        """Record that an organization's configuration was synced up to when the run started."""
+        self.cursors.set(self._changes_key(org_id), started)
+
+    def clients_due(self, org_id: str, interval_minutes: float = DEFAULT_CLIENT_INTERVAL,
+                    now: Optional[float] = None) -> bool:
+        """Tell whether an organization's client IPs are due for a sync."""
+        now = time.time() if now is None else now
+        last = self.cursors.get(self._clients_key(org_id))
+        return last is None or now - last >= interval_minutes * 60
+
+    def commit_clients(self, org_id: str, started: float):
+        """Record that an organization's client IPs were synced when the run started."""
+        self.cursors.set(self._clients_key(org_id), started)
@@ -0,0 +1,404 @@
+"""
+Sync Daemon Module
+
+SyncDaemon keeps running between syncs, so the Meraki client, the inventory
+cache and the NetBox indexes stay warm. Instead of syncing every network on
+a fixed timer it learns how often each one changes: a network whose VLAN
+and DHCP reservation configuration differs from the last sync is synced
+again sooner, one that did not change is left alone for longer.
+
+All syncs share one budget of Meraki API calls per minute. When the
+networks' intervals would need more calls than the budget allows, every
+interval is stretched by the same factor. Each network sync is a
+scheduled-class job on a SyncScheduler, so it yields to webhook and manual
+syncs between networks.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .priorities import PRIORITY_SCHEDULED
+
+# Default bounds and starting point, in seconds, of a network's sync interval
+DEFAULT_MIN_INTERVAL = 5 * 60
+DEFAULT_MAX_INTERVAL = 6 * 3600
+DEFAULT_INITIAL_INTERVAL = 30 * 60
+
+# Factors applied to a network's interval after a sync that found changes, or none
+CHANGED_FACTOR = 0.5
+UNCHANGED_FACTOR = 1.5
+
+# Weight of the latest sync in a network's smoothed change rate
+CHANGE_RATE_WEIGHT = 0.3
+
+# Default Meraki API calls per minute shared by all daemon syncs; Meraki allows
+# 10 calls per second per organization, the rest is left to webhooks and other tools
+DEFAULT_API_BUDGET = 300
+
+# Meraki calls assumed for a network that was never synced
+DEFAULT_NETWORK_COST = 5
+
+# Default seconds between refreshes of the network list and of the NetBox indexes
+DEFAULT_DISCOVER_INTERVAL = 3600
+DEFAULT_INDEX_TTL = 3600
+
+# Longest the daemon sleeps between checks for due networks
+MAX_TICK = 60
+
+
+def config_fingerprint(fetched: Dict) -> str:
+    """Hash the configuration part of a network's fetched data.
+
+    Client tables change all the time, so only VLANs and DHCP reservations count
+    as a change of the network.
+
+    Args:
+        fetched (dict): Raw data as returned by SyncPipeline.fetch_network
+
+    Returns:
+        str: Hex digest of the VLANs and reservations
+    """
+    config = {'vlans': fetched['vlans'], 'reservations': fetched['reservations']}
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ApiBudget:
+    """Token bucket limiting the Meraki API calls made per minute."""
+
+    def __init__(self, calls_per_minute: Optional[float] = None, burst_seconds: float = 10, keys: int = 1):
+        """Initialize the budget.
+
+        Args:
+            calls_per_minute (float, optional): Calls allowed per minute on average
+                (default: SYNC_API_BUDGET environment variable or DEFAULT_API_BUDGET, per API key)
+            burst_seconds (float): Seconds of calls that may be made at once after a quiet period
+            keys (int): Meraki API keys the calls are spread over; scales the default budget
+        """
+        if calls_per_minute is None:
+            calls_per_minute = float(os.getenv('SYNC_API_BUDGET', DEFAULT_API_BUDGET)) * keys
+        self.calls_per_minute = calls_per_minute
+        self.rate = calls_per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, cost: float):
+        """Wait until the budget allows a sync expected to make `cost` calls, and charge it.
+
+        A sync costing more than the bucket holds waits for a full bucket and leaves
+        it in debt, so the syncs after it wait correspondingly longer.
+
+        Args:
+            cost (float): Expected number of Meraki API calls
+        """
+        self._refill()
+        needed = min(cost, self.capacity)
+        if self.tokens < needed:
+            await asyncio.sleep((needed - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= cost
+
+
+class AdaptiveSchedule:
+    """Per-network sync intervals that follow each network's observed change rate.
+
+    Entries are plain dicts keyed by network ID, with the network's "name", sync
+    "interval" and "next_due" time in seconds, config "fingerprint", smoothed
+    "change_rate" (share of recent syncs that found changes) and the Meraki "cost"
+    of its last sync.
+    """
+
+    def __init__(self, min_interval: float = DEFAULT_MIN_INTERVAL, max_interval: float = DEFAULT_MAX_INTERVAL,
+                 initial_interval: float = DEFAULT_INITIAL_INTERVAL, budget: Optional[float] = None):
+        """Initialize the schedule.
+
+        Args:
+            min_interval (float): Shortest seconds between syncs of a network
+            max_interval (float): Longest seconds between syncs of a network
+            initial_interval (float): Interval of networks not synced before
+            budget (float, optional): Meraki calls per minute the schedule must stay within
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.initial_interval = min(max(initial_interval, self.min_interval), self.max_interval)
+        self.budget = budget
+        self.networks = {}
+
+    def update_networks(self, networks: Iterable[Dict], now: Optional[float] = None):
+        """Track the given networks, dropping ones that no longer exist.
+
+        New networks are due at once; known ones keep what was learned about them.
+
+        Args:
+            networks (iterable): Networks with "id" and "name"
+            now (float, optional): Current UNIX timestamp, mainly for testing
+        """
+        now = time.time() if now is None else now
+        current = {}
+        for network in networks:
+            entry = self.networks.get(network['id']) or {
+                'interval': self.initial_interval,
+                'next_due': now,
+                'fingerprint': None,
+                'change_rate': 0.0,
+                'cost': DEFAULT_NETWORK_COST,
+            }
+            entry['name'] = network['name']
+            current[network['id']] = entry
+        self.networks = current
+
+    def due(self, now: Optional[float] = None) -> List[Dict]:
+        """List the networks due for a sync, most overdue first.
+
+        Args:
+            now (float, optional): Current UNIX timestamp, mainly for testing
+
+        Returns:
+            list: Networks with "id" and "name"
+        """
+        now = time.time() if now is None else now
+        due = sorted((entry['next_due'], network_id) for network_id, entry in self.networks.items()
+                     if entry['next_due'] <= now)
+        return [{'id': network_id, 'name': self.networks[network_id]['name']} for _, network_id in due]
+
+    def next_wake(self) -> Optional[float]:
+        """Time the next network falls due, or None when no networks are tracked."""
+        return min((entry['next_due'] for entry in self.networks.values()), default=None)
+
+    def cost(self, network_id: str) -> float:
+        entry = self.networks.get(network_id)
+        return entry['cost'] if entry else DEFAULT_NETWORK_COST
+
+    def demand(self) -> float:
+        """Meraki calls per minute the current intervals add up to."""
+        return sum(entry['cost'] * 60.0 / entry['interval'] for entry in self.networks.values())
+
+    def stretch(self) -> float:
+        """Factor all intervals are stretched by to keep the schedule within the budget."""
+        if not self.budget:
+            return 1.0
+        return max(1.0, self.demand() / self.budget)
+
+    def start(self, network_id: str):
+        """Take a network off the due list while its sync runs."""
+        if network_id in self.networks:
+            self.networks[network_id]['next_due'] = float('inf')
+
+    def record(self, network_id: str, fingerprint: Optional[str], cost: float, now: Optional[float] = None):
+        """Adapt a network's interval to the result of its sync and schedule the next one.
+
+        Args:
+            network_id (str): Meraki network ID
+            fingerprint (str, optional): Config fingerprint seen, None for networks without VLANs
+            cost (float): Meraki calls the sync made
+            now (float, optional): Current UNIX timestamp, mainly for testing
+
+        Returns:
+            bool: Whether the network changed since its previous sync (False on the first one)
+        """
+        entry = self.networks.get(network_id)
+        if entry is None:
+            return False
+        now = time.time() if now is None else now
+        changed = entry['fingerprint'] is not None and fingerprint != entry['fingerprint']
+        # The first sync only sets the baseline; it says nothing about how often the network changes
+        if entry['fingerprint'] is not None or fingerprint is None:
+            factor = CHANGED_FACTOR if changed else UNCHANGED_FACTOR
+            entry['interval'] = min(max(entry['interval'] * factor, self.min_interval), self.max_interval)
+            entry['change_rate'] += CHANGE_RATE_WEIGHT * (changed - entry['change_rate'])
+        entry['fingerprint'] = fingerprint
+        entry['cost'] = cost
+        entry['next_due'] = now + entry['interval'] * self.stretch()
+        return changed
+
+    def record_error(self, network_id: str, now: Optional[float] = None):
+        """Retry a network whose sync failed after the shortest interval, without adapting it."""
+        entry = self.networks.get(network_id)
+        if entry is not None:
+            now = time.time() if now is None else now
+            entry['next_due'] = now + self.min_interval * self.stretch()
+
+    def load(self, path: str):
+        """Restore what was learned about networks from a state file written by save."""
+        if os.path.exists(path):
+            with open(path) as state_file:
+                self.networks = json.load(state_file)
+            # A sync interrupted by a restart is due again
+            for entry in self.networks.values():
+                if entry['next_due'] is None:
+                    entry['next_due'] = 0
+
+    def save(self, path: str):
+        """Write the schedule to a JSON state file atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        networks = {network_id: dict(entry, next_due=None if entry['next_due'] == float('inf') else entry['next_due'])
+                    for network_id, entry in self.networks.items()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as state_file:
+            json.dump(networks, state_file)
+        os.replace(tmp_path, path)
+
+
+class SyncDaemon:
+    """Re-syncs networks through a SyncPipeline on an adaptive schedule until stopped."""
+
+    def __init__(self, meraki_client, pipeline, scheduler, schedule: AdaptiveSchedule,
+                 budget: Optional[ApiBudget] = None, org_ids: Iterable[str] = (),
+                 networks: Optional[List[Dict]] = None, state_path: Optional[str] = None,
+                 discover_interval: float = DEFAULT_DISCOVER_INTERVAL, index_ttl: float = DEFAULT_INDEX_TTL,
+                 check_changes=None):
+        """Initialize the daemon.
+
+        Args:
+            meraki_client: Initialized MerakiClient instance, used to list networks
+            pipeline (SyncPipeline): Pipeline whose fetch_and_plan and sync_plan sync each network
+            scheduler (SyncScheduler): Scheduler the network syncs run on
+            schedule (AdaptiveSchedule): Per-network intervals
+            budget (ApiBudget, optional): Limit on Meraki calls per minute
+            org_ids (iterable): Organizations whose networks are synced
+            networks (list, optional): Networks ("id" and "name") to sync instead of whole organizations
+            state_path (str, optional): JSON file the schedule is kept in across restarts
+            discover_interval (float): Seconds between refreshes of the network list
+            index_ttl (float): Seconds before the NetBox indexes are loaded again
+            check_changes (callable, optional): Coroutine function run with every network list
+                refresh, e.g. to pick up edits from the NetBox change log
+        """
+        self.meraki = meraki_client
+        self.pipeline = pipeline
+        self.scheduler = scheduler
+        self.schedule = schedule
+        self.budget = budget
+        self.org_ids = list(org_ids)
+        self.networks = networks
+        self.state_path = state_path
+        self.discover_interval = discover_interval
+        self.index_ttl = index_ttl
+        self.check_changes = check_changes
+        self.results = {'syncs': 0, 'changed': 0, 'errors': 0}
+        self._wake = None
+
+    async def discover(self):
+        """Refresh the tracked networks from Meraki."""
+        if self.networks is not None:
+            self.schedule.update_networks(self.networks)
+            return
+        loop = asyncio.get_event_loop()
+        networks = []
+        for org_id in self.org_ids:
+            try:
+                networks.extend(await loop.run_in_executor(None, self.meraki.get_networks, org_id))
+            except Exception as e:
+                # Keep the networks of an organization that can't be listed right now
+                print(f"  Error getting networks for organization {org_id}: {e}")
+                networks.extend({'id': network_id, 'name': entry['name']}
+                                for network_id, entry in self.schedule.networks.items())
+        unique = {network['id']: network for network in networks}
+        self.schedule.update_networks(unique.values())
+
+    async def sync_network(self, network: Dict):
+        """Sync one network and adapt its interval to whether it changed.
+
+        Args:
+            network (dict): Network with "id" and "name"
+        """
+        try:
+            await self._sync_network(network)
+        finally:
+            # The network's next due time is known now, which may be sooner than the loop expects
+            if self._wake is not None:
+                self._wake.set()
+
+    async def _sync_network(self, network: Dict):
+        network_id = network['id']
+        try:
+            await self.scheduler.yield_point(PRIORITY_SCHEDULED)
+            if self.budget is not None:
+                await self.budget.acquire(self.schedule.cost(network_id))
+            fetched, plan = await self.pipeline.fetch_and_plan(network)
+            if fetched is None:
+                self.schedule.record(network_id, None, cost=1)
+                return
+            counts, skipped = await self.pipeline.sync_plan(plan)
+        except Exception as e:
+            print(f"  Error syncing network {network['name']}: {e}")
+            self.results['errors'] += 1
+            self.schedule.record_error(network_id)
+            return
+
+        cost = 1 + len(fetched['reservations'] or {}) + (fetched['clients'] is not None)
+        changed = self.schedule.record(network_id, config_fingerprint(fetched), cost)
+        self.results['syncs'] += 1
+        self.results['changed'] += changed
+        entry = self.schedule.networks[network_id]
+        state = "changed" if changed else "unchanged"
+        action = "skipped writing" if skipped else (
+            f"{counts['vlans']} VLANs, {counts['dhcp_reservations']} DHCP reservations, "
+            f"{counts['client_ips']} client IPs")
+        print(f"  Network {network['name']} {state}: {action}; next sync in {entry['interval'] / 60:.0f} min")
+
+    async def _wake_on(self, stop: asyncio.Event):
+        await stop.wait()
+        self._wake.set()
+
+    def _submit_due(self, now: float):
+        for network in self.schedule.due(now):
+            self.schedule.start(network['id'])
+
+            async def job(network=network):
+                await self.sync_network(network)
+
+            self.scheduler.submit(('network', network['id']), PRIORITY_SCHEDULED, job)
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Sync due networks until stop is set.
+
+        Args:
+            stop (asyncio.Event, optional): Set to shut the daemon down; without one it runs forever
+        """
+        stop = stop or asyncio.Event()
+        self._wake = asyncio.Event()
+        stop_watcher = asyncio.ensure_future(self._wake_on(stop))
+        next_discovery = 0.0
+        indexes_loaded = time.time()
+        try:
+            while not stop.is_set():
+                self._wake.clear()
+                now = time.time()
+                if now >= next_discovery:
+                    await self.discover()
+                    if self.check_changes is not None:
+                        await self.check_changes()
+                    next_discovery = now + self.discover_interval
+                    print(f"Tracking {len(self.schedule.networks)} networks, "
+                          f"about {self.schedule.demand():.0f} Meraki calls per minute at current intervals")
+                if now - indexes_loaded >= self.index_ttl:
+                    self.pipeline.netbox.clear_indexes()
+                    # Nothing reconciles against the IDs seen, so they needn't pile up
+                    for ids in self.pipeline.netbox.seen_ids.values():
+                        ids.clear()
+                    indexes_loaded = now
+
+                self._submit_due(now)
+                if self.state_path:
+                    self.schedule.save(self.state_path)
+
+                wake = min(self.schedule.next_wake() or float('inf'), next_discovery)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), max(0.01, min(wake - time.time(), MAX_TICK)))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            stop_watcher.cancel()
+            await self.scheduler.stop()
+            if self.state_path:
+                self.schedule.save(self.state_path)
+        return self.results
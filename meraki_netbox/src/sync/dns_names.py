@@ -0,0 +1,80 @@
+"""
+DNS Name Sanitization Module
+
+This module turns Meraki client and reservation names into DNS names that
+NetBox accepts. Client names repeat heavily across a network ("iPhone",
+"Unknown Device", ...), so results are memoized in a bounded LRU cache and
+a batch API is provided for sanitizing whole client lists at once.
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+
+# Names Meraki uses for devices it could not identify
+PLACEHOLDER_NAMES = frozenset(['unknown device', 'none', 'unknown'])
+
+# DNS limits from RFC 1035
+MAX_LABEL_LENGTH = 63
+MAX_NAME_LENGTH = 255
+
+# Maximum number of distinct names kept in the sanitizer cache
+CACHE_SIZE = 8192
+
+_INVALID_CHARS = re.compile(r'[^a-zA-Z0-9\-\.\*_]')
+_HYPHEN_RUNS = re.compile(r'-+')
+
+
+def _sanitize_label(label: str) -> str:
+    """Sanitize a single DNS label and enforce the label length limit."""
+    # NetBox only accepts "*" as a whole wildcard label
+    if label != '*':
+        label = label.replace('*', '-')
+    label = _HYPHEN_RUNS.sub('-', label).strip('-')
+    return label[:MAX_LABEL_LENGTH].rstrip('-')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def sanitize_dns_name(name: str) -> Optional[str]:
+    """Sanitize a name to be valid for DNS in NetBox.
+
+    Args:
+        name (str): The original name
+
+    Returns:
+        str: Sanitized DNS name or None if invalid
+    """
+    if not name or name.lower() in PLACEHOLDER_NAMES:
+        return None
+
+    # Replace invalid characters with hyphens, then clean up each label
+    sanitized = _INVALID_CHARS.sub('-', name)
+    labels = [label for label in map(_sanitize_label, sanitized.split('.')) if label]
+
+    # Drop trailing labels until the whole name fits
+    while labels and len('.'.join(labels)) > MAX_NAME_LENGTH:
+        labels.pop()
+
+    # Ensure it's not empty after sanitization
+    if not labels:
+        return None
+
+    return '.'.join(labels)
+
+
+def sanitize_dns_names(names: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """Sanitize a batch of names.
+
+    Each distinct name in the batch is sanitized once, so large batches don't
+    churn the shared LRU cache.
+
+    Args:
+        names (iterable): Original names, None entries are allowed
+
+    Returns:
+        list: Sanitized DNS names in the same order, None where a name is invalid
+    """
+    names = list(names)
+    sanitized = {name: sanitize_dns_name(name) for name in set(names) if name}
+    return [sanitized.get(name) if name else None for name in names]
@@ -0,0 +1,94 @@
+"""
+Drift Detection Module
+
+Finds manual edits to the NetBox objects the sync owns by reading NetBox's
+object change log from a stored cursor, instead of re-reading every prefix
+and IP address. Networks whose objects were changed after the sync last
+wrote them lose their plan cache entry, so the next run writes them again;
+every other cached network counts as verified, so the plan cache's periodic
+existence checks are only needed where the change log can't vouch for a
+network.
+
+The cursor also records since when the change log has been followed
+without a gap, because only networks verified within that span can be
+vouched for.
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Change log content types of the objects the sync owns, and the plan cache kinds they map to
+OWNED_OBJECT_TYPES = {
+    "ipam.prefix": "prefixes",
+    "ipam.ipaddress": "ip_addresses",
+}
+
+# Name of the drift detector's cursor in the CursorStore
+CURSOR_NAME = "netbox-changes"
+
+# Days NetBox keeps change log entries by default (CHANGELOG_RETENTION); a cursor
+# older than that may have missed entries, so following the log starts over
+CHANGELOG_RETENTION_DAYS = 90
+
+# Seconds a change may postdate the sync's write of an object and still count as that write
+DEFAULT_CLOCK_SKEW = 60
+
+
+def change_time(change: Dict) -> float:
+    """Parse the time of a change log entry into a UNIX timestamp."""
+    # NetBox writes UTC times with a "Z" suffix, which fromisoformat only accepts from Python 3.11 on
+    return datetime.fromisoformat(change["time"].replace("Z", "+00:00")).timestamp()
+
+
+class DriftDetector:
+    """Follows the NetBox object change log and invalidates plans of networks edited in NetBox."""
+
+    def __init__(self, netbox_client, cursors, plan_cache, sync_user: Optional[str] = None,
+                 clock_skew: float = DEFAULT_CLOCK_SKEW):
+        """Initialize the detector.
+
+        Args:
+            netbox_client: Initialized AsyncNetBoxClient instance
+            cursors (CursorStore): Store keeping how far the change log was read
+            plan_cache (PlanCache): Plan cache whose entries are invalidated or verified
+            sync_user (str, optional): NetBox user the sync writes as; its changes are not fetched
+            clock_skew (float): Seconds of clock difference tolerated between this host and NetBox
+        """
+        self.netbox = netbox_client
+        self.cursors = cursors
+        self.plan_cache = plan_cache
+        self.sync_user = sync_user
+        self.clock_skew = clock_skew
+
+    async def check(self, now: Optional[float] = None) -> Optional[List[str]]:
+        """Read the change log since the last check and update the plan cache from it.
+
+        Args:
+            now (float, optional): Current UNIX timestamp, mainly for testing
+
+        Returns:
+            list: IDs of networks whose plans were invalidated, or None when there was no
+                usable cursor yet and the change log is only followed from now on
+        """
+        now = time.time() if now is None else now
+        cursor = self.cursors.get(CURSOR_NAME)
+        if cursor is None or now - cursor["checked_at"] > CHANGELOG_RETENTION_DAYS * 24 * 3600:
+            latest = await self.netbox.latest_object_change_id()
+            self.cursors.set(CURSOR_NAME, {"id": latest, "since": now, "checked_at": now})
+            return None
+
+        changes = await self.netbox.fetch_object_changes(cursor["id"], OWNED_OBJECT_TYPES,
+                                                         exclude_user=self.sync_user)
+        # Per kind, the latest change of each touched object
+        changed = {kind: {} for kind in OWNED_OBJECT_TYPES.values()}
+        for change in changes:
+            kind = OWNED_OBJECT_TYPES.get(change["changed_object_type"])
+            if kind is not None:
+                changed[kind][change["changed_object_id"]] = change_time(change)
+
+        stale = self.plan_cache.invalidate_changed(changed, tolerance=self.clock_skew)
+        self.plan_cache.mark_all_verified(cursor["since"], now=now)
+        last_id = changes[-1]["id"] if changes else cursor["id"]
+        self.cursors.set(CURSOR_NAME, {"id": last_id, "since": cursor["since"], "checked_at": now})
+        return stale
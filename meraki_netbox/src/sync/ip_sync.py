@@ -6,22 +6,48 @@ It syncs both dynamic client IP addresses and static DHCP reservations.
 """
 
 import ipaddress
-import re
 from typing import Dict, List, Optional
 
+from .dns_names import sanitize_dns_name
+from .prefix_registry import PrefixRegistry
+from .subnet_assign import assign_subnets
+
 
 class IPSynchronizer:
     """Synchronizes Meraki IP addresses to NetBox IP addresses."""
     
-    def __init__(self, meraki_client, netbox_client):
+    def __init__(self, meraki_client, netbox_client, dead_letters=None, yield_point=None):
         """Initialize the IP synchronizer.
         
         Args:
             meraki_client: Initialized MerakiClient instance
             netbox_client: Initialized NetBoxClient instance
+            dead_letters (DeadLetterStore, optional): Store that keeps failed operations for replay
+            yield_point (callable, optional): Called before each network of an organization,
+                to wait while more urgent syncs run
         """
         self.meraki = meraki_client
         self.netbox = netbox_client
+        self.dead_letters = dead_letters
+        self.yield_point = yield_point
+
+        # Org-wide registry of subnets keyed by (network, subnet), shared across networks
+        self.registry = PrefixRegistry()
+
+        # Networks whose IPs were not fully synced (errors or truncated client lists),
+        # which reconciliation must leave alone
+        self.incomplete_networks = set()
+
+    def _register_network(self, network_id: str, network_name: str, vlans: List[Dict]):
+        """Register a network's VLAN subnets, scoped to its NetBox VRF.
+
+        Args:
+            network_id (str): Meraki network ID
+            network_name (str): Meraki network name
+            vlans (list): List of VLAN dictionaries
+        """
+        scope = self.netbox.get_network_scope(network_id, network_name)
+        self.registry.register_network(network_id, vlans, vrf=scope["vrf"])
 
     def _sanitize_dns_name(self, name: str) -> Optional[str]:
         """Sanitize a name to be valid for DNS in NetBox.
@@ -32,45 +58,10 @@ class IPSynchronizer:
         Returns:
             str: Sanitized DNS name or None if invalid
         """
-        if not name or name.lower() in ['unknown device', 'none', 'unknown']:
-            return None
-
-        # Replace invalid characters with hyphens and remove multiple consecutive hyphens
-        sanitized = re.sub(r'[^a-zA-Z0-9\-\.\*_]', '-', name)
-        sanitized = re.sub(r'-+', '-', sanitized)  # Replace multiple hyphens with single
-        sanitized = sanitized.strip('-')  # Remove leading/trailing hyphens
-
-        # Ensure it's not empty after sanitization
-        if not sanitized:
-            return None
-
-        return sanitized
+        return sanitize_dns_name(name)
     
-    def _get_subnet_for_ip(self, ip_address: str, vlans: List[Dict]) -> Optional[str]:
-        """Find which VLAN subnet an IP address belongs to.
-        
-        Args:
-            ip_address (str): The IP address to check
-            vlans (list): List of VLAN dictionaries with subnet information
-            
-        Returns:
-            str: The subnet in CIDR notation, or None if not found
-        """
-        try:
-            ip = ipaddress.ip_address(ip_address)
-            for vlan in vlans:
-                if 'subnet' in vlan:
-                    try:
-                        network = ipaddress.ip_network(vlan['subnet'], strict=False)
-                        if ip in network:
-                            return vlan['subnet']
-                    except (ipaddress.AddressValueError, ValueError):
-                        continue
-        except (ipaddress.AddressValueError, ValueError):
-            pass
-        return None
-    
-    def _create_ip_with_subnet(self, ip_address: str, subnet: str, description: str, dns_name: str = None):
+    def _create_ip_with_subnet(self, ip_address: str, subnet: str, description: str, dns_name: str = None,
+                               vrf=None, network_id: str = None, network_name: str = None):
         """Create an IP address in NetBox with proper subnet mask.
         
         Args:
@@ -78,20 +69,48 @@ class IPSynchronizer:
             subnet (str): The subnet in CIDR notation
             description (str): Description for the IP address
             dns_name (str, optional): DNS name for the IP address
+            vrf (optional): NetBox VRF record the subnet belongs to
+            network_id (str, optional): Meraki network ID, recorded with a failure for replay
+            network_name (str, optional): Meraki network name, recorded with a failure for replay
+
+        Returns:
+            bool: True if the IP address was written
         """
         try:
             # Extract the subnet mask from the subnet
             network = ipaddress.ip_network(subnet, strict=False)
-            ip_with_mask = f"{ip_address}/{network.prefixlen}"
-            
+        except ValueError as e:
+            print(f"    Error creating IP {ip_address}: {e}")
+            return False
+
+        ip_with_mask = f"{ip_address}/{network.prefixlen}"
+        key = f"{network_id}:{ip_address}"
+        try:
             self.netbox.create_or_update_ip_address(
                 ip_address=ip_with_mask,
                 description=description,
                 dns_name=dns_name,
-                status="active"
+                status="active",
+                vrf=vrf,
+                parent=subnet
             )
         except Exception as e:
             print(f"    Error creating IP {ip_address}: {e}")
+            if self.dead_letters is not None and network_id:
+                self.dead_letters.add("ip_address", key, {
+                    "address": ip_with_mask,
+                    "description": description,
+                    "dns_name": dns_name,
+                    "status": "active",
+                    "parent": subnet,
+                    "network_id": network_id,
+                    "network_name": network_name,
+                }, e)
+            return False
+
+        if self.dead_letters is not None and network_id:
+            self.dead_letters.discard("ip_address", key)
+        return True
     
     def sync_dhcp_reservations(self, network_id: str, network_name: str, vlans: List[Dict]) -> int:
         """Synchronize DHCP reservations (fixed IP assignments) to NetBox.
@@ -105,6 +124,9 @@ class IPSynchronizer:
             int: Number of DHCP reservations synced
         """
         reservations_synced = 0
+
+        if network_id not in self.registry:
+            self._register_network(network_id, network_name, vlans)
         
         for vlan in vlans:
             if 'id' not in vlan or 'subnet' not in vlan:
@@ -121,17 +143,32 @@ class IPSynchronizer:
                     if ip_address:
                         description = f"DHCP Reservation - {name}\nNetwork: {network_name}\nVLAN: {vlan['name']} ({vlan['id']})\nMAC: {mac_address}"
                         dns_name = self._sanitize_dns_name(name)
+                        entry = self.registry.get(network_id, vlan['subnet'])
                         
-                        self._create_ip_with_subnet(
+                        if not self._create_ip_with_subnet(
                             ip_address=ip_address,
                             subnet=vlan['subnet'],
                             description=description,
-                            dns_name=dns_name
-                        )
+                            dns_name=dns_name,
+                            vrf=entry['vrf'] if entry else None,
+                            network_id=network_id,
+                            network_name=network_name
+                        ):
+                            self.incomplete_networks.add(network_id)
                         reservations_synced += 1
+
+                if self.dead_letters is not None:
+                    self.dead_letters.discard("dhcp_reservations", f"{network_id}:{vlan['id']}")
                         
             except Exception as e:
                 print(f"    Error syncing DHCP reservations for VLAN {vlan['id']}: {e}")
+                self.incomplete_networks.add(network_id)
+                if self.dead_letters is not None:
+                    self.dead_letters.add("dhcp_reservations", f"{network_id}:{vlan['id']}", {
+                        "network_id": network_id,
+                        "network_name": network_name,
+                        "vlan": vlan,
+                    }, e)
         
         return reservations_synced
     
@@ -148,40 +185,46 @@ class IPSynchronizer:
             int: Number of client IPs synced
         """
         try:
-            # Get network clients
-            clients = self.meraki.get_network_clients(network_id)
+            if network_id not in self.registry:
+                self._register_network(network_id, network_name, vlans)
+
+            # Get network clients, keeping only the columns the sync reads
+            # and limiting the number of clients to avoid overwhelming NetBox
+            clients = self.meraki.get_network_client_table(network_id, limit=limit)
             clients_synced = 0
+
+            # Clients beyond the limit were not synced, so the network's IPs are only a sample
+            if limit is not None and len(clients) >= limit:
+                self.incomplete_networks.add(network_id)
+
+            # Find which of this network's subnets every client IP belongs to in one pass
+            assignments, entries = assign_subnets(clients, self.registry)
             
-            # Limit the number of clients to avoid overwhelming NetBox
-            clients = clients[:limit]
-            
-            for client in clients:
-                ip_address = client.get('ip')
-                mac_address = client.get('mac')
-                description_name = client.get('description', 'Unknown Device')
-                
-                if ip_address and mac_address:
-                    # Find which subnet this IP belongs to
-                    subnet = self._get_subnet_for_ip(ip_address, vlans)
+            for row, (_, ip_address, mac_address, description_name) in enumerate(clients):
+                if assignments[row] >= 0:
+                    entry = entries[assignments[row]]
+                    description = f"Active Client - {description_name}\nNetwork: {network_name}\nMAC: {mac_address}"
+                    dns_name = self._sanitize_dns_name(description_name)
                     
-                    if subnet:
-                        description = f"Active Client - {description_name}\nNetwork: {network_name}\nMAC: {mac_address}"
-                        dns_name = self._sanitize_dns_name(description_name)
-                        
-                        self._create_ip_with_subnet(
-                            ip_address=ip_address,
-                            subnet=subnet,
-                            description=description,
-                            dns_name=dns_name
-                        )
-                        clients_synced += 1
-                    else:
-                        print(f"    Warning: Could not find subnet for IP {ip_address}")
+                    if not self._create_ip_with_subnet(
+                        ip_address=ip_address,
+                        subnet=entry['subnet'],
+                        description=description,
+                        dns_name=dns_name,
+                        vrf=entry['vrf'],
+                        network_id=network_id,
+                        network_name=network_name
+                    ):
+                        self.incomplete_networks.add(network_id)
+                    clients_synced += 1
+                else:
+                    print(f"    Warning: Could not find subnet for IP {ip_address}")
             
             return clients_synced
             
         except Exception as e:
             print(f"    Error syncing client IPs: {e}")
+            self.incomplete_networks.add(network_id)
             return 0
     
     def sync_network_ips(self, network_id: str, network_name: str, sync_clients: bool = True, sync_reservations: bool = True) -> Dict[str, int]:
@@ -199,6 +242,7 @@ class IPSynchronizer:
         try:
             # Get VLANs for subnet information
             vlans = self.meraki.get_vlans(network_id)
+            self._register_network(network_id, network_name, vlans)
             
             results = {
                 'dhcp_reservations': 0,
@@ -215,6 +259,10 @@ class IPSynchronizer:
             
         except Exception as e:
             print(f"    Error syncing network IPs: {e}")
+            # Networks without VLAN support have no IPs to sync; anything else is a failure
+            error_msg = str(e)
+            if "VLANs are not enabled" not in error_msg and "This endpoint only supports MX networks" not in error_msg:
+                self.incomplete_networks.add(network_id)
             return {'dhcp_reservations': 0, 'client_ips': 0}
     
     def sync_organization_ips(self, org_id: str, sync_clients: bool = True, sync_reservations: bool = True) -> Dict[str, int]:
@@ -240,6 +288,8 @@ class IPSynchronizer:
             network_id = network["id"]
             network_name = network["name"]
             
+            if self.yield_point is not None:
+                self.yield_point()
             print(f"    Syncing IPs for network: {network_name}")
             results = self.sync_network_ips(network_id, network_name, sync_clients, sync_reservations)
             
@@ -0,0 +1,475 @@
+"""
+Streaming Sync Pipeline Module
+
+This module syncs Meraki networks to NetBox as a staged asyncio pipeline:
+
+    network enumeration -> per-network fetch -> transform -> batched NetBox writes
+
+Stages are connected by bounded queues and each has its own number of
+workers, so Meraki fetches for one network overlap NetBox writes for
+another. The Meraki SDK is synchronous and runs in a thread pool; NetBox
+writes go through an AsyncNetBoxClient.
+
+With a PlanCache, a network whose plan hashes the same as the last one
+written in full is not written again; only now and then is NetBox checked
+for the objects that plan produced.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from .backpressure import RetryQueue, WriteThrottle, is_overload_error
+from .plan import build_network_plan
+
+# Default workers per stage and queue capacity between stages
+DEFAULT_FETCH_WORKERS = 4
+DEFAULT_WRITE_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 8
+
+# Default number of IP addresses in the first NetBox write batch, and the most a batch grows to
+DEFAULT_BATCH_SIZE = 50
+MAX_BATCH_SIZE = 200
+
+
+class SyncPipeline:
+    """Syncs networks through fetch, transform and write stages running concurrently."""
+
+    def __init__(self, meraki_client, netbox_client, sync_ips=True, sync_clients=True, sync_reservations=True,
+                 client_limit=50, fetch_workers=None, write_workers=None, queue_size=None, batch_size=None,
+                 throttle=None, retry_queue_factory=RetryQueue, dead_letters=None, plan_cache=None,
+                 yield_point=None):
+        """Initialize the pipeline.
+
+        Args:
+            meraki_client: Initialized MerakiClient instance
+            netbox_client: Initialized AsyncNetBoxClient instance
+            sync_ips (bool): Whether to sync IP addresses at all
+            sync_clients (bool): Whether to sync active client IPs
+            sync_reservations (bool): Whether to sync DHCP reservations
+            client_limit (int): Maximum number of clients to sync per network
+            fetch_workers (int, optional): Networks fetched from Meraki concurrently
+            write_workers (int, optional): Networks written to NetBox concurrently
+            queue_size (int, optional): Capacity of each queue between stages
+            batch_size (int, optional): IP addresses in the first NetBox write batch
+            throttle (WriteThrottle, optional): Adapts write batch size and concurrency to NetBox load
+            retry_queue_factory (callable): Creates the retry queue used for each network's writes
+            dead_letters (DeadLetterStore, optional): Store that keeps failed operations for replay
+            plan_cache (PlanCache, optional): Skips networks whose plan is unchanged since it was last written
+            yield_point (callable, optional): Coroutine function awaited before each network is
+                fetched, to wait while more urgent syncs run
+        """
+        self.meraki = meraki_client
+        self.netbox = netbox_client
+        self.sync_clients = sync_ips and sync_clients
+        self.sync_reservations = sync_ips and sync_reservations
+        self.client_limit = client_limit
+        self.fetch_workers = fetch_workers or DEFAULT_FETCH_WORKERS
+        self.write_workers = write_workers or DEFAULT_WRITE_WORKERS
+        self.queue_size = queue_size or DEFAULT_QUEUE_SIZE
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.throttle = throttle or WriteThrottle(
+            batch_size=batch_size,
+            max_batch_size=max(batch_size, MAX_BATCH_SIZE),
+            concurrency=self.write_workers,
+            max_concurrency=getattr(netbox_client, 'max_in_flight', self.write_workers * 4)
+        )
+        self.retry_queue_factory = retry_queue_factory
+        self.dead_letters = dead_letters
+        self.plan_cache = plan_cache
+        self.yield_point = yield_point
+
+        # (IP address item, error) pairs that could not be written after all retries
+        self.failed = []
+
+        # Per kind, networks that were not fully synced in the last run, which reconciliation
+        # must leave alone; None stands for networks of an organization that could not be listed
+        self.incomplete = self._empty_incomplete()
+
+        self.results = self._empty_results()
+        self._executor = None
+
+    @staticmethod
+    def _empty_results():
+        return {'networks': 0, 'vlans': 0, 'dhcp_reservations': 0, 'client_ips': 0, 'errors': 0, 'failed': 0,
+                'unchanged': 0}
+
+    @staticmethod
+    def _empty_incomplete():
+        return {'prefixes': set(), 'ip_addresses': set()}
+
+    def _mark_incomplete(self, network_id, kinds=('prefixes', 'ip_addresses')):
+        """Record that some of a network's objects were not synced in this run."""
+        for kind in kinds:
+            self.incomplete[kind].add(network_id)
+
+    def _dead_letter(self, kind, key, payload, error):
+        """Keep a failed operation for replay, if a dead-letter store is configured."""
+        if self.dead_letters is not None:
+            self.dead_letters.add(kind, key, payload, error)
+
+    def _resolve_dead_letter(self, kind, key):
+        """Drop the dead letter of an operation that has now succeeded."""
+        if self.dead_letters is not None:
+            self.dead_letters.discard(kind, key)
+
+    async def _call_meraki(self, method, *args, **kwargs):
+        """Run a blocking Meraki client call in the fetch thread pool."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, lambda: method(*args, **kwargs))
+
+    def fetch_network(self, network: Dict) -> Optional[Dict]:
+        """Fetch everything the sync needs for one network from Meraki (blocking).
+
+        Args:
+            network (dict): Network with "id" and "name"
+
+        Returns:
+            dict: Raw data with "network", "vlans", "reservations" and "clients", or None
+                when the network has no VLANs to sync
+        """
+        network_id = network['id']
+        try:
+            vlans = self.meraki.get_vlans(network_id)
+        except Exception as e:
+            error_msg = str(e)
+            if "VLANs are not enabled" in error_msg:
+                print(f"  Skipping network {network['name']}: VLANs are not enabled")
+            elif "This endpoint only supports MX networks" in error_msg:
+                print(f"  Skipping network {network['name']}: Not an MX network (VLANs not supported)")
+            else:
+                print(f"  Error syncing network {network['name']}: {e}")
+                self._mark_incomplete(network_id)
+            return None
+
+        reservations = None
+        if self.sync_reservations:
+            reservations = {}
+            for vlan in vlans:
+                if 'id' not in vlan or 'subnet' not in vlan:
+                    continue
+                try:
+                    reservations[str(vlan['id'])] = self.meraki.get_dhcp_reservations(network_id, vlan['id'])
+                    self._resolve_dead_letter("dhcp_reservations", f"{network_id}:{vlan['id']}")
+                except Exception as e:
+                    print(f"    Error syncing DHCP reservations for VLAN {vlan['id']}: {e}")
+                    self._mark_incomplete(network_id, ('ip_addresses',))
+                    self._dead_letter("dhcp_reservations", f"{network_id}:{vlan['id']}", {
+                        'network_id': network_id,
+                        'network_name': network['name'],
+                        'vlan': vlan,
+                    }, e)
+
+        clients = None
+        if self.sync_clients:
+            try:
+                clients = self.meraki.get_network_client_table(network_id, limit=self.client_limit)
+                # Clients beyond the limit are not synced, so the network's IPs are only a sample
+                if self.client_limit is not None and len(clients) >= self.client_limit:
+                    self._mark_incomplete(network_id, ('ip_addresses',))
+            except Exception as e:
+                print(f"    Error syncing client IPs: {e}")
+                self._mark_incomplete(network_id, ('ip_addresses',))
+
+        return {'network': network, 'vlans': vlans, 'reservations': reservations, 'clients': clients}
+
+    async def fetch_and_plan(self, network: Dict):
+        """Fetch one network and build its plan outside a pipeline run, e.g. for the daemon.
+
+        Args:
+            network (dict): Network with "id" and "name"
+
+        Returns:
+            tuple: The raw data as returned by fetch_network and the plan built from it,
+                or (None, None) when the network has no VLANs to sync
+        """
+        fetched = await self._call_meraki(self.fetch_network, network)
+        if fetched is None:
+            return None, None
+        plan = build_network_plan(network['id'], network['name'], fetched['vlans'],
+                                  fetched['reservations'], fetched['clients'])
+        return fetched, plan
+
+    async def _enumerate(self, networks_queue: asyncio.Queue, org_ids: Iterable[str],
+                         networks: Optional[List[Dict]]):
+        """Stage 1: put every network to sync on the queue."""
+        if networks is not None:
+            for network in networks:
+                await networks_queue.put(network)
+            return
+
+        for org_id in org_ids:
+            try:
+                org_networks = await self._call_meraki(self.meraki.get_networks, org_id)
+            except Exception as e:
+                print(f"  Error getting networks for organization {org_id}: {e}")
+                self.results['errors'] += 1
+                self._mark_incomplete(None)
+                continue
+            for network in org_networks:
+                await networks_queue.put(network)
+
+    async def _fetch_worker(self, networks_queue: asyncio.Queue, fetched_queue: asyncio.Queue):
+        """Stage 2: fetch each network's VLANs, reservations and clients."""
+        while True:
+            network = await networks_queue.get()
+            try:
+                if self.yield_point is not None:
+                    await self.yield_point()
+                fetched = await self._call_meraki(self.fetch_network, network)
+                if fetched is not None:
+                    await fetched_queue.put(fetched)
+            except Exception as e:
+                print(f"  Error fetching network {network.get('name')}: {e}")
+                self.results['errors'] += 1
+                self._mark_incomplete(network.get('id'))
+            finally:
+                networks_queue.task_done()
+
+    async def _transform_worker(self, fetched_queue: asyncio.Queue, plans_queue: asyncio.Queue):
+        """Stage 3: turn fetched data into the network's desired NetBox state."""
+        while True:
+            fetched = await fetched_queue.get()
+            try:
+                network = fetched['network']
+                plan = build_network_plan(network['id'], network['name'], fetched['vlans'],
+                                          fetched['reservations'], fetched['clients'])
+                await plans_queue.put(plan)
+            except Exception as e:
+                print(f"  Error planning network {fetched['network'].get('name')}: {e}")
+                self.results['errors'] += 1
+                self._mark_incomplete(fetched['network'].get('id'))
+            finally:
+                fetched_queue.task_done()
+
+    async def write_plan(self, plan: Dict, written_ids: Optional[Dict[str, List[int]]] = None) -> Dict[str, int]:
+        """Write one network's plan to NetBox.
+
+        Args:
+            plan (dict): Plan built by build_network_plan
+            written_ids (dict, optional): Per kind, list the IDs of the objects written are appended to
+
+        Returns:
+            dict: Counts of VLANs, DHCP reservations and client IPs synced
+        """
+        network_id = plan['network_id']
+        network_name = plan['network_name']
+        scope = await self.netbox.get_network_scope(network_id, network_name)
+        vrf_id = scope['vrf']['id'] if scope['vrf'] else None
+
+        async def write_prefix(item):
+            try:
+                result = await self.netbox.create_or_update_prefix(
+                    prefix=item['prefix'],
+                    description=item['description'],
+                    vlan_id=item['vlan_id'],
+                    vlan_name=item['vlan_name'],
+                    vlan_group=scope['vlan_group'],
+                    vrf=scope['vrf']
+                )
+                if written_ids is not None and result:
+                    written_ids['prefixes'].append(result['id'])
+                self._resolve_dead_letter('prefix', f"{network_id}:{item['prefix']}")
+                return True
+            except Exception as vlan_error:
+                print(f"    Error syncing VLAN {item['vlan_id']} in network {network_name}: {vlan_error}")
+                self._mark_incomplete(network_id, ('prefixes',))
+                self._dead_letter('prefix', f"{network_id}:{item['prefix']}", dict(
+                    item, network_id=network_id, network_name=network_name
+                ), vlan_error)
+                return False
+
+        written = await asyncio.gather(*[write_prefix(item) for item in plan['prefixes']])
+
+        failed = await self.write_ip_addresses([dict(item, vrf=vrf_id) for item in plan['ip_addresses']],
+                                               None if written_ids is None else written_ids['ip_addresses'])
+        if failed:
+            self._mark_incomplete(network_id, ('ip_addresses',))
+        if self.dead_letters is not None:
+            failed_addresses = {item['address'] for item, _ in failed}
+            for item in plan['ip_addresses']:
+                if item['address'] not in failed_addresses:
+                    self._resolve_dead_letter('ip_address', f"{network_id}:{item['address'].split('/')[0]}")
+            for item, error in failed:
+                payload = {field: value for field, value in item.items() if field != 'vrf'}
+                self._dead_letter('ip_address', f"{network_id}:{item['address'].split('/')[0]}", dict(
+                    payload, network_id=network_id, network_name=network_name
+                ), error)
+
+        return {
+            'vlans': sum(written),
+            'dhcp_reservations': plan['dhcp_reservations'],
+            'client_ips': plan['client_ips'],
+        }
+
+    async def _send_batch(self, batch: List, retries: RetryQueue, written: Optional[List[int]] = None):
+        """Send one batch of (item, attempts) pairs, queueing its items for retry if NetBox is overloaded."""
+        async with self.throttle.slot():
+            start = time.monotonic()
+            try:
+                result = await self.netbox.bulk_apply_ip_addresses([item for item, _ in batch])
+                if written is not None and result:
+                    written.extend(obj['id'] for obj in result['objects'] if obj)
+                error = None
+            except Exception as e:
+                error = e
+            overloaded = error is not None and is_overload_error(error)
+            if error is None:
+                self.throttle.record_success(time.monotonic() - start)
+            else:
+                self.throttle.record_failure(overloaded)
+
+        if error is None:
+            return
+        if overloaded:
+            for item, attempt in batch:
+                if not retries.retry(item, attempt + 1, error, getattr(error, 'retry_after', None)):
+                    print(f"    Error creating IP {item['address']}: {error}")
+        elif len(batch) > 1:
+            # A bulk request fails as a whole; send its items alone to isolate the bad ones
+            await asyncio.gather(*[self._send_batch([pair], retries, written) for pair in batch])
+        else:
+            # The item itself was rejected, so retrying it would fail the same way
+            item, _ = batch[0]
+            retries.give_up(item, error)
+            print(f"    Error creating IP {item['address']}: {error}")
+
+    async def write_ip_addresses(self, items: List[Dict], written: Optional[List[int]] = None):
+        """Write IP addresses in adaptively sized batches, retrying failed items with backoff.
+
+        Args:
+            items (list): IP address dictionaries as taken by bulk_apply_ip_addresses
+            written (list, optional): List the IDs of the IP addresses written are appended to
+
+        Returns:
+            list: (item, error) pairs that could not be written
+        """
+        retries = self.retry_queue_factory()
+        pending = [(item, 0) for item in items]
+        while pending or retries:
+            if pending:
+                await asyncio.gather(*[self._send_batch(batch, retries, written)
+                                       for batch in self.throttle.split(pending)])
+            else:
+                await asyncio.sleep(retries.next_delay())
+            pending = retries.pop_ready()
+
+        self.failed.extend(retries.failed)
+        self.results['failed'] += len(retries.failed)
+        return retries.failed
+
+    def _plan_settings(self) -> Dict:
+        """Settings that change the NetBox objects a plan produces, hashed along with it."""
+        return {
+            'url': getattr(self.netbox, 'url', None),
+            'owner_tag': getattr(self.netbox, 'owner_tag', None),
+            'vrf_per_network': getattr(self.netbox, 'vrf_per_network', None),
+        }
+
+    async def _cached_objects_exist(self, object_ids: Dict[str, List[int]]) -> bool:
+        """Drift check: tell whether every object a cached plan produced still exists in NetBox."""
+        for kind, ids in object_ids.items():
+            if ids and await self.netbox.count_existing(kind, ids) != len(set(ids)):
+                return False
+        return True
+
+    async def sync_plan(self, plan: Dict):
+        """Write a plan unless the plan cache shows it unchanged since it was last written.
+
+        Args:
+            plan (dict): Plan built by build_network_plan
+
+        Returns:
+            tuple: Counts as returned by write_plan, and whether the write was skipped
+        """
+        if self.plan_cache is None:
+            return await self.write_plan(plan), False
+
+        network_id = plan['network_id']
+        content_hash = self.plan_cache.plan_hash(plan, self._plan_settings())
+        cached = self.plan_cache.get(network_id)
+        if cached is not None and cached['content_hash'] == content_hash:
+            drift_check = self.plan_cache.needs_drift_check(cached)
+            if not drift_check or await self._cached_objects_exist(cached['object_ids']):
+                if drift_check:
+                    self.plan_cache.mark_verified(network_id)
+                # The skipped objects are still part of the desired state for reconciliation
+                for kind, ids in cached['object_ids'].items():
+                    self.netbox.seen_ids[kind].update(ids)
+                return {
+                    'vlans': len(plan['prefixes']),
+                    'dhcp_reservations': plan['dhcp_reservations'],
+                    'client_ips': plan['client_ips'],
+                }, True
+            print(f"  Objects of network {plan['network_name']} changed in NetBox, writing it again")
+
+        written_ids = {'prefixes': [], 'ip_addresses': []}
+        counts = await self.write_plan(plan, written_ids)
+        # Only a plan written in full may be skipped next time
+        if (len(written_ids['prefixes']) == len(plan['prefixes'])
+                and len(written_ids['ip_addresses']) == len(plan['ip_addresses'])):
+            self.plan_cache.put(network_id, content_hash, written_ids)
+        else:
+            self.plan_cache.invalidate(network_id)
+        return counts, False
+
+    async def _write_worker(self, plans_queue: asyncio.Queue):
+        """Stage 4: write plans to NetBox in batches."""
+        while True:
+            plan = await plans_queue.get()
+            try:
+                counts, skipped = await self.sync_plan(plan)
+                self.results['networks'] += 1
+                self.results['unchanged'] += skipped
+                for key, value in counts.items():
+                    self.results[key] += value
+                if skipped:
+                    print(f"  Network {plan['network_name']} unchanged since last sync, skipped writing")
+                else:
+                    print(f"  Synced network {plan['network_name']}: {counts['vlans']} VLANs, "
+                          f"{counts['dhcp_reservations']} DHCP reservations, {counts['client_ips']} client IPs")
+            except Exception as e:
+                print(f"  Error writing network {plan['network_name']}: {e}")
+                self.results['errors'] += 1
+                self._mark_incomplete(plan['network_id'])
+            finally:
+                plans_queue.task_done()
+
+    async def run(self, org_ids: Iterable[str] = (), networks: Optional[List[Dict]] = None) -> Dict[str, int]:
+        """Sync organizations or networks through the pipeline.
+
+        Args:
+            org_ids (iterable): Meraki organization IDs whose networks are synced
+            networks (list, optional): Networks ("id" and "name") to sync instead of whole organizations
+
+        Returns:
+            dict: Counts of networks, VLANs, DHCP reservations, client IPs, errors, failed IP
+                addresses and networks left unchanged
+        """
+        self.results = self._empty_results()
+        self.incomplete = self._empty_incomplete()
+        networks_queue = asyncio.Queue(self.queue_size)
+        fetched_queue = asyncio.Queue(self.queue_size)
+        plans_queue = asyncio.Queue(self.queue_size)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.fetch_workers + 1)
+        workers = (
+            [asyncio.ensure_future(self._fetch_worker(networks_queue, fetched_queue))
+             for _ in range(self.fetch_workers)]
+            + [asyncio.ensure_future(self._transform_worker(fetched_queue, plans_queue))]
+            + [asyncio.ensure_future(self._write_worker(plans_queue)) for _ in range(self.write_workers)]
+        )
+        try:
+            await self._enumerate(networks_queue, org_ids, networks)
+            # Each queue is drained only once everything upstream of it has finished
+            await networks_queue.join()
+            await fetched_queue.join()
+            await plans_queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._executor.shutdown(wait=False)
+
+        return self.results
@@ -0,0 +1,148 @@
+"""
+Sync Plan Module
+
+This module turns the raw Meraki data fetched for one network into the
+desired NetBox state: the prefixes (with their VLANs) and the IP addresses
+the sync should write. Building the plan is pure data transformation, so it
+can run in its own pipeline stage between fetching and writing, and the
+result is a plain JSON-serialisable dictionary.
+"""
+
+from typing import Dict, List, Optional
+
+from .dns_names import sanitize_dns_name
+from .prefix_registry import PrefixRegistry
+from .subnet_assign import assign_subnets
+
+
+def build_prefix_items(network_name: str, vlans: List[Dict]) -> List[Dict]:
+    """Build the desired prefixes of a network, one per VLAN with a subnet.
+
+    Args:
+        network_name (str): Meraki network name
+        vlans (list): List of VLAN dictionaries from the Meraki API
+
+    Returns:
+        list: Dictionaries with "prefix", "description", "vlan_id" and "vlan_name"
+    """
+    items = []
+    for vlan in vlans:
+        if 'subnet' not in vlan:
+            continue
+        description = f"Meraki VLAN {vlan['id']} - {vlan['name']}\nNetwork: {network_name}"
+        if 'applianceIp' in vlan:
+            description += f"\nGateway: {vlan['applianceIp']}"
+        items.append({
+            'prefix': vlan['subnet'],
+            'description': description,
+            'vlan_id': int(vlan['id']),
+            'vlan_name': vlan['name'],
+        })
+    return items
+
+
+def build_reservation_items(network_id: str, network_name: str, vlans: List[Dict],
+                            reservations: Dict, registry: PrefixRegistry) -> List[Dict]:
+    """Build the desired IP addresses of a network's DHCP reservations.
+
+    Args:
+        network_id (str): Meraki network ID
+        network_name (str): Meraki network name
+        vlans (list): List of VLAN dictionaries
+        reservations (dict): VLAN ID -> {MAC address: fixed IP assignment}
+        registry (PrefixRegistry): Registry holding the network's subnets
+
+    Returns:
+        list: IP address dictionaries
+    """
+    items = []
+    for vlan in vlans:
+        if 'id' not in vlan or 'subnet' not in vlan:
+            continue
+        entry = registry.get(network_id, vlan['subnet'])
+        if entry is None:
+            continue
+
+        for mac_address, assignment in reservations.get(str(vlan['id']), {}).items():
+            ip_address = assignment.get('ip')
+            if not ip_address:
+                continue
+            name = assignment.get('name', 'Unknown Device')
+            items.append({
+                'address': f"{ip_address}/{entry['prefixlen']}",
+                'description': f"DHCP Reservation - {name}\nNetwork: {network_name}\n"
+                               f"VLAN: {vlan['name']} ({vlan['id']})\nMAC: {mac_address}",
+                'dns_name': sanitize_dns_name(name),
+                'status': 'active',
+                'parent': vlan['subnet'],
+            })
+    return items
+
+
+def build_client_items(network_name: str, clients, registry: PrefixRegistry) -> List[Dict]:
+    """Build the desired IP addresses of a network's active clients.
+
+    Args:
+        network_name (str): Meraki network name
+        clients (ClientTable): The network's clients
+        registry (PrefixRegistry): Registry holding the network's subnets
+
+    Returns:
+        list: IP address dictionaries; clients outside every subnet are skipped
+    """
+    items = []
+    assignments, entries = assign_subnets(clients, registry)
+    for row, (_, ip_address, mac_address, description_name) in enumerate(clients):
+        if assignments[row] < 0:
+            continue
+        entry = entries[assignments[row]]
+        items.append({
+            'address': f"{ip_address}/{entry['prefixlen']}",
+            'description': f"Active Client - {description_name}\nNetwork: {network_name}\nMAC: {mac_address}",
+            'dns_name': sanitize_dns_name(description_name),
+            'status': 'active',
+            'parent': entry['subnet'],
+        })
+    return items
+
+
+def build_network_plan(network_id: str, network_name: str, vlans: List[Dict],
+                       reservations: Optional[Dict] = None, clients=None) -> Dict:
+    """Build the desired NetBox state of one Meraki network.
+
+    An address that is both reserved and seen as a client is planned once, with
+    the client description, matching the order the sequential sync writes them in.
+
+    Args:
+        network_id (str): Meraki network ID
+        network_name (str): Meraki network name
+        vlans (list): List of VLAN dictionaries
+        reservations (dict, optional): VLAN ID -> fixed IP assignments; None to skip reservations
+        clients (ClientTable, optional): The network's clients; None to skip client IPs
+
+    Returns:
+        dict: Plan with "network_id", "network_name", "prefixes" and "ip_addresses",
+            plus "dhcp_reservations" and "client_ips" counts
+    """
+    registry = PrefixRegistry()
+    registry.register_network(network_id, vlans)
+
+    reservation_items = []
+    if reservations is not None:
+        reservation_items = build_reservation_items(network_id, network_name, vlans, reservations, registry)
+    client_items = []
+    if clients is not None:
+        client_items = build_client_items(network_name, clients, registry)
+
+    ip_addresses = {}
+    for item in reservation_items + client_items:
+        ip_addresses[item['address'].split('/')[0]] = item
+
+    return {
+        'network_id': network_id,
+        'network_name': network_name,
+        'prefixes': build_prefix_items(network_name, vlans),
+        'ip_addresses': list(ip_addresses.values()),
+        'dhcp_reservations': len(reservation_items),
+        'client_ips': len(client_items),
+    }
@@ -0,0 +1,159 @@
+"""
+Prefix Registry Module
+
+This module keeps an organization-wide registry of Meraki VLAN subnets.
+Meraki sites often reuse the same RFC1918 subnets, so entries are keyed by
+(network ID, subnet) and IP lookups are always resolved within a single
+network using longest-prefix match.
+"""
+
+import ipaddress
+from typing import Dict, List, Optional
+
+
+class PrefixRegistry:
+    """Registry of Meraki subnets keyed by (network ID, subnet)."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        # (network_id, subnet) -> entry
+        self._entries = {}
+
+        # network_id -> {(ip version, prefix length): {network address as int: entry}}
+        self._tables = {}
+
+        # network_id -> {ip version: prefix lengths present, longest first}
+        self._lengths = {}
+
+        # network_id -> subnets registered for it
+        self._subnets = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, network_id):
+        return network_id in self._tables
+
+    def register_network(self, network_id: str, vlans: List[Dict], vrf=None):
+        """Register every VLAN subnet of a Meraki network.
+
+        Registering a network again replaces its previous subnets.
+
+        Args:
+            network_id (str): Meraki network ID
+            vlans (list): List of VLAN dictionaries from the Meraki API
+            vrf (optional): NetBox VRF record the network's prefixes live in
+        """
+        self.remove_network(network_id)
+        tables = {}
+        subnets = []
+
+        for vlan in vlans:
+            if 'subnet' not in vlan:
+                continue
+            try:
+                network = ipaddress.ip_network(vlan['subnet'], strict=False)
+            except (ipaddress.AddressValueError, ValueError):
+                continue
+
+            entry = {
+                'network_id': network_id,
+                'subnet': vlan['subnet'],
+                'prefixlen': network.prefixlen,
+                'vlan': vlan,
+                'vrf': vrf,
+            }
+            self._entries[(network_id, vlan['subnet'])] = entry
+            subnets.append(vlan['subnet'])
+            tables.setdefault((network.version, network.prefixlen), {})[int(network.network_address)] = entry
+
+        lengths = {}
+        for version, prefixlen in tables:
+            lengths.setdefault(version, []).append(prefixlen)
+        for version in lengths:
+            lengths[version].sort(reverse=True)
+
+        self._tables[network_id] = tables
+        self._lengths[network_id] = lengths
+        self._subnets[network_id] = subnets
+
+    def remove_network(self, network_id: str):
+        """Forget every subnet registered for a network.
+
+        Args:
+            network_id (str): Meraki network ID
+        """
+        for subnet in self._subnets.pop(network_id, ()):
+            self._entries.pop((network_id, subnet), None)
+        self._tables.pop(network_id, None)
+        self._lengths.pop(network_id, None)
+
+    def get(self, network_id: str, subnet: str) -> Optional[Dict]:
+        """Get the entry for an exact (network, subnet) pair.
+
+        Args:
+            network_id (str): Meraki network ID
+            subnet (str): The subnet in CIDR notation
+
+        Returns:
+            dict: Registry entry, or None if not registered
+        """
+        return self._entries.get((network_id, subnet))
+
+    def subnets(self, network_id: str, version: int = 4):
+        """Iterate over a network's registered subnets of one IP version.
+
+        Args:
+            network_id (str): Meraki network ID
+            version (int): IP version (4 or 6)
+
+        Yields:
+            tuple: (prefix length, network address as int, registry entry)
+        """
+        for (table_version, prefixlen), table in self._tables.get(network_id, {}).items():
+            if table_version != version:
+                continue
+            for network_int, entry in table.items():
+                yield prefixlen, network_int, entry
+
+    def lookup_int(self, network_id: str, ip_int: int, version: int = 4) -> Optional[Dict]:
+        """Find the most specific subnet of a network containing an integer IP.
+
+        Runs one dictionary lookup per distinct prefix length in the network,
+        so the cost does not grow with the number of registered subnets.
+
+        Args:
+            network_id (str): Meraki network ID
+            ip_int (int): The IP address as an integer
+            version (int): IP version of the address (4 or 6)
+
+        Returns:
+            dict: Registry entry, or None if no subnet contains the IP
+        """
+        tables = self._tables.get(network_id)
+        if not tables:
+            return None
+
+        max_bits = 32 if version == 4 else 128
+        for prefixlen in self._lengths[network_id].get(version, ()):
+            mask = ((1 << prefixlen) - 1) << (max_bits - prefixlen)
+            entry = tables[(version, prefixlen)].get(ip_int & mask)
+            if entry is not None:
+                return entry
+        return None
+
+    def lookup(self, network_id: str, ip_address: str) -> Optional[Dict]:
+        """Find the most specific subnet of a network containing an IP address.
+
+        Args:
+            network_id (str): Meraki network ID
+            ip_address (str): The IP address to check
+
+        Returns:
+            dict: Registry entry, or None if no subnet contains the IP
+        """
+        try:
+            ip = ipaddress.ip_address(ip_address)
+        except (ipaddress.AddressValueError, ValueError):
+            return None
+        return self.lookup_int(network_id, int(ip), ip.version)
@@ -0,0 +1,50 @@
+"""
+Sync Priorities Module
+
+Everything that starts syncs shares three priority classes:
+
+    interactive (webhooks, manual triggers) > targeted (one network or
+    organization) > scheduled (full syncs)
+
+Syncs of a lower class wait between networks while syncs of a higher class
+are waiting or running. This module has no asyncio dependency, so the
+blocking command line sync can use it without slowing its startup.
+"""
+
+import time
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_TARGETED = 1
+PRIORITY_SCHEDULED = 2
+
+# Priority classes by their command line name
+PRIORITIES = {
+    'interactive': PRIORITY_INTERACTIVE,
+    'targeted': PRIORITY_TARGETED,
+    'scheduled': PRIORITY_SCHEDULED,
+}
+PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+# Default seconds between contention checks while a sync yields
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def wait_for_turn(busy, priority, poll_interval=DEFAULT_POLL_INTERVAL, heartbeat=None):
+    """Blocking yield point: wait while syncs of a higher class are waiting or running.
+
+    Args:
+        busy (callable): Takes a priority and tells whether higher-priority syncs are active
+        priority (int): Priority class of the calling sync
+        poll_interval (float): Seconds between checks
+        heartbeat (callable, optional): Called on every check, e.g. to keep a registry entry alive
+
+    Returns:
+        float: Seconds spent waiting
+    """
+    start = time.monotonic()
+    while True:
+        if heartbeat is not None:
+            heartbeat()
+        if not busy(priority):
+            return time.monotonic() - start
+        time.sleep(poll_interval)
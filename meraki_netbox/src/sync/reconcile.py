@@ -0,0 +1,228 @@
+"""
+Stale Object Reconciliation Module
+
+This module removes NetBox objects owned by the sync that are no longer
+present in Meraki. Objects are recognised by the ownership tag the
+NetBoxClient applies, and are only removed once they have been missing
+from the desired state for longer than a grace period.
+
+The missing-since timestamps live in a JSON state file, so the state
+directory must persist between runs (e.g. be cached in CI) for the grace
+period to ever elapse. Objects of networks that were not fully synced in a
+run (errors, truncated client lists) are protected from reconciliation.
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional, Set
+
+
+# Object kinds the reconciler manages, in the order they are cleaned up
+# (IP addresses first so prefixes are never removed while still populated)
+RECONCILED_KINDS = ("ip_addresses", "prefixes")
+
+# Singular labels used in the reconciliation report
+KIND_LABELS = {"ip_addresses": "IP address", "prefixes": "prefix"}
+
+# Default number of hours an object may be missing before it is removed
+DEFAULT_GRACE_HOURS = 24
+
+# Prefix of the per-network VRF names the NetBox clients create
+NETWORK_VRF_PREFIX = "meraki-"
+
+
+def network_of(record) -> Optional[str]:
+    """Get the Meraki network an owned record belongs to, from its per-network VRF.
+
+    Args:
+        record: NetBox prefix or IP address record
+
+    Returns:
+        str: Lowercased Meraki network ID, or None if the record is not in a per-network VRF
+    """
+    vrf = getattr(record, "vrf", None)
+    name = getattr(vrf, "name", None)
+    if isinstance(name, str) and name.startswith(NETWORK_VRF_PREFIX):
+        return name[len(NETWORK_VRF_PREFIX):].lower()
+    return None
+
+
+class Reconciler:
+    """Finds and removes owned NetBox objects that vanished from Meraki."""
+
+    def __init__(self, netbox_client, state_path: str, grace_hours: float = DEFAULT_GRACE_HOURS,
+                 action: str = "delete"):
+        """Initialize the reconciler.
+
+        Args:
+            netbox_client: Initialized NetBoxClient instance used for the sync run
+            state_path (str): Path of the JSON file tracking when objects went missing
+            grace_hours (float): Hours an object may be missing before it is removed
+            action (str): "delete" to remove stale objects, "deprecate" to mark them deprecated
+
+        Raises:
+            ValueError: If the action is not supported.
+        """
+        if action not in ("delete", "deprecate"):
+            raise ValueError(f"Unsupported reconciliation action: {action}")
+
+        self.netbox = netbox_client
+        self.state_path = state_path
+        self.grace_seconds = grace_hours * 3600
+        self.action = action
+
+    def _load_state(self) -> Dict[str, Dict[str, float]]:
+        """Load the missing-since timestamps recorded by previous runs."""
+        state = {kind: {} for kind in RECONCILED_KINDS}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as state_file:
+                stored = json.load(state_file)
+            for kind in RECONCILED_KINDS:
+                state[kind].update(stored.get(kind, {}))
+        return state
+
+    def _save_state(self, state: Dict[str, Dict[str, float]]):
+        """Persist the missing-since timestamps for the next run."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as state_file:
+            json.dump(state, state_file)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def _describe(kind: str, record) -> str:
+        """Build a short human readable label for a NetBox record."""
+        if kind == "prefixes":
+            return str(getattr(record, "prefix", record.id))
+        return str(getattr(record, "address", record.id))
+
+    @staticmethod
+    def _is_deprecated(record) -> bool:
+        """Check whether a record already carries the deprecated status."""
+        status = getattr(record, "status", None)
+        return getattr(status, "value", status) == "deprecated"
+
+    @staticmethod
+    def _is_protected(record, incomplete) -> bool:
+        """Check whether a record may belong to a network that was not fully synced.
+
+        None in the incomplete set stands for networks that could not even be listed,
+        which protects every record. Records that can't be attributed to a network
+        are protected whenever any network was incomplete.
+        """
+        if not incomplete:
+            return False
+        network_id = network_of(record)
+        return None in incomplete or network_id is None or network_id in incomplete
+
+    def plan(self, kinds=RECONCILED_KINDS, now: Optional[float] = None,
+             incomplete: Optional[Dict[str, Set]] = None) -> Dict[str, Dict[str, List]]:
+        """Work out which owned objects are stale without changing anything.
+
+        Args:
+            kinds (tuple): Object kinds that were synced in this run
+            now (float, optional): Current UNIX timestamp, mainly for testing
+            incomplete (dict, optional): Per kind, Meraki network IDs whose objects were not
+                fully synced in this run; None in a set means networks could not be listed
+
+        Returns:
+            dict: Per kind, the "stale" records past the grace period, the "pending"
+                records still inside it, the "protected" records of incomplete networks
+                and the updated missing-since "state"
+        """
+        now = time.time() if now is None else now
+        previous = self._load_state()
+        incomplete = incomplete or {}
+        report = {}
+
+        for kind in kinds:
+            seen = self.netbox.seen_ids[kind]
+            protected_networks = {
+                network_id.lower() if network_id else network_id for network_id in incomplete.get(kind, ())
+            }
+            missing_since = {}
+            stale = []
+            pending = []
+            protected = []
+
+            for record in self.netbox.get_owned_objects(kind):
+                if record.id in seen:
+                    continue
+                if self._is_protected(record, protected_networks):
+                    # Not seen, but possibly only because its network failed; don't start aging it
+                    if str(record.id) in previous[kind]:
+                        missing_since[str(record.id)] = previous[kind][str(record.id)]
+                    protected.append(record)
+                    continue
+                first_missing = previous[kind].get(str(record.id), now)
+                missing_since[str(record.id)] = first_missing
+                if now - first_missing >= self.grace_seconds:
+                    if self.action == "deprecate" and self._is_deprecated(record):
+                        continue
+                    stale.append(record)
+                else:
+                    pending.append(record)
+
+            report[kind] = {"stale": stale, "pending": pending, "protected": protected, "state": missing_since}
+
+        return report
+
+    def reconcile(self, dry_run: bool = False, kinds=RECONCILED_KINDS, now: Optional[float] = None,
+                  incomplete: Optional[Dict[str, Set]] = None) -> Dict[str, Dict[str, int]]:
+        """Remove or deprecate owned objects that have been missing past the grace period.
+
+        Only kinds that were synced in this run may be passed in, otherwise every
+        object of a skipped kind would look like it vanished from Meraki. Networks
+        that were only partly synced must be listed in incomplete for the same reason.
+
+        Args:
+            dry_run (bool): Only report what would change
+            kinds (tuple): Object kinds that were synced in this run
+            now (float, optional): Current UNIX timestamp, mainly for testing
+            incomplete (dict, optional): Per kind, Meraki network IDs whose objects were not
+                fully synced in this run
+
+        Returns:
+            dict: Per kind counts of "stale", "pending", "protected" and "removed" objects
+        """
+        if not os.path.exists(self.state_path):
+            print(f"    No reconciliation state at {self.state_path}: grace periods start now. "
+                  f"Keep the state directory between runs or nothing is ever reconciled.")
+        report = self.plan(kinds=kinds, now=now, incomplete=incomplete)
+        results = {}
+        new_state = self._load_state()
+
+        for kind in kinds:
+            stale = report[kind]["stale"]
+            pending = report[kind]["pending"]
+            new_state[kind] = report[kind]["state"]
+            removed = 0
+
+            verb = "Would delete" if self.action == "delete" else "Would deprecate"
+            if not dry_run:
+                verb = "Deleting" if self.action == "delete" else "Deprecating"
+            for record in stale:
+                print(f"    {verb} stale {KIND_LABELS[kind]}: {self._describe(kind, record)}")
+
+            if stale and not dry_run:
+                try:
+                    stale_ids = [record.id for record in stale]
+                    if self.action == "delete":
+                        removed = self.netbox.bulk_delete(kind, stale_ids)
+                        for object_id in stale_ids:
+                            new_state[kind].pop(str(object_id), None)
+                    else:
+                        removed = self.netbox.bulk_update(
+                            kind, [{"id": object_id, "status": "deprecated"} for object_id in stale_ids]
+                        )
+                except Exception as e:
+                    print(f"    Error reconciling {kind}: {e}")
+
+            results[kind] = {"stale": len(stale), "pending": len(pending),
+                             "protected": len(report[kind]["protected"]), "removed": removed}
+
+        if not dry_run:
+            self._save_state(new_state)
+
+        return results
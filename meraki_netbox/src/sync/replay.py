@@ -0,0 +1,108 @@
+"""
+Dead-Letter Replay Module
+
+This module re-applies the operations kept in a DeadLetterStore without a
+full sync run. Failed prefixes are written again one by one, DHCP
+reservations whose Meraki fetch failed are fetched again, and every IP
+address is written in bulk through the pipeline's throttled writer.
+Entries that succeed are dropped from the store; entries that fail again
+stay in it with their attempt count increased.
+"""
+
+import asyncio
+from typing import Dict
+
+from .pipeline import SyncPipeline
+from .plan import build_reservation_items
+from .prefix_registry import PrefixRegistry
+
+
+async def replay_dead_letters(dead_letters, netbox, meraki=None) -> Dict[str, int]:
+    """Re-apply every stored failed operation.
+
+    Args:
+        dead_letters (DeadLetterStore): Store holding the failed operations
+        netbox: Initialized AsyncNetBoxClient instance
+        meraki (MerakiClient, optional): Needed to replay failed DHCP reservation fetches
+
+    Returns:
+        dict: Counts of "replayed" and still "failed" entries
+    """
+    counts = {'replayed': 0, 'failed': 0}
+    pipeline = SyncPipeline(meraki, netbox, dead_letters=dead_letters)
+
+    for entry in dead_letters.entries('prefix'):
+        item = entry['payload']
+        try:
+            scope = await netbox.get_network_scope(item['network_id'], item['network_name'])
+            await netbox.create_or_update_prefix(
+                prefix=item['prefix'],
+                description=item['description'],
+                vlan_id=item['vlan_id'],
+                vlan_name=item['vlan_name'],
+                vlan_group=scope['vlan_group'],
+                vrf=scope['vrf']
+            )
+        except Exception as e:
+            print(f"    Error replaying prefix {item['prefix']}: {e}")
+            dead_letters.add('prefix', entry['key'], item, e)
+            counts['failed'] += 1
+            continue
+        dead_letters.discard('prefix', entry['key'])
+        counts['replayed'] += 1
+
+    # Group IP addresses by network, so each network's VRF is resolved once
+    ip_items = {}
+    for entry in dead_letters.entries('ip_address'):
+        ip_items.setdefault(entry['payload']['network_id'], []).append(entry['payload'])
+
+    for entry in dead_letters.entries('dhcp_reservations'):
+        payload = entry['payload']
+        if meraki is None:
+            print(f"    Skipping DHCP reservations of VLAN {payload['vlan']['id']}: no Meraki client")
+            continue
+        vlan = payload['vlan']
+        try:
+            loop = asyncio.get_event_loop()
+            reservations = await loop.run_in_executor(
+                None, meraki.get_dhcp_reservations, payload['network_id'], vlan['id']
+            )
+        except Exception as e:
+            print(f"    Error replaying DHCP reservations for VLAN {vlan['id']}: {e}")
+            dead_letters.add('dhcp_reservations', entry['key'], payload, e)
+            counts['failed'] += 1
+            continue
+
+        registry = PrefixRegistry()
+        registry.register_network(payload['network_id'], [vlan])
+        for item in build_reservation_items(payload['network_id'], payload['network_name'], [vlan],
+                                            {str(vlan['id']): reservations}, registry):
+            ip_items.setdefault(payload['network_id'], []).append(
+                dict(item, network_id=payload['network_id'], network_name=payload['network_name'])
+            )
+        dead_letters.discard('dhcp_reservations', entry['key'])
+        counts['replayed'] += 1
+
+    for network_id, items in ip_items.items():
+        try:
+            scope = await netbox.get_network_scope(network_id, items[0]['network_name'])
+        except Exception as e:
+            print(f"    Error replaying IP addresses of network {network_id}: {e}")
+            counts['failed'] += len(items)
+            continue
+        vrf_id = scope['vrf']['id'] if scope['vrf'] else None
+
+        failed = await pipeline.write_ip_addresses([dict(item, vrf=vrf_id) for item in items])
+        failed_addresses = {item['address'] for item, _ in failed}
+        for item in items:
+            key = f"{network_id}:{item['address'].split('/')[0]}"
+            if item['address'] in failed_addresses:
+                counts['failed'] += 1
+            else:
+                dead_letters.discard('ip_address', key)
+                counts['replayed'] += 1
+        for item, error in failed:
+            payload = {field: value for field, value in item.items() if field != 'vrf'}
+            dead_letters.add('ip_address', f"{network_id}:{item['address'].split('/')[0]}", payload, error)
+
+    return counts
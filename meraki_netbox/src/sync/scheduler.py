@@ -0,0 +1,218 @@
+"""
+Sync Scheduler Module
+
+SyncScheduler runs sync jobs in one process in the priority classes of the
+priorities module. Long jobs call a yield point between networks, where
+they wait while any job of a higher class is queued or running, in this
+process or, through a contention check such as SyncRegistry.busy, in
+another one. A webhook sync of one network therefore never waits behind
+more than the network a full sync is currently on.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+
+from .priorities import DEFAULT_POLL_INTERVAL
+
+# Slot bookkeeping of the scheduler job running in the current task, if any
+_current_slot = contextvars.ContextVar('sync_scheduler_slot', default=None)
+
+
+class SyncScheduler:
+    """Runs queued sync jobs in priority order, one job per key at a time.
+
+    At most `workers` jobs hold a slot at once. A job waiting in yield_point for
+    more urgent work gives its slot up, so that work can start even when every
+    slot is taken by long, lower-priority jobs.
+    """
+
+    def __init__(self, workers=1, maxsize=None, contention=None, poll_interval=DEFAULT_POLL_INTERVAL):
+        """Initialize the scheduler.
+
+        Args:
+            workers (int): Jobs run concurrently
+            maxsize (int, optional): Jobs allowed to wait at once (default: unlimited)
+            contention (callable, optional): Takes a priority and tells whether higher-priority
+                syncs are active in other processes; consulted by yield_point
+            poll_interval (float): Seconds between contention checks while yielding
+        """
+        self.workers = workers
+        self.maxsize = maxsize
+        self.contention = contention
+        self.poll_interval = poll_interval
+
+        # key -> (priority, job) of waiting jobs; the heap may hold stale entries for re-prioritised keys
+        self._queued = {}
+        self._heap = []
+        self._counter = itertools.count()
+        # key -> priority of running jobs, and the number of those holding a slot
+        self._running = {}
+        self._active = 0
+        self._changed = None
+        self._dispatcher = None
+        self._jobs = set()
+
+    def __len__(self):
+        return len(self._queued)
+
+    def start(self):
+        """Start dispatching jobs; safe to call more than once."""
+        if self._dispatcher is not None:
+            return
+        self._changed = asyncio.Condition()
+        self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def stop(self):
+        """Cancel running jobs, dropping jobs that have not started.
+
+        Returns:
+            list: Keys of the jobs dropped
+        """
+        tasks = [task for task in [self._dispatcher] + list(self._jobs) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
+        self._jobs.clear()
+        dropped = list(self._queued)
+        self._queued.clear()
+        self._heap = []
+        self._running.clear()
+        self._active = 0
+        return dropped
+
+    def is_queued(self, key):
+        return key in self._queued
+
+    def full(self):
+        return self.maxsize is not None and len(self._queued) >= self.maxsize
+
+    def submit(self, key, priority, job):
+        """Queue a job, or raise the priority of the same key's waiting job.
+
+        Args:
+            key: Identity of the job, e.g. ("network", "<id>")
+            priority (int): One of the PRIORITY_* classes; lower runs first
+            job (callable): Coroutine function without arguments doing the work
+
+        Returns:
+            str: "queued", "pending" if the key was already waiting, or "full"
+        """
+        self.start()
+        if key in self._queued:
+            queued_priority, queued_job = self._queued[key]
+            if priority < queued_priority:
+                self._push(key, priority, queued_job)
+            return 'pending'
+        if self.full():
+            return 'full'
+        self._push(key, priority, job)
+        return 'queued'
+
+    def _push(self, key, priority, job):
+        self._queued[key] = (priority, job)
+        heapq.heappush(self._heap, (priority, next(self._counter), key))
+        # Waking the dispatcher needs the condition's lock, which submit (a plain function) can't await
+        asyncio.ensure_future(self._notify())
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _pop_ready(self):
+        """Take the highest-priority waiting job whose key is not already running."""
+        deferred = []
+        found = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            priority, _, key = entry
+            if key not in self._queued or self._queued[key][0] != priority:
+                continue
+            if key in self._running:
+                deferred.append(entry)
+                continue
+            found = (key, priority, self._queued.pop(key)[1])
+            break
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+        return found
+
+    def busy(self, priority):
+        """Tell whether a job of a higher class than priority is waiting or running in this process."""
+        return (any(queued < priority for queued, _ in self._queued.values())
+                or any(running < priority for running in self._running.values()))
+
+    async def yield_point(self, priority):
+        """Wait while jobs of a higher class than priority are active here or elsewhere.
+
+        Long jobs call this between networks.
+
+        Args:
+            priority (int): Priority class of the calling job
+        """
+        slot = _current_slot.get()
+        released = False
+        loop = asyncio.get_event_loop()
+        try:
+            while True:
+                if self.busy(priority):
+                    async with self._changed:
+                        if slot is not None and slot['held'] and not released:
+                            self._active -= 1
+                            slot['held'] = False
+                            released = True
+                            self._changed.notify_all()
+                        try:
+                            await asyncio.wait_for(self._changed.wait(), self.poll_interval)
+                        except asyncio.TimeoutError:
+                            pass
+                    continue
+                if self.contention is not None and await loop.run_in_executor(None, self.contention, priority):
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                return
+        finally:
+            if released:
+                async with self._changed:
+                    while self._active >= self.workers:
+                        await self._changed.wait()
+                    self._active += 1
+                    slot['held'] = True
+
+    async def join(self):
+        """Wait until no job is waiting or running."""
+        async with self._changed:
+            while self._queued or self._running:
+                await self._changed.wait()
+
+    async def _dispatch(self):
+        while True:
+            async with self._changed:
+                ready = None
+                while ready is None:
+                    if self._active < self.workers:
+                        ready = self._pop_ready()
+                    if ready is None:
+                        await self._changed.wait()
+                key, priority, job = ready
+                self._running[key] = priority
+                self._active += 1
+            task = asyncio.ensure_future(self._run_job(key, job))
+            self._jobs.add(task)
+            task.add_done_callback(self._jobs.discard)
+
+    async def _run_job(self, key, job):
+        slot = {'held': True}
+        _current_slot.set(slot)
+        try:
+            await job()
+        except Exception as e:
+            print(f"  Error running sync {key}: {e}")
+        finally:
+            async with self._changed:
+                self._running.pop(key, None)
+                if slot['held']:
+                    self._active -= 1
+                self._changed.notify_all()
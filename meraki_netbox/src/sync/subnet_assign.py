@@ -0,0 +1,112 @@
+"""
+Bulk Subnet Assignment Module
+
+This module assigns every row of a ClientTable to the most specific
+registered subnet of its network in one pass. With NumPy installed the
+match runs as vectorised searchsorted operations, one per distinct prefix
+length; without NumPy it falls back to per-row registry lookups.
+"""
+
+from array import array
+from typing import List, Optional, Tuple
+
+# Below this many rows the pure Python path is faster than importing and using NumPy
+NUMPY_MIN_ROWS = 1000
+
+# NumPy is optional and slow to import, so it is only loaded on the first large assignment
+_numpy = None
+_numpy_checked = False
+
+
+def get_numpy():
+    """Import NumPy on first use.
+
+    Returns:
+        module: The numpy module, or None if it is not installed
+    """
+    global _numpy, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:  # NumPy is optional, the pure Python path is used instead
+            _numpy = None
+        _numpy_checked = True
+    return _numpy
+
+
+def _assign_python(table, registry) -> Tuple[array, List]:
+    """Assign rows one at a time through the registry."""
+    entries = []
+    entry_index = {}
+    assignments = array('i', [-1]) * len(table)
+
+    for row, (ip_int, code) in enumerate(zip(table.ips, table.network_codes)):
+        entry = registry.lookup_int(table.network_ids[code], ip_int, 4)
+        if entry is not None:
+            index = entry_index.get(id(entry))
+            if index is None:
+                index = entry_index[id(entry)] = len(entries)
+                entries.append(entry)
+            assignments[row] = index
+
+    return assignments, entries
+
+
+def _assign_numpy(table, registry):
+    """Assign all rows with vectorised longest-prefix matching."""
+    np = get_numpy()
+    entries = []
+    by_length = {}
+
+    # Key every subnet as (network code << 32) | network address, grouped by prefix length
+    for code, network_id in enumerate(table.network_ids):
+        for prefixlen, network_int, entry in registry.subnets(network_id, 4):
+            by_length.setdefault(prefixlen, []).append(((code << 32) | network_int, len(entries)))
+            entries.append(entry)
+
+    count = len(table)
+    assignments = np.full(count, -1, dtype=np.int64)
+    if not count or not entries:
+        return assignments, entries
+
+    ips = np.frombuffer(table.ips, dtype=np.uint32).astype(np.uint64)
+    network_keys = np.frombuffer(table.network_codes, dtype=np.uint32).astype(np.uint64) << np.uint64(32)
+
+    for prefixlen in sorted(by_length, reverse=True):
+        pairs = sorted(by_length[prefixlen])
+        keys = np.array([key for key, _ in pairs], dtype=np.uint64)
+        indexes = np.array([index for _, index in pairs], dtype=np.int64)
+
+        mask = np.uint64(((1 << prefixlen) - 1) << (32 - prefixlen))
+        candidates = network_keys | (ips & mask)
+
+        positions = np.searchsorted(keys, candidates)
+        positions[positions == len(keys)] = 0
+        matched = (keys[positions] == candidates) & (assignments < 0)
+        assignments[matched] = indexes[positions[matched]]
+
+    return assignments, entries
+
+
+def assign_subnets(table, registry, use_numpy: Optional[bool] = None):
+    """Assign every client row to the most specific subnet of its network.
+
+    Args:
+        table (ClientTable): Clients to assign, possibly from many networks
+        registry (PrefixRegistry): Registry holding the networks' subnets
+        use_numpy (bool, optional): Force or disable the NumPy path (default: use it if
+            installed and the table has at least NUMPY_MIN_ROWS rows)
+
+    Returns:
+        tuple: (assignments, entries) where assignments[row] is an index into
+            entries, or -1 when no subnet of the row's network contains the IP
+    """
+    if use_numpy is None:
+        use_numpy = len(table) >= NUMPY_MIN_ROWS and get_numpy() is not None
+    if use_numpy and get_numpy() is None:
+        raise ImportError("NumPy is not installed")
+
+    if use_numpy:
+        return _assign_numpy(table, registry)
+    return _assign_python(table, registry)
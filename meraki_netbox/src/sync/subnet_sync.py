@@ -1,22 +1,34 @@
+from .plan import build_prefix_items
+
+
 class SubnetSynchronizer:
     """Synchronizes Meraki subnets to NetBox prefixes."""
     
-    def __init__(self, meraki_client, netbox_client):
+    def __init__(self, meraki_client, netbox_client, dead_letters=None, yield_point=None):
         """Initialize the synchronizer.
         
         Args:
             meraki_client: Initialized MerakiClient instance
             netbox_client: Initialized NetBoxClient instance
+            dead_letters (DeadLetterStore, optional): Store that keeps failed operations for replay
+            yield_point (callable, optional): Called before each network of an organization,
+                to wait while more urgent syncs run
         """
         self.meraki = meraki_client
         self.netbox = netbox_client
+        self.dead_letters = dead_letters
+        self.yield_point = yield_point
+
+        # Networks whose prefixes were not fully synced, which reconciliation must leave alone
+        self.incomplete_networks = set()
     
-    def sync_vlan(self, vlan_data, network_name):
+    def sync_vlan(self, vlan_data, network_name, network_id=None):
         """Synchronize a single VLAN to NetBox.
 
         Args:
             vlan_data (dict): VLAN data from Meraki API
             network_name (str): Name of the network this VLAN belongs to
+            network_id (str, optional): Meraki network ID, used to scope the VLAN and prefix
         """
         # Skip if no subnet is defined
         if "subnet" not in vlan_data:
@@ -31,12 +43,19 @@ class SubnetSynchronizer:
         if "applianceIp" in vlan_data:
             description += f"\nGateway: {vlan_data['applianceIp']}"
 
+        # Scope the VLAN and prefix to the Meraki network so reused VLAN IDs don't collide
+        scope = {"vlan_group": None, "vrf": None}
+        if network_id:
+            scope = self.netbox.get_network_scope(network_id, network_name)
+
         # Create or update the prefix in NetBox (this will also create the VLAN if needed)
         self.netbox.create_or_update_prefix(
             prefix=subnet,
             description=description,
             vlan_id=int(vlan_id),
-            vlan_name=vlan_name
+            vlan_name=vlan_name,
+            vlan_group=scope["vlan_group"],
+            vrf=scope["vrf"]
         )
 
     def sync_network(self, network_id, network_name):
@@ -54,10 +73,18 @@ class SubnetSynchronizer:
             vlans_synced = 0
             for vlan in vlans:
                 try:
-                    self.sync_vlan(vlan, network_name)
+                    self.sync_vlan(vlan, network_name, network_id)
                     vlans_synced += 1
+                    if self.dead_letters is not None and "subnet" in vlan:
+                        self.dead_letters.discard("prefix", f"{network_id}:{vlan['subnet']}")
                 except Exception as vlan_error:
                     print(f"    Error syncing VLAN {vlan.get('id', 'unknown')} in network {network_name}: {vlan_error}")
+                    self.incomplete_networks.add(network_id)
+                    if self.dead_letters is not None and "subnet" in vlan:
+                        for item in build_prefix_items(network_name, [vlan]):
+                            self.dead_letters.add("prefix", f"{network_id}:{item['prefix']}", dict(
+                                item, network_id=network_id, network_name=network_name
+                            ), vlan_error)
 
             return vlans_synced
         except Exception as e:
@@ -69,6 +96,7 @@ class SubnetSynchronizer:
                 print(f"  Skipping network {network_name}: Not an MX network (VLANs not supported)")
             else:
                 print(f"  Error syncing network {network_name}: {e}")
+                self.incomplete_networks.add(network_id)
             return 0
 
     def sync_organization(self, org_id):
@@ -85,6 +113,8 @@ class SubnetSynchronizer:
             network_id = network["id"]
             network_name = network["name"]
 
+            if self.yield_point is not None:
+                self.yield_point()
             print(f"  Syncing network: {network_name}")
             vlans_synced = self.sync_network(network_id, network_name)
             total_vlans += vlans_synced
@@ -5,22 +5,443 @@ Synchronize Meraki networks to NetBox.
 import argparse
 import os
 import sys
-from dotenv import load_dotenv
+import time
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.clients.meraki_client import MerakiClient
+from src.clients.meraki_client import MerakiClient, SDK_PROFILES
 from src.clients.netbox_client import NetBoxClient
+from src.sync.change_log import ChangeLogTracker, DEFAULT_CLIENT_INTERVAL
 from src.sync.subnet_sync import SubnetSynchronizer
 from src.sync.ip_sync import IPSynchronizer
-from src.sync.ip_sync import IPSynchronizer
+from src.sync.priorities import PRIORITIES, wait_for_turn
+from src.sync.reconcile import Reconciler, DEFAULT_GRACE_HOURS
+from src.utils.config import get_logs_dir, get_state_dir, load_config
+from src.utils.cursors import CursorStore
+from src.utils.dead_letters import DeadLetterStore
+from src.utils.inventory_cache import InventoryCache
+from src.utils.plan_cache import PlanCache
+from src.utils.sync_registry import SyncRegistry, default_owner
+
+def run_reconciliation(netbox_client, args, incomplete=None):
+    """Remove or deprecate owned NetBox objects that were not seen in this run.
+
+    Args:
+        netbox_client: The NetBoxClient used for the sync run
+        args: Parsed command line arguments
+        incomplete (dict, optional): Per kind, networks that were not fully synced and
+            whose objects must be left alone
+    """
+    reconciler = Reconciler(
+        netbox_client,
+        state_path=os.path.join(get_state_dir(), 'reconcile_state.json'),
+        grace_hours=args.grace_hours,
+        action=args.reconcile_action
+    )
+
+    # IP addresses are only reconciled when every IP source was synced in this run
+    kinds = ('prefixes',)
+    if args.sync_ips and args.sync_clients and args.sync_reservations:
+        kinds = ('ip_addresses', 'prefixes')
+
+    print(f"\nReconciling stale objects{' (dry run)' if args.dry_run else ''}...")
+    results = reconciler.reconcile(dry_run=args.dry_run, kinds=kinds, incomplete=incomplete)
+    for kind, counts in results.items():
+        print(f"  {kind}: {counts['stale']} stale, {counts['pending']} within grace period, "
+              f"{counts['protected']} kept for incompletely synced networks, "
+              f"{counts['removed']} {args.reconcile_action}d")
+
+def find_network_name(meraki_client, network_id):
+    """Look up the name of a network across all organizations.
+
+    Args:
+        meraki_client: The MerakiClient used for the sync run
+        network_id (str): Meraki network ID
+
+    Returns:
+        str: The network name, or "Unknown Network" if it is not found
+    """
+    for org in meraki_client.get_organizations():
+        for network in meraki_client.get_networks(org["id"]):
+            if network["id"] == network_id:
+                return network["name"]
+    return "Unknown Network"
+
+def run_replay(meraki_client, dead_letters, cassette=None):
+    """Re-apply the operations that failed in earlier runs.
+
+    Args:
+        meraki_client: The MerakiClient, used to fetch failed DHCP reservations again
+        dead_letters: The DeadLetterStore holding the failed operations
+        cassette (Cassette, optional): Cassette NetBox requests are recorded to or replayed from
+    """
+    # asyncio and aiohttp are only needed for the replay, so they are not imported at startup
+    import asyncio
+    from src.clients.async_netbox_client import AsyncNetBoxClient
+    from src.sync.replay import replay_dead_letters
+
+    print(f"Replaying {len(dead_letters)} failed operations...")
+
+    async def run():
+        async with AsyncNetBoxClient(cassette=cassette) as async_netbox:
+            return await replay_dead_letters(dead_letters, async_netbox, meraki_client)
+
+    results = asyncio.run(run())
+    print(f"Replayed: {results['replayed']}")
+    print(f"Still failing: {results['failed']}")
+
+def register_run(args):
+    """Register this run in the shared sync registry with its priority class.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        tuple: The registry, this run's key in it, and the yield point to call between
+            networks; for interactive runs, which never wait, it only renews the lease
+    """
+    priority_name = args.priority or ('targeted' if args.network or args.org else 'scheduled')
+    priority = PRIORITIES[priority_name]
+    registry = SyncRegistry(os.path.join(get_state_dir(), 'sync_registry.sqlite'))
+    run_key = f"run:{default_owner()}"
+    registry.acquire(run_key, priority=priority)
+
+    def heartbeat():
+        registry.acquire(run_key, priority=priority)
+
+    def yield_point():
+        waited = wait_for_turn(registry.busy, priority, heartbeat=heartbeat)
+        if waited >= 1:
+            print(f"  Resumed after yielding {waited:.0f}s to more urgent syncs")
+
+    # Interactive runs never wait, but must keep their lease alive so long runs still hold others off
+    return registry, run_key, (yield_point if priority > PRIORITIES['interactive'] else heartbeat)
+
+def run_incremental(meraki_client, subnet_synchronizer, ip_synchronizer, args, yield_point=None):
+    """Sync only the networks whose configuration changed since the last run, per the Meraki change log.
+
+    Client IPs are synced for whole organizations every --client-interval minutes instead.
+
+    Args:
+        meraki_client: The MerakiClient used for the sync run
+        subnet_synchronizer: The SubnetSynchronizer used for the sync run
+        ip_synchronizer: The IPSynchronizer used for the sync run
+        args: Parsed command line arguments
+        yield_point (callable, optional): Blocking call made before each changed network
+    """
+    tracker = ChangeLogTracker(meraki_client, CursorStore(os.path.join(get_state_dir(), 'sync_cursors.json')))
+    if args.org:
+        org_ids = [args.org]
+    else:
+        org_ids = [org["id"] for org in meraki_client.get_organizations()]
+
+    totals = {'networks': 0, 'vlans': 0, 'dhcp_reservations': 0, 'client_ips': 0}
+    for org_id in org_ids:
+        started = time.time()
+        failed_before = len(subnet_synchronizer.incomplete_networks | ip_synchronizer.incomplete_networks)
+        try:
+            networks = tracker.changed_networks(org_id, now=started)
+        except Exception as e:
+            print(f"  Error reading the change log of organization {org_id}: {e}")
+            networks = None
+
+        if networks is None:
+            print(f"Synchronizing organization {org_id} in full...")
+            totals['vlans'] += subnet_synchronizer.sync_organization(org_id)
+            if args.sync_ips and args.sync_reservations:
+                results = ip_synchronizer.sync_organization_ips(org_id, sync_clients=False)
+                totals['dhcp_reservations'] += results['dhcp_reservations']
+        else:
+            print(f"Organization {org_id}: {len(networks)} networks changed since the last run")
+            for network in networks:
+                if yield_point is not None:
+                    yield_point()
+                print(f"  Syncing network: {network['name']}")
+                totals['networks'] += 1
+                totals['vlans'] += subnet_synchronizer.sync_network(network['id'], network['name'])
+                if args.sync_ips and args.sync_reservations:
+                    results = ip_synchronizer.sync_network_ips(network['id'], network['name'], sync_clients=False)
+                    totals['dhcp_reservations'] += results['dhcp_reservations']
+
+        if args.sync_ips and args.sync_clients and tracker.clients_due(org_id, args.client_interval, now=started):
+            print(f"  Synchronizing client IPs of organization {org_id}...")
+            results = ip_synchronizer.sync_organization_ips(org_id, sync_reservations=False)
+            totals['client_ips'] += results['client_ips']
+            tracker.commit_clients(org_id, started)
+
+        # A network that failed must come up again next run, so the cursor only moves on success
+        if len(subnet_synchronizer.incomplete_networks | ip_synchronizer.incomplete_networks) == failed_before:
+            tracker.commit(org_id, started)
+        else:
+            print(f"  Some networks of organization {org_id} failed; they are read from the change log again next run")
+
+    print(f"\nIncremental synchronization complete!")
+    print(f"Changed networks synced: {totals['networks']}")
+    print(f"Total VLANs synced: {totals['vlans']}")
+    if args.sync_ips:
+        print(f"Total DHCP reservations synced: {totals['dhcp_reservations']}")
+        print(f"Total client IPs synced: {totals['client_ips']}")
+    if args.reconcile:
+        print("Skipping reconciliation: it only runs on a full sync of all organizations")
+
+async def check_netbox_changes(async_netbox, plan_cache):
+    """Invalidate cached plans of networks edited in NetBox, from the NetBox change log.
+
+    Args:
+        async_netbox: The AsyncNetBoxClient of the run
+        plan_cache: The PlanCache of the run
+    """
+    from src.sync.drift import DriftDetector
+
+    detector = DriftDetector(async_netbox, CursorStore(os.path.join(get_state_dir(), 'sync_cursors.json')),
+                             plan_cache, sync_user=os.getenv('NETBOX_SYNC_USER'))
+    try:
+        stale = await detector.check()
+    except Exception as e:
+        print(f"Could not read the NetBox change log, relying on drift checks: {e}")
+        return
+    if stale is None:
+        print("Following the NetBox change log from now on")
+    elif stale:
+        print(f"Networks edited in NetBox since the last run, writing them again: {len(stale)}")
+
+def run_pipeline(meraki_client, netbox_client, args, dead_letters=None, yield_point=None, cassette=None):
+    """Sync through the streaming pipeline, overlapping Meraki fetches and NetBox writes.
+
+    Args:
+        meraki_client: The MerakiClient used for the sync run
+        netbox_client: The NetBoxClient used for reconciliation
+        args: Parsed command line arguments
+        dead_letters (DeadLetterStore, optional): Store that keeps failed operations for replay
+        yield_point (callable, optional): Blocking call made before each network is fetched
+        cassette (Cassette, optional): Cassette NetBox requests are recorded to or replayed from
+    """
+    # asyncio and aiohttp are only needed for the pipeline, so they are not imported at startup
+    import asyncio
+    from src.clients.async_netbox_client import AsyncNetBoxClient
+    from src.sync.pipeline import SyncPipeline
+
+    networks = None
+    org_ids = ()
+    if args.network:
+        print(f"Synchronizing network {args.network} (pipeline)...")
+        networks = [{"id": args.network, "name": find_network_name(meraki_client, args.network)}]
+    elif args.org:
+        print(f"Synchronizing organization {args.org} (pipeline)...")
+        org_ids = [args.org]
+    else:
+        print("Synchronizing all organizations (pipeline)...")
+        org_ids = [org["id"] for org in meraki_client.get_organizations()]
+
+    plan_cache = None
+    if not args.no_plan_cache:
+        plan_cache = PlanCache(os.path.join(get_state_dir(), 'plan_cache.sqlite'),
+                               drift_check_hours=args.drift_check_hours)
+
+    async def pipeline_yield_point():
+        await asyncio.get_event_loop().run_in_executor(None, yield_point)
+
+    async def run():
+        async with AsyncNetBoxClient(cassette=cassette) as async_netbox:
+            if plan_cache is not None and not args.no_changelog_drift:
+                await check_netbox_changes(async_netbox, plan_cache)
+            pipeline = SyncPipeline(
+                meraki_client, async_netbox,
+                sync_ips=args.sync_ips,
+                sync_clients=args.sync_clients,
+                sync_reservations=args.sync_reservations,
+                fetch_workers=args.fetch_workers,
+                write_workers=args.write_workers,
+                dead_letters=dead_letters,
+                plan_cache=plan_cache,
+                yield_point=pipeline_yield_point if yield_point is not None else None
+            )
+            results = await pipeline.run(org_ids=org_ids, networks=networks)
+            return results, async_netbox.seen_ids, pipeline.incomplete
+
+    results, seen_ids, incomplete = asyncio.run(run())
+
+    print(f"\nPipeline synchronization complete!")
+    print(f"Networks synced: {results['networks']}")
+    if results['unchanged']:
+        print(f"Networks unchanged since last sync: {results['unchanged']}")
+    print(f"Total VLANs synced: {results['vlans']}")
+    if args.sync_ips:
+        print(f"Total DHCP reservations synced: {results['dhcp_reservations']}")
+        print(f"Total client IPs synced: {results['client_ips']}")
+    if results['errors']:
+        print(f"Networks with errors: {results['errors']}")
+    if results['failed']:
+        print(f"IP addresses that could not be written: {results['failed']}")
+
+    if args.reconcile:
+        if args.network or args.org:
+            print("Skipping reconciliation: it only runs on a full sync of all organizations")
+        else:
+            for kind, ids in seen_ids.items():
+                netbox_client.seen_ids[kind].update(ids)
+            # Objects of networks that failed or were cut short in this run are left alone
+            run_reconciliation(netbox_client, args, incomplete=incomplete)
+
+def run_daemon(meraki_client, args, dead_letters=None):
+    """Keep syncing in the foreground, re-syncing each network as often as it changes.
+
+    Args:
+        meraki_client: The MerakiClient used for the sync run
+        args: Parsed command line arguments
+        dead_letters (DeadLetterStore, optional): Store that keeps failed operations for replay
+    """
+    # asyncio and aiohttp are only needed for the daemon, so they are not imported at startup
+    import asyncio
+    import signal
+    from functools import partial
+    from src.clients.async_netbox_client import AsyncNetBoxClient
+    from src.sync.daemon import ApiBudget, AdaptiveSchedule, SyncDaemon, DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL
+    from src.sync.pipeline import SyncPipeline
+    from src.sync.scheduler import SyncScheduler
+
+    networks = None
+    org_ids = ()
+    if args.network:
+        networks = [{"id": args.network, "name": find_network_name(meraki_client, args.network)}]
+    elif args.org:
+        org_ids = [args.org]
+    else:
+        org_ids = [org["id"] for org in meraki_client.get_organizations()]
+
+    # The daemon decides itself when to read a network's VLANs again
+    if meraki_client.cache is not None:
+        meraki_client.cache.ttls["vlans"] = 0
+
+    plan_cache = None
+    if not args.no_plan_cache:
+        plan_cache = PlanCache(os.path.join(get_state_dir(), 'plan_cache.sqlite'),
+                               drift_check_hours=args.drift_check_hours)
+    # Meraki rate limits each API key separately, so the default budget grows with the key pool
+    budget = ApiBudget(args.api_budget, keys=len(meraki_client.api_keys))
+    schedule = AdaptiveSchedule(
+        min_interval=args.daemon_min_interval * 60 if args.daemon_min_interval else DEFAULT_MIN_INTERVAL,
+        max_interval=args.daemon_max_interval * 60 if args.daemon_max_interval else DEFAULT_MAX_INTERVAL,
+        budget=budget.calls_per_minute
+    )
+    state_path = os.path.join(get_state_dir(), 'daemon_state.json')
+    schedule.load(state_path)
+    registry = SyncRegistry(os.path.join(get_state_dir(), 'sync_registry.sqlite'))
+
+    async def run():
+        stop = asyncio.Event()
+        loop = asyncio.get_event_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        async with AsyncNetBoxClient() as async_netbox:
+            pipeline = SyncPipeline(
+                meraki_client, async_netbox,
+                sync_ips=args.sync_ips,
+                sync_clients=args.sync_clients,
+                sync_reservations=args.sync_reservations,
+                dead_letters=dead_letters,
+                plan_cache=plan_cache
+            )
+            daemon = SyncDaemon(
+                meraki_client, pipeline,
+                # Webhook and manual syncs in other processes register in the shared registry
+                scheduler=SyncScheduler(workers=args.fetch_workers or 2, contention=registry.busy),
+                schedule=schedule,
+                budget=budget,
+                org_ids=org_ids,
+                networks=networks,
+                state_path=state_path,
+                check_changes=(partial(check_netbox_changes, async_netbox, plan_cache)
+                               if plan_cache is not None and not args.no_changelog_drift else None)
+            )
+            return await daemon.run(stop)
+
+    print(f"Starting sync daemon (budget: {budget.calls_per_minute:.0f} Meraki calls per minute)...")
+    results = asyncio.run(run())
+    print(f"\nSync daemon stopped after {results['syncs']} network syncs")
+    print(f"Syncs that found changes: {results['changed']}")
+    if results['errors']:
+        print(f"Syncs with errors: {results['errors']}")
+
+def report_profile(profiler):
+    """Stop a profiler, write its files to the logs directory and summarize them.
+
+    Args:
+        profiler: The running PhaseProfiler
+    """
+    profiler.stop()
+    run_name = time.strftime('profile-%Y%m%d-%H%M%S')
+    report = profiler.write(get_logs_dir(), run_name)
+    print(f"\nProfile by phase (files in {get_logs_dir()}, named {run_name}-<phase>):")
+    for phase, entry in sorted(report.items(), key=lambda item: -item[1]['cpu']):
+        print(f"  {phase:<14} {entry['cpu']:8.2f}s CPU {entry['wall']:8.2f}s wall")
+
+def report_memory(tracker, netbox_client):
+    """Stop a memory tracker and summarize the memory used per phase and per synced object.
+
+    Args:
+        tracker: The running MemoryTracker
+        netbox_client: The NetBoxClient used for the sync run, which counts the objects synced
+    """
+    tracker.stop()
+    objects = sum(len(ids) for ids in netbox_client.seen_ids.values())
+    report = tracker.report(objects)
+    mib = 1024 * 1024
+    print(f"\nMemory by phase (peak of traced Python memory, process RSS):")
+    for phase, entry in sorted(report['phases'].items(), key=lambda item: -item[1]['peak']):
+        rss = f"{entry['rss'] / mib:8.1f} MiB RSS" if entry['rss'] is not None else ""
+        print(f"  {phase:<14} {entry['peak'] / mib:8.1f} MiB peak {rss}")
+    if report['bytes_per_object'] is not None:
+        print(f"Bytes per synced prefix or IP address: {report['bytes_per_object']:.0f} ({objects} objects)")
+    if report['top_sites']:
+        print(f"Top allocation sites (after {report['snapshot_phase']}, near the peak):")
+        for site, size, count in report['top_sites']:
+            print(f"  {size / 1024:10.1f} KiB {count:8d} blocks  {site}")
+
+def report_key_pool(key_pool):
+    """Print how calls were spread over the Meraki API keys and how each key fared."""
+    print("\nMeraki API keys:")
+    for stats in key_pool.stats():
+        state = "ok" if stats['healthy'] else "refused"
+        print(f"  {stats['key']}: {stats['calls']} calls, {stats['organizations']} organizations, "
+              f"{stats['rate_limited']} rate limited, {stats['auth_failures']} auth failures ({state})")
+
+def open_cassette(args):
+    """Open the cassette of a run recorded or replayed with --record-cassette or --replay-cassette.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Cassette: The cassette, or None without either option
+    """
+    if not (args.record_cassette or args.replay_cassette):
+        return None
+    from src.clients.cassette import Cassette
+
+    if args.replay_cassette:
+        # The recorded responses stand in for the APIs, so no credentials are needed
+        os.environ.setdefault('MERAKI_API_KEY', 'replay')
+        os.environ.setdefault('NETBOX_URL', 'http://netbox.replay')
+        os.environ.setdefault('NETBOX_TOKEN', 'replay')
+        return Cassette(args.replay_cassette, 'replay', latency_scale=args.cassette_latency)
+    return Cassette(args.record_cassette, 'record')
+
+def close_cassette(cassette):
+    """Save a recording, or report the requests a replay could not serve."""
+    if cassette.recording:
+        cassette.save()
+        print(f"Recorded {len(cassette.interactions)} HTTP requests to {cassette.path}")
+    elif cassette.misses:
+        print(f"Warning: {cassette.misses} requests were not in cassette {cassette.path}")
 
 def main():
     """Main entry point for the script."""
-    # Load environment variables
-    load_dotenv()
-    
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Synchronize Meraki networks to NetBox.')
     parser.add_argument('--org', help='Meraki organization ID to synchronize')
@@ -37,34 +458,153 @@ def main():
                        help='Sync DHCP reservations (default: True)')
     parser.add_argument('--no-sync-reservations', action='store_false', dest='sync_reservations',
                        help='Skip DHCP reservation synchronization')
+    parser.add_argument('--meraki-profile', choices=sorted(SDK_PROFILES),
+                       help='Meraki SDK settings profile (default: MERAKI_SDK_PROFILE or "default")')
+    parser.add_argument('--meraki-max-retries', type=int,
+                       help='Maximum retries per Meraki request')
+    parser.add_argument('--meraki-timeout', type=int,
+                       help='Timeout in seconds for each Meraki request')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Bypass the on-disk cache of Meraki organizations, networks and VLANs')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='Sync through the concurrent fetch/transform/write pipeline')
+    parser.add_argument('--fetch-workers', type=int,
+                       help='Networks fetched from Meraki concurrently with --pipeline (default: 4)')
+    parser.add_argument('--write-workers', type=int,
+                       help='Networks written to NetBox concurrently with --pipeline (default: 2)')
+    parser.add_argument('--no-plan-cache', action='store_true',
+                       help='With --pipeline, write every network even if it is unchanged since the last sync')
+    parser.add_argument('--drift-check-hours', type=float,
+                       help='Hours between checks that unchanged networks still exist in NetBox '
+                            '(default: SYNC_DRIFT_CHECK_HOURS or 24)')
+    parser.add_argument('--no-changelog-drift', action='store_true',
+                       help='With the plan cache, find NetBox edits by drift checks only, not from the '
+                            'NetBox change log')
+    parser.add_argument('--reconcile', action='store_true',
+                       help='Remove synced objects that no longer exist in Meraki (full sync only)')
+    parser.add_argument('--reconcile-action', choices=['delete', 'deprecate'], default='delete',
+                       help='What to do with stale objects (default: delete)')
+    parser.add_argument('--grace-hours', type=float, default=DEFAULT_GRACE_HOURS,
+                       help=f'Hours an object may be missing before it is reconciled (default: {DEFAULT_GRACE_HOURS})')
+    parser.add_argument('--priority', choices=sorted(PRIORITIES),
+                       help='Priority class of this run; lower classes wait between networks while higher '
+                            'ones run (default: targeted with --network/--org, scheduled otherwise)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Only sync networks whose VLANs or DHCP settings changed since the last run, '
+                            'according to the Meraki configuration change log')
+    parser.add_argument('--client-interval', type=float, default=DEFAULT_CLIENT_INTERVAL,
+                       help=f'With --incremental, minutes between client IP syncs of an organization '
+                            f'(default: {DEFAULT_CLIENT_INTERVAL})')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Keep running and re-sync each network as often as it changes, until interrupted')
+    parser.add_argument('--daemon-min-interval', type=float,
+                       help='With --daemon, fewest minutes between syncs of a network (default: 5)')
+    parser.add_argument('--daemon-max-interval', type=float,
+                       help='With --daemon, most minutes between syncs of a network (default: 360)')
+    parser.add_argument('--api-budget', type=float,
+                       help='With --daemon, Meraki API calls per minute shared by all syncs '
+                            '(default: SYNC_API_BUDGET or 300, per API key)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Profile the CPU time of each sync phase and write pstats and flame graph '
+                            '(collapsed stack) files to the logs directory')
+    parser.add_argument('--memory-profile', action='store_true',
+                       help='Report peak memory per sync phase, the top allocation sites and bytes per '
+                            'synced object (slows the run down)')
+    parser.add_argument('--record-cassette', metavar='PATH',
+                       help='Record the Meraki and NetBox HTTP traffic of the run to a cassette file')
+    parser.add_argument('--replay-cassette', metavar='PATH',
+                       help='Serve Meraki and NetBox requests from a recorded cassette instead of the APIs')
+    parser.add_argument('--cassette-latency', type=float, default=1.0, metavar='SCALE',
+                       help='With --replay-cassette, factor applied to the recorded response times '
+                            '(default: 1, 0 for no delays)')
+    parser.add_argument('--replay', action='store_true',
+                       help='Only re-apply operations that failed in earlier runs, then exit')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Report what reconciliation would change without changing it')
     args = parser.parse_args()
+    if args.incremental and (args.network or args.pipeline or args.daemon):
+        parser.error("--incremental can't be combined with --network, --pipeline or --daemon")
+    # The pipeline's phases overlap in threads and coroutines, which the phase trackers can't tell apart
+    if (args.profile or args.memory_profile) and (args.pipeline or args.daemon):
+        parser.error("--profile and --memory-profile can't be combined with --pipeline or --daemon")
+    # tracemalloc slows every allocation down, which would skew the CPU profile
+    if args.profile and args.memory_profile:
+        parser.error("--profile and --memory-profile can't be combined")
+    if args.record_cassette and args.replay_cassette:
+        parser.error("--record-cassette and --replay-cassette can't be combined")
+    # A cassette holds one run; the daemon never ends and schedules by the clock
+    if (args.record_cassette or args.replay_cassette) and args.daemon:
+        parser.error("--record-cassette and --replay-cassette can't be combined with --daemon")
+
+    # Load environment variables (after parsing, so --help stays fast)
+    load_config()
     
+    sync_registry = None
+    profiler = None
+    memory_tracker = None
+    cassette = None
+    meraki_client = None
     try:
+        cassette = open_cassette(args)
+        if cassette is not None:
+            # Cache hits would leave requests out of the recording or ask for ones that are not in it
+            args.no_cache = args.no_plan_cache = True
+
         # Initialize clients
-        meraki_client = MerakiClient()
-        netbox_client = NetBoxClient()
-        
+        cache = None
+        if not args.no_cache:
+            cache = InventoryCache(os.path.join(get_state_dir(), 'inventory_cache.sqlite'))
+
+        meraki_client = MerakiClient(
+            profile=args.meraki_profile,
+            maximum_retries=args.meraki_max_retries,
+            single_request_timeout=args.meraki_timeout,
+            cache=cache,
+            # One session per API key, as each session carries its key
+            session=cassette.requests_session if cassette is not None else None
+        )
+        netbox_client = NetBoxClient(session=cassette.requests_session() if cassette is not None else None)
+
+        # Failed operations are kept here so --replay can retry just those
+        dead_letters = DeadLetterStore(os.path.join(get_state_dir(), 'dead_letters.sqlite'))
+
+        if args.replay:
+            run_replay(meraki_client, dead_letters, cassette=cassette)
+            return 0
+
+        if args.daemon:
+            run_daemon(meraki_client, args, dead_letters=dead_letters)
+            return 0
+
+        # Register the run, so it waits between networks while more urgent syncs run
+        # and less urgent ones wait for it
+        sync_registry, run_key, yield_point = register_run(args)
+
         # Initialize synchronizers
-        subnet_synchronizer = SubnetSynchronizer(meraki_client, netbox_client)
-        ip_synchronizer = IPSynchronizer(meraki_client, netbox_client)
-        
-        if args.network:
+        subnet_synchronizer = SubnetSynchronizer(meraki_client, netbox_client, dead_letters=dead_letters,
+                                                 yield_point=yield_point)
+        ip_synchronizer = IPSynchronizer(meraki_client, netbox_client, dead_letters=dead_letters,
+                                         yield_point=yield_point)
+
+        if args.profile:
+            from src.utils.profiling import PhaseProfiler, track_sync_phases
+            profiler = track_sync_phases(PhaseProfiler(), meraki_client, netbox_client)
+        elif args.memory_profile:
+            from src.utils.profiling import MemoryTracker, track_sync_phases
+            memory_tracker = track_sync_phases(MemoryTracker(), meraki_client, netbox_client)
+
+        if args.incremental:
+            run_incremental(meraki_client, subnet_synchronizer, ip_synchronizer, args, yield_point=yield_point)
+
+        elif args.pipeline:
+            run_pipeline(meraki_client, netbox_client, args, dead_letters=dead_letters, yield_point=yield_point,
+                         cassette=cassette)
+
+        elif args.network:
             # Sync a specific network
             print(f"Synchronizing network {args.network}...")
             # Get network name first
-            orgs = meraki_client.get_organizations()
-            network_name = None
-            for org in orgs:
-                networks = meraki_client.get_networks(org["id"])
-                for network in networks:
-                    if network["id"] == args.network:
-                        network_name = network["name"]
-                        break
-                if network_name:
-                    break
-            
-            if not network_name:
-                network_name = "Unknown Network"
+            network_name = find_network_name(meraki_client, args.network)
 
             # Sync VLANs and subnets
             vlans_synced = subnet_synchronizer.sync_network(args.network, network_name)
@@ -82,6 +622,9 @@ def main():
 
             print(f"Network synchronization complete!")
             
+            if args.reconcile:
+                print("Skipping reconciliation: it only runs on a full sync of all organizations")
+
         elif args.org:
             # Sync an entire organization
             print(f"Synchronizing organization {args.org}...")
@@ -101,6 +644,9 @@ def main():
                 print(f"Client IPs synced: {ip_results['client_ips']}")
 
             print(f"Organization synchronization complete!")
+
+            if args.reconcile:
+                print("Skipping reconciliation: it only runs on a full sync of all organizations")
             
         else:
             # No specific org or network, sync all organizations
@@ -135,10 +681,27 @@ def main():
             if args.sync_ips:
                 print(f"Total DHCP reservations synced: {total_dhcp_reservations}")
                 print(f"Total client IPs synced: {total_client_ips}")
+
+            if args.reconcile:
+                run_reconciliation(netbox_client, args, incomplete={
+                    'prefixes': subnet_synchronizer.incomplete_networks,
+                    'ip_addresses': ip_synchronizer.incomplete_networks,
+                })
             
     except Exception as e:
         print(f"Error: {e}")
         return 1
+    finally:
+        if profiler is not None:
+            report_profile(profiler)
+        if memory_tracker is not None:
+            report_memory(memory_tracker, netbox_client)
+        if cassette is not None:
+            close_cassette(cassette)
+        if meraki_client is not None and meraki_client.key_pool is not None:
+            report_key_pool(meraki_client.key_pool)
+        if sync_registry is not None:
+            sync_registry.release(run_key)
         
     return 0
 
@@ -1,10 +1,30 @@
 """Configuration utilities for the application."""
 import os
-from dotenv import load_dotenv
 
 def load_config():
-    """Load configuration from .env file."""
+    """Load configuration from .env file.
+
+    python-dotenv is imported here rather than at module level so that importing
+    this module stays cheap for short-lived CLI invocations.
+    """
+    from dotenv import load_dotenv
+
     load_dotenv()
 
-# Load config when module is imported
-load_dotenv()
\ No newline at end of file
+def get_state_dir():
+    """Get the directory where the sync keeps state between runs.
+
+    Returns:
+        str: Value of MERAKI_NETBOX_STATE_DIR, or the project's state directory
+    """
+    default_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "state")
+    return os.getenv("MERAKI_NETBOX_STATE_DIR", default_dir)
+
+def get_logs_dir():
+    """Get the directory logs, profiles and other run reports are written to.
+
+    Returns:
+        str: Value of MERAKI_NETBOX_LOGS_DIR, or the project's logs directory
+    """
+    default_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "logs")
+    return os.getenv("MERAKI_NETBOX_LOGS_DIR", default_dir)
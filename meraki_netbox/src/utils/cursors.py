@@ -0,0 +1,43 @@
+"""
+Cursor Store Module
+
+Keeps small named positions between runs, e.g. how far a change log has
+been read, in one JSON file in the state directory.
+"""
+
+import json
+import os
+
+
+class CursorStore:
+    """Named cursors kept in a JSON file, each written to disk as soon as it moves."""
+
+    def __init__(self, path):
+        """Initialize the store.
+
+        Args:
+            path (str): Path of the JSON file
+        """
+        self.path = path
+        self._cursors = {}
+        if os.path.exists(path):
+            with open(path) as cursor_file:
+                self._cursors = json.load(cursor_file)
+
+    def get(self, name, default=None):
+        """Get a cursor's position, or default when it was never set."""
+        return self._cursors.get(name, default)
+
+    def set(self, name, value):
+        """Move a cursor and save the store atomically.
+
+        Args:
+            name (str): Cursor name, e.g. "meraki-changes:<org ID>"
+            value: JSON-serializable position
+        """
+        self._cursors[name] = value
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as cursor_file:
+            json.dump(self._cursors, cursor_file)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,111 @@
+"""Persistent dead-letter store for sync operations that failed."""
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+# Kinds of failed operations the store keeps
+DEAD_LETTER_KINDS = ("prefix", "ip_address", "dhcp_reservations")
+
+
+class DeadLetterStore:
+    """SQLite-backed store of failed sync operations with their payload and error.
+
+    Each entry is keyed by (kind, key), so an object that keeps failing is stored
+    once with a growing attempt count. Entries are dropped when the object is later
+    written successfully, either by a sync run or by a replay.
+    """
+
+    def __init__(self, path):
+        """Initialize the store.
+
+        Args:
+            path (str): Path of the SQLite database file
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dead_letters ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, key TEXT NOT NULL,"
+                " payload TEXT NOT NULL, error TEXT NOT NULL, attempts INTEGER NOT NULL,"
+                " first_failed_at REAL NOT NULL, last_failed_at REAL NOT NULL, UNIQUE (kind, key))"
+            )
+            # Keys are held in memory so successful writes only touch the database
+            # when they resolve an entry
+            self._keys = set(conn.execute("SELECT kind, key FROM dead_letters").fetchall())
+
+    def _connect(self):
+        """Open a connection; one per operation keeps the store safe across threads and processes."""
+        return sqlite3.connect(self.path, timeout=30)
+
+    def __len__(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+
+    def add(self, kind, key, payload, error, now=None):
+        """Record a failed operation, or another failure of one already recorded.
+
+        Args:
+            kind (str): One of DEAD_LETTER_KINDS
+            key (str): Identity of the object within its kind, e.g. "<network ID>:<address>"
+            payload (dict): JSON-serialisable data needed to apply the operation again
+            error: The error that made the operation fail
+            now (float, optional): Current UNIX timestamp, mainly for testing
+        """
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO dead_letters (kind, key, payload, error, attempts, first_failed_at, last_failed_at)"
+                " VALUES (?, ?, ?, ?, 1, ?, ?)"
+                " ON CONFLICT (kind, key) DO UPDATE SET payload = excluded.payload, error = excluded.error,"
+                " attempts = attempts + 1, last_failed_at = excluded.last_failed_at",
+                (kind, str(key), json.dumps(payload), str(error), now, now)
+            )
+        self._keys.add((kind, str(key)))
+
+    def discard(self, kind, key):
+        """Drop the entry of an object that has now been written successfully.
+
+        Args:
+            kind (str): One of DEAD_LETTER_KINDS
+            key (str): Identity of the object within its kind
+        """
+        if (kind, str(key)) not in self._keys:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM dead_letters WHERE kind = ? AND key = ?", (kind, str(key)))
+        self._keys.discard((kind, str(key)))
+
+    def entries(self, kind=None):
+        """Get the stored failures, oldest first.
+
+        Args:
+            kind (str, optional): Only return entries of this kind
+
+        Returns:
+            list: Dictionaries with "kind", "key", "payload", "error", "attempts",
+                "first_failed_at" and "last_failed_at"
+        """
+        query = ("SELECT kind, key, payload, error, attempts, first_failed_at, last_failed_at"
+                 " FROM dead_letters")
+        params = ()
+        if kind is not None:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query + " ORDER BY first_failed_at, id", params).fetchall()
+        return [
+            {
+                "kind": row[0],
+                "key": row[1],
+                "payload": json.loads(row[2]),
+                "error": row[3],
+                "attempts": row[4],
+                "first_failed_at": row[5],
+                "last_failed_at": row[6],
+            }
+            for row in rows
+        ]
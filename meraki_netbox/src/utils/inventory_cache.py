@@ -0,0 +1,173 @@
+"""Persistent on-disk cache of Meraki inventory (organizations, networks, VLANs)."""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+# Default time-to-live in seconds per cached entity kind
+DEFAULT_TTLS = {
+    "organizations": 24 * 3600,
+    "networks": 3600,
+    "vlans": 3600,
+    "vlan_details": 3600,
+}
+
+
+class InventoryCache:
+    """SQLite-backed cache of Meraki API responses with per-kind TTLs and content hashes.
+
+    Every entry stores the hash of its content, so callers can tell whether a refresh
+    actually changed anything. The file can be shared between processes, which lets
+    the webhook server invalidate entries that the next sync run will read.
+    """
+
+    def __init__(self, path, ttls=None):
+        """Initialize the cache.
+
+        Args:
+            path (str): Path of the SQLite database file
+            ttls (dict, optional): Seconds to keep each kind; overrides DEFAULT_TTLS and
+                MERAKI_CACHE_TTL_<KIND> environment variables
+        """
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS)
+        for kind in DEFAULT_TTLS:
+            env_value = os.getenv(f"MERAKI_CACHE_TTL_{kind.upper()}")
+            if env_value:
+                self.ttls[kind] = float(env_value)
+        self.ttls.update(ttls or {})
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                " content_hash TEXT NOT NULL, fetched_at REAL NOT NULL, changed_at REAL NOT NULL,"
+                " PRIMARY KEY (kind, key))"
+            )
+
+    def _connect(self):
+        """Open a connection; one per operation keeps the cache safe across threads and processes."""
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def content_hash(value):
+        """Hash a JSON-serialisable value independently of key order."""
+        return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, kind, key, now=None):
+        """Get a cached value if it is still fresh.
+
+        Args:
+            kind (str): Entity kind, e.g. "networks"
+            key (str): Entity key, e.g. an organization ID
+            now (float, optional): Current UNIX timestamp, mainly for testing
+
+        Returns:
+            The cached value, or None if it is missing or expired
+        """
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value, fetched_at FROM entries WHERE kind = ? AND key = ?", (kind, str(key))
+            ).fetchone()
+        if row is None or now - row[1] > self.ttls.get(kind, 0):
+            return None
+        return json.loads(row[0])
+
+    def get_hash(self, kind, key):
+        """Get the content hash of a cached entry, fresh or not.
+
+        Returns:
+            str: The content hash, or None if the entry is not cached
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT content_hash FROM entries WHERE kind = ? AND key = ?", (kind, str(key))
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, kind, key, value, now=None):
+        """Store a freshly fetched value.
+
+        Args:
+            kind (str): Entity kind
+            key (str): Entity key
+            value: JSON-serialisable value
+            now (float, optional): Current UNIX timestamp, mainly for testing
+
+        Returns:
+            bool: True if the content differs from what was cached before
+        """
+        now = time.time() if now is None else now
+        new_hash = self.content_hash(value)
+        previous_hash = self.get_hash(kind, key)
+        changed = new_hash != previous_hash
+
+        with closing(self._connect()) as conn, conn:
+            if changed:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (kind, key, value, content_hash, fetched_at, changed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, str(key), json.dumps(value), new_hash, now, now)
+                )
+            else:
+                # Unchanged content only extends the entry's freshness
+                conn.execute(
+                    "UPDATE entries SET fetched_at = ? WHERE kind = ? AND key = ?", (now, kind, str(key))
+                )
+        return changed
+
+    def get_or_fetch(self, kind, key, fetch, on_change=None):
+        """Return a fresh cached value, or fetch, store and return a new one.
+
+        Args:
+            kind (str): Entity kind
+            key (str): Entity key
+            fetch (callable): Called without arguments to fetch the value on a miss
+            on_change (callable, optional): Called without arguments when a fetched value
+                differs from the cached one, e.g. to drop entries derived from it
+
+        Returns:
+            The cached or freshly fetched value
+        """
+        value = self.get(kind, key)
+        if value is None:
+            value = fetch()
+            if self.put(kind, key, value) and on_change is not None:
+                on_change()
+        return value
+
+    def invalidate(self, kind, key=None, prefix=None):
+        """Drop cached entries of a kind, a single entry, or the entries whose keys share a prefix.
+
+        Args:
+            kind (str): Entity kind
+            key (str, optional): Entity key; all entries of the kind when omitted
+            prefix (str, optional): Key prefix, used instead of key
+        """
+        with closing(self._connect()) as conn, conn:
+            if prefix is not None:
+                conn.execute(
+                    "DELETE FROM entries WHERE kind = ? AND substr(key, 1, ?) = ?", (kind, len(prefix), prefix)
+                )
+            elif key is None:
+                conn.execute("DELETE FROM entries WHERE kind = ?", (kind,))
+            else:
+                conn.execute("DELETE FROM entries WHERE kind = ? AND key = ?", (kind, str(key)))
+
+    def invalidate_network(self, network_id, org_id=None):
+        """Drop everything cached about a network, e.g. when a webhook reports a change.
+
+        Args:
+            network_id (str): Meraki network ID
+            org_id (str, optional): Organization ID, whose network list is dropped too
+        """
+        if network_id:
+            self.invalidate("vlans", network_id)
+            self.invalidate("vlan_details", prefix=f"{network_id}/")
+        if org_id:
+            self.invalidate("networks", org_id)
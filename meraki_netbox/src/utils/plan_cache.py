@@ -0,0 +1,146 @@
+"""Cross-run cache of per-network sync plans, keyed by the hash of their content."""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+# Default hours between checks that a cached network's NetBox objects still exist
+DEFAULT_DRIFT_CHECK_HOURS = 24
+
+
+class PlanCache:
+    """SQLite-backed record of the last plan written for each network.
+
+    For every network it keeps the hash of the desired state that was written and
+    the IDs of the NetBox objects it produced. A later run whose plan hashes the same
+    can skip the network, only verifying now and then that the objects still exist.
+    """
+
+    def __init__(self, path, drift_check_hours=None):
+        """Initialize the cache.
+
+        Args:
+            path (str): Path of the SQLite database file
+            drift_check_hours (float, optional): Hours between drift checks of a cached network;
+                defaults to SYNC_DRIFT_CHECK_HOURS or DEFAULT_DRIFT_CHECK_HOURS
+        """
+        self.path = path
+        if drift_check_hours is None:
+            drift_check_hours = float(os.getenv("SYNC_DRIFT_CHECK_HOURS", DEFAULT_DRIFT_CHECK_HOURS))
+        self.drift_check_seconds = drift_check_hours * 3600
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                " network_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL, object_ids TEXT NOT NULL,"
+                " written_at REAL NOT NULL, verified_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        """Open a connection; one per operation keeps the cache safe across threads and processes."""
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def plan_hash(plan, settings=None):
+        """Hash a plan, plus any settings that change how it is written, independently of key order.
+
+        Args:
+            plan (dict): Plan built by build_network_plan
+            settings (dict, optional): Settings that change the NetBox objects a plan produces
+
+        Returns:
+            str: Hex digest of the content
+        """
+        content = json.dumps({"plan": plan, "settings": settings or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, network_id):
+        """Get the cached record of a network.
+
+        Returns:
+            dict: "content_hash", "object_ids" (per kind), "written_at" and "verified_at",
+                or None if the network is not cached
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT content_hash, object_ids, written_at, verified_at FROM plans WHERE network_id = ?",
+                (network_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"content_hash": row[0], "object_ids": json.loads(row[1]), "written_at": row[2], "verified_at": row[3]}
+
+    def needs_drift_check(self, record, now=None):
+        """Tell whether a cached network is due for a drift check."""
+        now = time.time() if now is None else now
+        return now - record["verified_at"] >= self.drift_check_seconds
+
+    def put(self, network_id, content_hash, object_ids, now=None):
+        """Record a plan that was written completely.
+
+        Args:
+            network_id (str): Meraki network ID
+            content_hash (str): Hash of the plan
+            object_ids (dict): Per kind, IDs of the NetBox objects the plan produced
+            now (float, optional): Current UNIX timestamp, mainly for testing
+        """
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO plans (network_id, content_hash, object_ids, written_at, verified_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (network_id, content_hash, json.dumps(object_ids), now, now)
+            )
+
+    def mark_verified(self, network_id, now=None):
+        """Record that a cached network's objects were found unchanged in NetBox."""
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE plans SET verified_at = ? WHERE network_id = ?", (now, network_id))
+
+    def mark_all_verified(self, since, now=None):
+        """Record that no cached network verified at or after `since` has changed in NetBox since.
+
+        Args:
+            since (float): UNIX timestamp from which on NetBox changes are known to have been checked
+            now (float, optional): Current UNIX timestamp, mainly for testing
+        """
+        now = time.time() if now is None else now
+        with closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE plans SET verified_at = ? WHERE verified_at >= ?", (now, since))
+
+    def invalidate_changed(self, changed, tolerance=0):
+        """Forget the plans of networks whose NetBox objects were changed after the plan was written.
+
+        Args:
+            changed (dict): Per kind, object ID -> UNIX timestamp of its latest change
+            tolerance (float): Seconds a change may postdate the write and still count as the
+                write itself, for clock skew between this host and NetBox
+
+        Returns:
+            list: IDs of the networks whose plans were forgotten
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT network_id, object_ids, written_at FROM plans").fetchall()
+        stale = []
+        for network_id, object_ids, written_at in rows:
+            for kind, ids in json.loads(object_ids).items():
+                times = changed.get(kind, {})
+                if any(times.get(object_id, 0) > written_at + tolerance for object_id in ids):
+                    stale.append(network_id)
+                    break
+        for network_id in stale:
+            self.invalidate(network_id)
+        return stale
+
+    def invalidate(self, network_id=None):
+        """Forget a network's plan, or every plan, so it is written in full next time."""
+        with closing(self._connect()) as conn, conn:
+            if network_id is None:
+                conn.execute("DELETE FROM plans")
+            else:
+                conn.execute("DELETE FROM plans WHERE network_id = ?", (network_id,))
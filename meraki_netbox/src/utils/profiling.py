@@ -0,0 +1,336 @@
+"""
+Phase Profiling Module
+
+PhaseProfiler splits a sync run's CPU time into phases (e.g. Meraki fetch,
+NetBox lookup, NetBox write) with one cProfile profiler per phase, and
+MemoryTracker records each phase's peak memory with tracemalloc. Phases
+are entered by wrapping the methods of existing client objects at run time,
+so nothing is wrapped, and nothing costs anything, unless tracking is on.
+
+Profiles are written per phase as pstats files (for `python -m pstats` or
+snakeviz) and as collapsed stacks, which flamegraph.pl and speedscope turn
+into flame graphs.
+"""
+
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Deepest call stack written to the collapsed-stack files
+MAX_STACK_DEPTH = 64
+
+# Methods that mark the phases of a sync run; the rest of the sync's work counts as "transform"
+MERAKI_FETCH_METHODS = ("get_organizations", "get_networks", "get_vlans", "get_network_clients",
+                        "get_network_client_table", "get_vlan_details", "get_dhcp_reservations",
+                        "get_configuration_changes")
+NETBOX_LOOKUP_METHODS = ("get_network_scope", "_load_vlan_index", "_load_prefix_index", "_load_ip_index",
+                         "get_owned_objects")
+NETBOX_WRITE_METHODS = ("create_or_update_vlan", "create_or_update_prefix", "create_or_update_ip_address",
+                        "bulk_update", "bulk_delete")
+
+
+def _frame_label(func):
+    """Label a pstats function key as "file:function:line"."""
+    filename, line, name = func
+    if filename == "~":
+        # Built-ins have no file; their name is like "<built-in method time.sleep>"
+        return name
+    return f"{os.path.basename(filename)}:{name}:{line}"
+
+
+def collapsed_stacks(stats):
+    """Turn profile statistics into collapsed stacks ("frame;frame;frame microseconds" lines).
+
+    cProfile only records caller/callee pairs, not whole stacks, so a function's time
+    is split over the paths leading to it in proportion to the time of each call edge,
+    the way other pstats-to-flame-graph converters do.
+
+    Args:
+        stats (pstats.Stats): Statistics of one profile
+
+    Returns:
+        list: Lines of the collapsed-stack format, heaviest first
+    """
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    totals = {}
+
+    def walk(func, stack, share):
+        own_time, cumulative = entries[func][2], entries[func][3]
+        stack = stack + [_frame_label(func)]
+        micros = int(own_time * share * 1e6)
+        if micros:
+            key = ";".join(stack)
+            totals[key] = totals.get(key, 0) + micros
+        if len(stack) >= MAX_STACK_DEPTH or not cumulative:
+            return
+        for callee, edge_cumulative in callees.get(func, ()):
+            callee_cumulative = entries[callee][3]
+            if callee_cumulative and _frame_label(callee) not in stack:
+                walk(callee, stack, share * min(1.0, edge_cumulative / callee_cumulative))
+
+    for func, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(func, [], 1.0)
+
+    return [f"{stack} {micros}" for stack, micros in sorted(totals.items(), key=lambda item: -item[1])]
+
+
+class PhaseTracker:
+    """Base of the phase trackers: follows the current phase as instrumented methods are entered and left.
+
+    Subclasses measure something per phase by extending _switch(old, new), called
+    whenever the current phase changes (None stands for "not tracking").
+    """
+
+    def __init__(self):
+        self.wall_seconds = {}
+        self._stack = []
+        self._entered = None
+        self._patched = []
+        # cProfile only sees the thread that enabled it, so phases are only switched on this one
+        self._thread = threading.get_ident()
+
+    def _switch(self, old, new):
+        now = time.perf_counter()
+        if old is not None:
+            self.wall_seconds[old] = self.wall_seconds.get(old, 0.0) + now - self._entered
+        self._entered = now
+
+    @contextmanager
+    def phase(self, name):
+        """Attribute everything run inside the block to a phase, nested phases excepted."""
+        if threading.get_ident() != self._thread:
+            yield
+            return
+        previous = self._stack[-1] if self._stack else None
+        self._stack.append(name)
+        if previous != name:
+            self._switch(previous, name)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            if previous != name:
+                self._switch(name, previous)
+
+    def instrument(self, obj, method_names, phase):
+        """Run some of an object's methods in a phase, until restore is called.
+
+        Args:
+            obj: Object whose methods are wrapped, e.g. a MerakiClient
+            method_names (iterable): Names of the methods; names the object lacks are skipped
+            phase (str): Phase the methods run in
+        """
+        for name in method_names:
+            method = getattr(obj, name, None)
+            if method is None:
+                continue
+
+            @functools.wraps(method)
+            def wrapper(*args, _method=method, **kwargs):
+                with self.phase(phase):
+                    return _method(*args, **kwargs)
+
+            setattr(obj, name, wrapper)
+            self._patched.append((obj, name))
+
+    def restore(self):
+        """Remove the wrappers added by instrument."""
+        for obj, name in reversed(self._patched):
+            vars(obj).pop(name, None)
+        self._patched = []
+
+    def start(self, base_phase):
+        """Start tracking; code outside any instrumented method counts toward base_phase."""
+        self._stack = [base_phase]
+        self._switch(None, base_phase)
+
+    def stop(self):
+        """Stop tracking and remove the wrappers."""
+        if self._stack:
+            self._switch(self._stack[-1], None)
+            self._stack = []
+        self.restore()
+
+
+class PhaseProfiler(PhaseTracker):
+    """Profiles a run phase by phase, with one cProfile profiler per phase."""
+
+    def __init__(self, timer=time.process_time):
+        """Initialize the profiler.
+
+        Args:
+            timer (callable): Clock the profiles measure; CPU time by default, so time spent
+                waiting on the APIs does not drown out the Python work
+        """
+        super().__init__()
+        self.timer = timer
+        self.profiles = {}
+
+    def _switch(self, old, new):
+        if old is not None:
+            self.profiles[old].disable()
+        if new is not None:
+            if new not in self.profiles:
+                self.profiles[new] = cProfile.Profile(self.timer)
+            self.profiles[new].enable()
+        super()._switch(old, new)
+
+    def write(self, directory, run_name):
+        """Write each phase's pstats and collapsed-stack files.
+
+        Args:
+            directory (str): Directory the files are written to
+            run_name (str): Prefix of the file names, e.g. "profile-20240101-120000"
+
+        Returns:
+            dict: Per phase, "wall" and "cpu" seconds and the "pstats" and "collapsed" paths
+        """
+        os.makedirs(directory, exist_ok=True)
+        report = {}
+        for phase, profile in self.profiles.items():
+            stats = pstats.Stats(profile)
+            base = os.path.join(directory, f"{run_name}-{phase}")
+            stats.dump_stats(f"{base}.pstats")
+            with open(f"{base}.collapsed", "w") as collapsed_file:
+                collapsed_file.writelines(f"{line}\n" for line in collapsed_stacks(stats))
+            report[phase] = {
+                "wall": self.wall_seconds.get(phase, 0.0),
+                "cpu": stats.total_tt,
+                "pstats": f"{base}.pstats",
+                "collapsed": f"{base}.collapsed",
+            }
+        return report
+
+
+def current_rss():
+    """Get the resident set size of this process in bytes, or None where it can't be read."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Without /proc only the peak is available: kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryTracker(PhaseTracker):
+    """Tracks memory phase by phase with tracemalloc.
+
+    At every phase boundary it records the phase's peak of traced Python memory and
+    the process RSS. A snapshot is taken whenever traced memory has grown by
+    snapshot_growth since the last one, so the largest snapshot shows where the
+    memory at (close to) the run's peak was allocated, at a bounded cost.
+    """
+
+    def __init__(self, top_sites=10, snapshot_growth=0.1, frames=1):
+        """Initialize the tracker.
+
+        Args:
+            top_sites (int): Allocation sites listed in the report
+            snapshot_growth (float): Growth of traced memory, as a fraction, that triggers a snapshot
+            frames (int): Stack frames tracemalloc keeps per allocation
+        """
+        super().__init__()
+        self.top_sites = top_sites
+        self.snapshot_growth = snapshot_growth
+        self.frames = frames
+        self.peaks = {}
+        self.rss = {}
+        self._snapshot = None
+        self._snapshot_size = 0
+        self._snapshot_phase = None
+        self._started_tracing = False
+
+    def _switch(self, old, new):
+        if old is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            self.peaks[old] = max(self.peaks.get(old, 0), peak)
+            rss = current_rss()
+            if rss is not None:
+                self.rss[old] = max(self.rss.get(old, 0), rss)
+            if current > self._snapshot_size * (1 + self.snapshot_growth):
+                self._snapshot = tracemalloc.take_snapshot()
+                self._snapshot_size = current
+                self._snapshot_phase = old
+            # reset_peak is new in Python 3.9; before that peaks only ever grow
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        super()._switch(old, new)
+
+    def start(self, base_phase):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        elif hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        super().start(base_phase)
+
+    def stop(self):
+        super().stop()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self, objects=0):
+        """Summarize the tracked memory.
+
+        Args:
+            objects (int): Number of objects the run synced, for the bytes per object
+
+        Returns:
+            dict: Per phase in "phases", the "peak" traced bytes and "rss"; the overall "peak",
+                "bytes_per_object" (None without objects), and the "top_sites" of the largest
+                snapshot as (file:line, bytes, allocations) with the "snapshot_phase" it was taken in
+        """
+        peak = max(self.peaks.values(), default=0)
+        top_sites = []
+        if self._snapshot is not None:
+            snapshot = self._snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ])
+            for stat in snapshot.statistics("lineno")[:self.top_sites]:
+                frame = stat.traceback[0]
+                top_sites.append((f"{frame.filename}:{frame.lineno}", stat.size, stat.count))
+        return {
+            "phases": {phase: {"peak": self.peaks[phase], "rss": self.rss.get(phase)} for phase in self.peaks},
+            "peak": peak,
+            "bytes_per_object": peak / objects if objects else None,
+            "top_sites": top_sites,
+            "snapshot_phase": self._snapshot_phase,
+        }
+
+
+def track_sync_phases(tracker, meraki_client, netbox_client):
+    """Track the rest of a sync run in fetch, transform, NetBox lookup and NetBox write phases.
+
+    Args:
+        tracker (PhaseTracker): The PhaseProfiler or MemoryTracker to start
+        meraki_client: The MerakiClient of the run
+        netbox_client: The NetBoxClient of the run
+
+    Returns:
+        PhaseTracker: The running tracker
+    """
+    tracker.instrument(meraki_client, MERAKI_FETCH_METHODS, "fetch")
+    tracker.instrument(netbox_client, NETBOX_LOOKUP_METHODS, "netbox_lookup")
+    tracker.instrument(netbox_client, NETBOX_WRITE_METHODS, "netbox_write")
+    tracker.start("transform")
+    return tracker
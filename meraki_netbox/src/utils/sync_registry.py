@@ -0,0 +1,158 @@
+"""Cross-process registry of pending and running syncs, so each network is synced once at a time."""
+import os
+import socket
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+# Default seconds a pending or running sync is trusted before its entry is treated as abandoned
+DEFAULT_LEASE_SECONDS = 600
+
+
+def default_owner():
+    """Identify this process among the ones sharing the registry."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SyncRegistry:
+    """SQLite-backed lock and de-duplication table for syncs, shared by every worker process.
+
+    Each key ("network:<id>" or "org:<id>") has at most one entry: pending while a
+    sync waits in some process's queue, running while a process syncs it. A trigger
+    for a pending key attaches to the waiting sync; a trigger for a running key asks
+    the running process for one follow-up run, since the change may have come after
+    the running sync fetched from Meraki. Entries older than the lease belong to a
+    process that died and are taken over.
+
+    Entries carry the priority class of their sync (lower is more urgent), so a
+    long sync can check between networks whether more urgent ones are active.
+    """
+
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Initialize the registry.
+
+        Args:
+            path (str): Path of the SQLite database file
+            lease_seconds (float): Seconds before an entry is treated as abandoned
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(sqlite3.connect(path, timeout=30)) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS syncs ("
+                " key TEXT PRIMARY KEY, state TEXT NOT NULL, rerun INTEGER NOT NULL,"
+                " owner TEXT, updated_at REAL NOT NULL, priority INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(syncs)")]
+            if "priority" not in columns:
+                conn.execute("ALTER TABLE syncs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _transaction(self):
+        """Open a connection holding the write lock, so check-then-set is atomic across processes."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _entry(self, conn, key, now):
+        """Get a key's live (state, rerun, owner) entry, or None if it has none or it expired."""
+        row = conn.execute("SELECT state, rerun, owner, updated_at FROM syncs WHERE key = ?", (key,)).fetchone()
+        if row is None or now - row[3] >= self.lease_seconds:
+            return None
+        return row[:3]
+
+    def request(self, key, priority=0, now=None):
+        """Record a trigger for a sync.
+
+        Args:
+            key (str): Sync key, e.g. "network:<id>"
+            priority (int): Priority class of the sync; lower is more urgent
+            now (float, optional): Current UNIX timestamp, mainly for testing
+
+        Returns:
+            str: "queued" if the caller must queue the sync, "pending" if it attached to a
+                waiting sync, or "running" if it attached as a follow-up of a running one
+        """
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            entry = self._entry(conn, key, now)
+            if entry is None:
+                conn.execute("INSERT OR REPLACE INTO syncs (key, state, rerun, owner, updated_at, priority)"
+                             " VALUES (?, 'pending', 0, NULL, ?, ?)", (key, now, priority))
+                return "queued"
+            conn.execute("UPDATE syncs SET priority = MIN(priority, ?) WHERE key = ?", (priority, key))
+            if entry[0] == "pending":
+                return "pending"
+            conn.execute("UPDATE syncs SET rerun = 1 WHERE key = ?", (key,))
+            return "running"
+
+    def acquire(self, key, owner=None, now=None, priority=0):
+        """Take the lock for a queued sync just before running it.
+
+        Also renews the lease of a lock the owner already holds, so long runs call it
+        again now and then.
+
+        Args:
+            key (str): Sync key
+            owner (str, optional): Identity of the caller (default: host and process ID)
+            now (float, optional): Current UNIX timestamp, mainly for testing
+            priority (int): Priority class of the sync, kept if the entry has a more urgent one
+
+        Returns:
+            bool: False if another process is running the same sync
+        """
+        now = time.time() if now is None else now
+        owner = owner or default_owner()
+        with self._transaction() as conn:
+            entry = self._entry(conn, key, now)
+            if entry is not None and entry[0] == "running" and entry[2] != owner:
+                return False
+            if entry is not None:
+                conn.execute("UPDATE syncs SET state = 'running', owner = ?, updated_at = ?,"
+                             " priority = MIN(priority, ?) WHERE key = ?", (owner, now, priority, key))
+            else:
+                conn.execute("INSERT OR REPLACE INTO syncs (key, state, rerun, owner, updated_at, priority)"
+                             " VALUES (?, 'running', 0, ?, ?, ?)", (key, owner, now, priority))
+            return True
+
+    def release(self, key, owner=None, now=None):
+        """Give up the lock after a sync ran.
+
+        Returns:
+            bool: True if triggers arrived during the run; the lock is then kept and the
+                caller must run the sync once more before releasing again
+        """
+        now = time.time() if now is None else now
+        owner = owner or default_owner()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT rerun, owner FROM syncs WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] != owner:
+                return False
+            if row[0]:
+                conn.execute("UPDATE syncs SET rerun = 0, updated_at = ? WHERE key = ?", (now, key))
+                return True
+            conn.execute("DELETE FROM syncs WHERE key = ?", (key,))
+            return False
+
+    def busy(self, priority, now=None):
+        """Tell whether syncs more urgent than priority are waiting or running in any process."""
+        now = time.time() if now is None else now
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            row = conn.execute("SELECT 1 FROM syncs WHERE priority < ? AND updated_at > ? LIMIT 1",
+                               (priority, now - self.lease_seconds)).fetchone()
+        return row is not None
+
+    def forget(self, key):
+        """Drop a pending entry whose sync will not run after all, e.g. when its queue shuts down."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM syncs WHERE key = ? AND state = 'pending'", (key,))
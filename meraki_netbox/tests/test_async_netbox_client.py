@@ -0,0 +1,201 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clients.async_netbox_client import AsyncNetBoxClient, NetBoxAPIError
+
+
+class FakeResponse:
+    """Minimal stand-in for an aiohttp response."""
+
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+        self.headers = {}
+
+    async def __aenter__(self):
+        # Yield like a real request would, so concurrent coroutines interleave
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def json(self, content_type=None):
+        return self.body
+
+    async def text(self):
+        return str(self.body)
+
+
+class FakeSession:
+    """Records requests and answers them from a handler function."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+
+    def request(self, method, url, params=None, json=None):
+        self.requests.append((method, url, params, json))
+        status, body = self.handler(method, url, params, json)
+        return FakeResponse(status, body)
+
+
+def page(results, next_url=None):
+    return 200, {"count": len(results), "next": next_url, "results": results}
+
+
+class TestAsyncNetBoxClient:
+    """Test suite for the asynchronous NetBox API client."""
+
+    def make_client(self, handler):
+        self.session = FakeSession(handler)
+        return AsyncNetBoxClient(url="https://netbox.example.com", token="test_token_123",
+                                 session=self.session)
+
+    def test_create_vlan_uses_index(self):
+        """Test that existing VLANs are found in the preloaded index and new ones are created."""
+        def handler(method, url, params, json):
+            if method == "GET":
+                return page([{"id": 1, "vid": 10, "name": "Data", "description": ""}])
+            return 201, dict(json, id=2)
+
+        client = self.make_client(handler)
+
+        async def run():
+            existing = await client.create_or_update_vlan(10, "Data")
+            created = await client.create_or_update_vlan(20, "Voice")
+            return existing, created
+
+        existing, created = asyncio.run(run())
+
+        assert existing["id"] == 1
+        assert created == {"vid": 20, "name": "Voice", "id": 2}
+        # One index load, no PATCH for the unchanged VLAN, one POST for the new one
+        assert [request[0] for request in self.session.requests] == ["GET", "POST"]
+
+    def test_bulk_apply_ip_addresses(self):
+        """Test that IP addresses are created, updated and left alone with bulk requests."""
+        existing = [
+            {"id": 1, "address": "10.0.0.1/24", "description": "Printer", "dns_name": "",
+             "status": {"value": "active"}, "tags": [{"slug": "meraki-sync"}]},
+            {"id": 2, "address": "10.0.0.2/24", "description": "Old", "dns_name": "",
+             "status": {"value": "active"}, "tags": [{"slug": "meraki-sync"}]},
+        ]
+
+        def handler(method, url, params, json):
+            if url.endswith("extras/tags/"):
+                return page([{"id": 9, "slug": "meraki-sync"}])
+            if method == "GET":
+                return page(existing)
+            if method == "POST":
+                return 201, [dict(item, id=100 + n) for n, item in enumerate(json)]
+            return 200, json
+
+        client = self.make_client(handler)
+        items = [
+            {"address": "10.0.0.1/24", "description": "Printer", "parent": "10.0.0.0/24"},
+            {"address": "10.0.0.2/24", "description": "New", "parent": "10.0.0.0/24"},
+            {"address": "10.0.0.3/24", "description": "Laptop", "parent": "10.0.0.0/24"},
+        ]
+
+        result = asyncio.run(client.bulk_apply_ip_addresses(items))
+
+        assert (result["created"], result["updated"], result["unchanged"]) == (1, 1, 1)
+        assert [obj["id"] for obj in result["objects"]] == [1, 2, 100]
+        assert result["objects"][1]["description"] == "New"
+        assert client.seen_ids["ip_addresses"] == {1, 2, 100}
+
+        writes = [request for request in self.session.requests if request[0] != "GET"]
+        assert [(method, len(body)) for method, _, _, body in writes] == [("POST", 1), ("PATCH", 1)]
+
+    def test_concurrent_prefixes_create_tag_and_scope_once(self):
+        """Test that concurrent prefix writes create the ownership tag and network scope only once."""
+        created = {}
+
+        def handler(method, url, params, json):
+            kind = url.split("/api/")[1]
+            if method == "GET":
+                if kind in ("extras/tags/", "ipam/vlan-groups/") and kind in created:
+                    return page([created[kind]])
+                return page([])
+            if kind in created and not isinstance(json, list) and "slug" in json:
+                return 400, {"slug": ["already exists"]}
+            created[kind] = dict(json, id=len(created) + 1)
+            return 201, created[kind]
+
+        client = self.make_client(handler)
+
+        async def run():
+            scopes = await asyncio.gather(*[client.get_network_scope("N_1", "Office") for _ in range(4)])
+            await asyncio.gather(*[
+                client.create_or_update_prefix(f"10.0.{n}.0/24", vlan_group=scopes[n]["vlan_group"])
+                for n in range(4)
+            ])
+
+        asyncio.run(run())
+
+        posts = [request[1] for request in self.session.requests if request[0] == "POST"]
+        assert posts.count("https://netbox.example.com/api/extras/tags/") == 1
+        assert posts.count("https://netbox.example.com/api/ipam/vlan-groups/") == 1
+        assert posts.count("https://netbox.example.com/api/ipam/prefixes/") == 4
+
+    def test_fetch_all_pages_in_parallel(self):
+        """Test that the remaining pages are requested by offset after the first one."""
+        objects = [{"id": n, "vid": n} for n in range(5)]
+
+        def handler(method, url, params, json):
+            offset = int(params["offset"])
+            return 200, {"count": 5, "next": "more" if offset + 2 < 5 else None,
+                         "results": objects[offset:offset + 2]}
+
+        client = self.make_client(handler)
+        results = asyncio.run(client.fetch_all("vlans", group_id=3))
+
+        assert results == objects
+        assert sorted(request[2]["offset"] for request in self.session.requests) == ["0", "2", "4"]
+        assert self.session.requests[0][2]["fields"] == "id,url,vid,name,description,group"
+
+    def test_count_existing_only_reads_counts(self):
+        """Test that existing objects are counted by ID with one brief object per request."""
+        def handler(method, url, params, json):
+            ids = [int(value) for key, value in params if key == "id"]
+            return 200, {"count": len([object_id for object_id in ids if object_id != 2]), "results": []}
+
+        client = self.make_client(handler)
+
+        assert asyncio.run(client.count_existing("ip_addresses", [3, 1, 2, 1])) == 2
+        assert self.session.requests[0][2] == [("id", "1"), ("id", "2"), ("id", "3"),
+                                               ("brief", "1"), ("limit", "1")]
+
+    def test_object_changes_page_by_id(self):
+        """Test that the change log is read from the newest known entry on, falling back to the 3.x endpoint."""
+        def handler(method, url, params, json):
+            if "/core/" in url:
+                return 404, {"detail": "Not found."}
+            after = int(dict(params)["id__gt"])
+            results = [{"id": change_id} for change_id in range(after + 1, min(after + 3, 6))]
+            return page(results, "next-page" if after + 3 < 6 else None)
+
+        client = self.make_client(handler)
+        client.page_size = 2
+
+        changes = asyncio.run(client.fetch_object_changes(0, ["ipam.prefix"], exclude_user="sync"))
+
+        assert [change["id"] for change in changes] == [1, 2, 3, 4, 5]
+        assert [dict(params)["id__gt"] for _, url, params, _ in self.session.requests
+                if "/extras/" in url] == ["0", "2", "4"]
+        assert ("user_name__n", "sync") in self.session.requests[0][2]
+
+    def test_error_status_raises(self):
+        """Test that NetBox error responses raise NetBoxAPIError with the status."""
+        client = self.make_client(lambda method, url, params, json: (503, "Service Unavailable"))
+
+        with pytest.raises(NetBoxAPIError) as error:
+            asyncio.run(client.request("GET", "ipam/prefixes/"))
+        assert error.value.status == 503
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import random
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clients.async_netbox_client import NetBoxAPIError
+from sync.backpressure import RetryQueue, WriteThrottle, is_overload_error
+from sync.pipeline import SyncPipeline
+
+
+class FlakyNetBox:
+    """Async NetBox stand-in that fails batches according to a rule."""
+
+    max_in_flight = 4
+
+    def __init__(self, fail):
+        self.fail = fail
+        self.batches = []
+        self.seen_ids = {"prefixes": set(), "ip_addresses": set()}
+
+    async def bulk_apply_ip_addresses(self, items):
+        self.batches.append([item["address"] for item in items])
+        error = self.fail(items, len(self.batches))
+        if error:
+            raise error
+
+
+def items(count):
+    return [{"address": f"10.0.0.{host}/24"} for host in range(1, count + 1)]
+
+
+class TestWriteThrottle:
+    """Test suite for AIMD batch size and concurrency."""
+
+    def test_additive_increase_multiplicative_decrease(self):
+        """Test that fast batches grow the limits and slow or overloaded ones halve them."""
+        throttle = WriteThrottle(batch_size=40, max_batch_size=100, concurrency=2, max_concurrency=4,
+                                 latency_target=1.0)
+
+        throttle.record_success(0.1)
+        assert (throttle.batch_size.value, throttle.concurrency.value) == (50, 3)
+
+        throttle.record_success(5.0)
+        assert (throttle.batch_size.value, throttle.concurrency.value) == (25, 1)
+
+        throttle.record_failure(overloaded=True)
+        assert throttle.batch_size.value == 12
+        throttle.record_failure(overloaded=False)
+        assert throttle.batch_size.value == 12
+        assert (throttle.requests, throttle.slow, throttle.errors) == (4, 1, 2)
+
+    def test_overload_errors(self):
+        """Test which errors count as NetBox overload."""
+        assert is_overload_error(NetBoxAPIError(429, "Too Many Requests"))
+        assert is_overload_error(NetBoxAPIError(502, "Bad Gateway"))
+        assert is_overload_error(NetBoxAPIError(None, "Connection reset"))
+        assert is_overload_error(asyncio.TimeoutError())
+        assert not is_overload_error(NetBoxAPIError(400, "Invalid address"))
+        assert not is_overload_error(ValueError("bad"))
+
+
+class TestRetryQueue:
+    """Test suite for the jittered backoff retry queue."""
+
+    def test_backoff_is_jittered_and_capped(self):
+        """Test that backoffs stay within the capped exponential bound."""
+        queue = RetryQueue(base=1.0, cap=8.0, rng=random.Random(1))
+        for attempt in range(6):
+            assert 0 <= queue.backoff(attempt) <= min(8.0, 2 ** attempt)
+
+    def test_release_order_and_give_up(self):
+        """Test that items come back when due and are given up on after max attempts."""
+        queue = RetryQueue(base=1.0, max_attempts=2, rng=random.Random(1))
+        queue.push("a", attempt=1, delay=5.0, now=0.0)
+        assert queue.retry("b", 1, Exception("slow"), retry_after=2.0, now=0.0)
+        assert not queue.retry("c", 2, Exception("down"), now=0.0)
+
+        assert queue.pop_ready(now=1.0) == []
+        assert queue.pop_ready(now=2.5) == [("b", 1)]
+        assert queue.next_delay(now=2.5) == 2.5
+        assert queue.pop_ready(now=5.0) == [("a", 1)]
+        assert [item for item, _ in queue.failed] == ["c"]
+
+
+class TestPipelineWrites:
+    """Test suite for the pipeline's throttled NetBox writes."""
+
+    def make_pipeline(self, netbox, batch_size=4):
+        return SyncPipeline(None, netbox, batch_size=batch_size,
+                            retry_queue_factory=lambda: RetryQueue(base=0.001, max_attempts=3))
+
+    def test_overloaded_batch_is_retried(self):
+        """Test that a batch rejected with 503 is retried and the batch size is cut."""
+        netbox = FlakyNetBox(lambda batch, call: NetBoxAPIError(503, "Unavailable") if call == 1 else None)
+        pipeline = self.make_pipeline(netbox)
+
+        failed = asyncio.run(pipeline.write_ip_addresses(items(4)))
+
+        assert failed == []
+        # The first batch of 4 fails, then its items are resent starting at half the batch size;
+        # successful retries may grow it again
+        assert len(netbox.batches[0]) == 4
+        assert sorted(address for batch in netbox.batches[1:] for address in batch) == \
+            [item["address"] for item in items(4)]
+        assert len(netbox.batches[1]) <= 2
+        assert pipeline.throttle.errors == 1
+
+    def test_overloaded_items_give_up_after_max_attempts(self):
+        """Test that items are given up on once NetBox keeps failing past the attempt limit."""
+        netbox = FlakyNetBox(lambda batch, call: NetBoxAPIError(503, "Unavailable"))
+        pipeline = self.make_pipeline(netbox, batch_size=1)
+
+        failed = asyncio.run(pipeline.write_ip_addresses(items(2)))
+
+        assert len(failed) == 2
+        assert len(netbox.batches) == 6
+
+    def test_invalid_item_is_isolated(self):
+        """Test that a batch failing validation is split so only the bad item fails."""
+        def fail(batch, call):
+            if any(item["address"] == "10.0.0.3/24" for item in batch):
+                return NetBoxAPIError(400, "Duplicate IP address")
+            return None
+
+        netbox = FlakyNetBox(fail)
+        pipeline = self.make_pipeline(netbox)
+
+        failed = asyncio.run(pipeline.write_ip_addresses(items(4)))
+
+        assert [item["address"] for item, _ in failed] == ["10.0.0.3/24"]
+        assert pipeline.results["failed"] == 1
+        # One failed bulk request, then each item alone; the invalid one is not retried
+        assert netbox.batches[1:] == [[f"10.0.0.{host}/24"] for host in range(1, 5)]
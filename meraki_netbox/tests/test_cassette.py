@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clients.cassette import Cassette, CassetteMissError
+
+
+class FakeDashboard(BaseHTTPRequestHandler):
+    """Serves a network list that contains a secret, counting the requests."""
+
+    requests_seen = 0
+
+    def do_GET(self):
+        FakeDashboard.requests_seen += 1
+        body = json.dumps([{"id": "N_1", "name": "Branch", "psk": "hunter2"}]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Set-Cookie", "session=abc")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def dashboard_url():
+    server = HTTPServer(("127.0.0.1", 0), FakeDashboard)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestCassette:
+    """Test suite for recording and replaying HTTP traffic."""
+
+    def test_record_then_replay_offline(self, tmp_path, dashboard_url):
+        """Test that a recorded request is served again without the server, sanitized."""
+        path = str(tmp_path / "run.json.gz")
+        recorder = Cassette(path, "record")
+        session = recorder.requests_session()
+        session.headers["X-Cisco-Meraki-API-Key"] = "secret-key"
+        live = session.get(f"{dashboard_url}/api/v1/organizations/1/networks", params={"perPage": 1000})
+        assert live.json()[0]["psk"] == "hunter2"
+        recorder.save()
+
+        FakeDashboard.requests_seen = 0
+        replayer = Cassette(path, "replay", latency_scale=0)
+        replayed = replayer.requests_session().get("https://api.meraki.com/api/v1/organizations/1/networks",
+                                                   params={"perPage": 1000})
+
+        assert FakeDashboard.requests_seen == 0
+        assert replayed.status_code == 200 and replayed.ok
+        assert replayed.json() == [{"id": "N_1", "name": "Branch", "psk": "REDACTED"}]
+        assert "Set-Cookie" not in replayed.headers
+        with open(path, "rb") as cassette_file:
+            assert b"secret-key" not in cassette_file.read()
+
+    def test_replay_order_and_fallback(self, tmp_path):
+        """Test that repeats are served in recorded order and unmatched queries fall back to the path."""
+        path = str(tmp_path / "run.json.gz")
+        recorder = Cassette(path, "record")
+        for status, body in ((302, ""), (200, '{"results": []}')):
+            recorder.record("GET", "https://api.meraki.com/api/v1/organizations", None, None, status,
+                            {"Location": "https://n1.meraki.com/api/v1/organizations"}, body, 0.25)
+        recorder.record("GET", "https://api.meraki.com/api/v1/organizations/1/configurationChanges",
+                        {"t0": "2024-01-01T00:00:00Z"}, None, 200, {}, "[]", 0.1)
+        recorder.save()
+
+        replayer = Cassette(path, "replay")
+        first = replayer.lookup("GET", "https://n1.meraki.com/api/v1/organizations")
+        second = replayer.lookup("GET", "https://n1.meraki.com/api/v1/organizations")
+        repeat = replayer.lookup("GET", "https://n1.meraki.com/api/v1/organizations")
+        assert (first["status"], second["status"], repeat["status"]) == (302, 200, 200)
+        assert replayer.delay(first) == 0.25
+
+        changes = replayer.lookup("GET", "https://api.meraki.com/api/v1/organizations/1/configurationChanges",
+                                  {"t0": "2024-06-01T00:00:00Z"})
+        assert changes["body"] == "[]"
+        with pytest.raises(CassetteMissError):
+            replayer.lookup("POST", "https://api.meraki.com/api/v1/organizations")
+        assert replayer.misses == 1
+
+    def test_async_replay(self, tmp_path):
+        """Test that the aiohttp wrapper serves NetBox responses the way AsyncNetBoxClient reads them."""
+        path = str(tmp_path / "run.json.gz")
+        recorder = Cassette(path, "record")
+        recorder.record("POST", "http://netbox/api/ipam/prefixes/", None, {"prefix": "10.0.0.0/24"}, 201,
+                        {"Content-Type": "application/json"}, '{"id": 7}', 0.05)
+        recorder.save()
+
+        class Closable:
+            async def close(self):
+                self.closed = True
+
+        async def replay():
+            inner = Closable()
+            session = Cassette(path, "replay", latency_scale=0).wrap_aiohttp(inner)
+            async with session.request("POST", "http://nb.local/api/ipam/prefixes/",
+                                       json={"prefix": "10.0.0.0/24"}) as response:
+                result = (response.status, await response.json(content_type=None))
+            await session.close()
+            return result, inner.closed
+
+        assert asyncio.run(replay()) == ((201, {"id": 7}), True)
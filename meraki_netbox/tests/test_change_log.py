@@ -0,0 +1,66 @@
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sync.change_log import ChangeLogTracker, affected_networks
+from utils.cursors import CursorStore
+
+
+class FakeMeraki:
+    cache = None
+
+    def __init__(self, changes):
+        self.changes = changes
+        self.queries = []
+
+    def get_configuration_changes(self, organization_id, t0):
+        self.queries.append((organization_id, t0))
+        return self.changes
+
+    def get_networks(self, organization_id):
+        return [{'id': 'N_1', 'name': 'Branch 1'}, {'id': 'N_2', 'name': 'Branch 2'}]
+
+
+class TestChangeLog:
+    """Test suite for change-log driven incremental sync."""
+
+    def test_affected_networks(self):
+        """Test that only VLAN, subnet and DHCP changes name networks to sync."""
+        changes = [
+            {'networkId': 'N_1', 'page': 'Security appliance > Addressing & VLANs', 'label': 'VLAN'},
+            {'networkId': 'N_2', 'page': 'Wireless > SSIDs', 'label': 'Name'},
+            {'networkId': 'N_3', 'page': 'Security appliance > DHCP', 'label': 'Fixed IP assignments'},
+        ]
+        assert affected_networks(changes) == {'N_1', 'N_3'}
+        # A relevant change without a network can't be narrowed down
+        assert affected_networks(changes + [{'page': 'Organization > VLAN profiles', 'label': 'VLAN'}]) is None
+
+    def test_tracker_reads_from_last_run(self, tmp_path):
+        """Test that the first run is a full sync and later runs read the log from the last one."""
+        cursors = CursorStore(str(tmp_path / 'cursors.json'))
+        meraki = FakeMeraki([{'networkId': 'N_2', 'page': 'Addressing & VLANs', 'label': 'Subnet'}])
+        tracker = ChangeLogTracker(meraki, cursors, overlap=60)
+
+        assert tracker.changed_networks('org_1', now=1_700_000_000) is None
+        tracker.commit('org_1', 1_700_000_000)
+
+        restored = ChangeLogTracker(meraki, CursorStore(str(tmp_path / 'cursors.json')), overlap=60)
+        assert restored.changed_networks('org_1', now=1_700_003_600) == [{'id': 'N_2', 'name': 'Branch 2'}]
+        assert meraki.queries == [('org_1', '2023-11-14T22:12:20Z')]
+
+    def test_unknown_network_falls_back_to_full_sync(self, tmp_path):
+        """Test that a change to a network outside the organization's list syncs the organization."""
+        tracker = ChangeLogTracker(FakeMeraki([{'networkId': 'L_template', 'label': 'VLAN'}]),
+                                   CursorStore(str(tmp_path / 'cursors.json')))
+        tracker.commit('org_1', 100)
+        assert tracker.changed_networks('org_1', now=200) is None
+
+    def test_client_cadence(self, tmp_path):
+        """Test that client IPs are due on their own interval."""
+        tracker = ChangeLogTracker(FakeMeraki([]), CursorStore(str(tmp_path / 'cursors.json')))
+        assert tracker.clients_due('org_1', 60, now=0)
+        tracker.commit_clients('org_1', 0)
+        assert not tracker.clients_due('org_1', 60, now=3599)
+        assert tracker.clients_due('org_1', 60, now=3600)
@@ -0,0 +1,52 @@
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clients.client_table import ClientTable, int_to_mac, mac_to_int
+
+
+class TestClientTable:
+    """Test suite for the columnar client table."""
+
+    def test_extend_projects_client_fields(self):
+        """Test that only IP, MAC and description are kept per client."""
+        table = ClientTable()
+        added = table.extend("N_1", [
+            {"ip": "192.168.10.5", "mac": "aa:bb:cc:dd:ee:ff", "description": "iPhone",
+             "usage": {"sent": 1, "recv": 2}, "os": "iOS"},
+            {"ip": None, "mac": "aa:bb:cc:dd:ee:01", "description": "IPv6 only"},
+            {"ip": "not-an-ip", "mac": "aa:bb:cc:dd:ee:02"},
+            {"ip": "192.168.10.6", "mac": "aa:bb:cc:dd:ee:03", "description": None},
+        ])
+
+        assert added == 2
+        assert list(table) == [
+            ("N_1", "192.168.10.5", "aa:bb:cc:dd:ee:ff", "iPhone"),
+            ("N_1", "192.168.10.6", "aa:bb:cc:dd:ee:03", None),
+        ]
+
+    def test_extend_respects_limit(self):
+        """Test that the limit caps the rows added per call."""
+        table = ClientTable()
+        clients = [{"ip": f"10.0.0.{i}", "mac": f"00:00:00:00:00:{i:02x}"} for i in range(1, 10)]
+
+        assert table.extend("N_1", clients, limit=3) == 3
+        assert len(table) == 3
+        assert table.descriptions[0] == "Unknown Device"
+
+    def test_rows_remember_their_network(self):
+        """Test that one table can hold clients from several networks."""
+        table = ClientTable()
+        table.append("N_1", "10.0.0.1", "00:00:00:00:00:01")
+        table.append("N_2", "10.0.0.1", "00:00:00:00:00:02")
+        table.append("N_1", "10.0.0.2", "00:00:00:00:00:03")
+
+        assert table.network_ids == ["N_1", "N_2"]
+        assert list(table.network_codes) == [0, 1, 0]
+        assert table.network_id(1) == "N_2"
+
+    def test_mac_round_trip(self):
+        """Test MAC address integer conversion."""
+        assert int_to_mac(mac_to_int("AA-BB-CC-00-11-22")) == "aa:bb:cc:00:11:22"
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sync.daemon import AdaptiveSchedule, SyncDaemon
+from sync.scheduler import SyncScheduler
+
+
+class FakePipeline:
+    """Stands in for SyncPipeline; network N_busy gets a new VLAN on every fetch."""
+
+    def __init__(self):
+        self.fetches = []
+        self.netbox = None
+
+    async def fetch_and_plan(self, network):
+        self.fetches.append(network['id'])
+        vlans = [{'id': 1, 'subnet': '10.0.1.0/24'}]
+        if network['id'] == 'N_busy':
+            vlans.append({'id': len(self.fetches) + 1, 'subnet': '10.0.2.0/24'})
+        fetched = {'network': network, 'vlans': vlans, 'reservations': {}, 'clients': None}
+        return fetched, {'network_id': network['id'], 'network_name': network['name']}
+
+    async def sync_plan(self, plan):
+        return {'vlans': 1, 'dhcp_reservations': 0, 'client_ips': 0}, False
+
+
+class TestAdaptiveSchedule:
+    """Test suite for per-network adaptive sync intervals."""
+
+    def test_intervals_follow_changes(self):
+        """Test that changing networks are synced more often and static ones less often."""
+        schedule = AdaptiveSchedule(min_interval=60, max_interval=3600, initial_interval=600)
+        schedule.update_networks([{'id': 'N_1', 'name': 'Busy'}, {'id': 'N_2', 'name': 'Static'}], now=0)
+        assert [network['id'] for network in schedule.due(now=0)] == ['N_1', 'N_2']
+
+        # The first sync only records the baseline
+        assert schedule.record('N_1', 'a', cost=3, now=0) is False
+        schedule.record('N_2', 'x', cost=3, now=0)
+        assert schedule.networks['N_1']['next_due'] == 600
+
+        for step, fingerprint in enumerate('bcde', start=1):
+            assert schedule.record('N_1', fingerprint, cost=3, now=step) is True
+            schedule.record('N_2', 'x', cost=3, now=step)
+
+        assert schedule.networks['N_1']['interval'] == 60
+        assert schedule.networks['N_2']['interval'] == 600 * 1.5 ** 4
+        assert schedule.networks['N_1']['change_rate'] > 0.7
+        assert schedule.networks['N_2']['change_rate'] == 0
+
+    def test_budget_stretches_intervals(self):
+        """Test that intervals needing more calls than the budget are stretched evenly."""
+        schedule = AdaptiveSchedule(min_interval=60, max_interval=60, initial_interval=60, budget=10)
+        schedule.update_networks([{'id': f'N_{index}', 'name': str(index)} for index in range(4)], now=0)
+        for index in range(4):
+            schedule.record(f'N_{index}', 'x', cost=5, now=0)
+
+        # Four networks of 5 calls a minute need 20 calls per minute, twice the budget
+        assert schedule.demand() == 20
+        assert schedule.networks['N_0']['next_due'] == 120
+
+    def test_state_survives_restarts(self, tmp_path):
+        """Test that learned intervals are restored and interrupted syncs are due again."""
+        path = str(tmp_path / 'daemon_state.json')
+        schedule = AdaptiveSchedule(min_interval=60, max_interval=3600, initial_interval=600)
+        schedule.update_networks([{'id': 'N_1', 'name': 'One'}, {'id': 'N_2', 'name': 'Two'}], now=0)
+        schedule.record('N_1', 'a', cost=2, now=0)
+        schedule.record('N_1', 'a', cost=2, now=0)
+        schedule.start('N_2')
+        schedule.save(path)
+
+        restored = AdaptiveSchedule()
+        restored.load(path)
+        assert restored.networks['N_1']['interval'] == 900
+        assert [network['id'] for network in restored.due(now=1)] == ['N_2']
+
+
+class TestSyncDaemon:
+    """Test suite for the sync daemon loop."""
+
+    def test_busy_networks_are_synced_more_often(self):
+        """Test that the daemon re-syncs a changing network before a static one."""
+        pipeline = FakePipeline()
+        schedule = AdaptiveSchedule(min_interval=0.02, max_interval=10, initial_interval=0.05)
+        networks = [{'id': 'N_busy', 'name': 'Busy'}, {'id': 'N_static', 'name': 'Static'}]
+        daemon = SyncDaemon(None, pipeline, SyncScheduler(workers=1), schedule, networks=networks)
+
+        async def run():
+            stop = asyncio.Event()
+            asyncio.get_event_loop().call_later(0.5, stop.set)
+            return await daemon.run(stop)
+
+        results = asyncio.run(run())
+
+        assert results['errors'] == 0
+        assert pipeline.fetches.count('N_busy') > 2 * pipeline.fetches.count('N_static')
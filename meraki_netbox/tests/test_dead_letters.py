@@ -0,0 +1,102 @@
+import asyncio
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sync.ip_sync import IPSynchronizer
+from sync.replay import replay_dead_letters
+from utils.dead_letters import DeadLetterStore
+
+
+class FakeAsyncNetBox:
+    """Async NetBox stand-in that rejects the IP addresses listed in reject."""
+
+    def __init__(self, reject=()):
+        self.reject = set(reject)
+        self.prefixes = []
+        self.ip_batches = []
+
+    async def get_network_scope(self, network_id, network_name):
+        return {"vlan_group": {"id": 1}, "vrf": {"id": 7}}
+
+    async def create_or_update_prefix(self, **kwargs):
+        self.prefixes.append(kwargs)
+
+    async def bulk_apply_ip_addresses(self, items):
+        self.ip_batches.append(items)
+        if any(item["address"] in self.reject for item in items):
+            raise ValueError("Invalid address")
+
+
+class TestDeadLetterStore:
+    """Test suite for the dead-letter store."""
+
+    def test_repeated_failures_are_counted(self, tmp_path):
+        """Test that the same object failing again updates one entry."""
+        store = DeadLetterStore(str(tmp_path / "dead.sqlite"))
+        store.add("ip_address", "N_1:10.0.0.5", {"address": "10.0.0.5/24"}, "timeout", now=1.0)
+        store.add("ip_address", "N_1:10.0.0.5", {"address": "10.0.0.5/24"}, "HTTP 500", now=2.0)
+
+        entries = store.entries()
+        assert len(entries) == 1
+        assert (entries[0]["attempts"], entries[0]["error"]) == (2, "HTTP 500")
+        assert (entries[0]["first_failed_at"], entries[0]["last_failed_at"]) == (1.0, 2.0)
+
+    def test_discard_survives_reopen(self, tmp_path):
+        """Test that entries persist across instances and are dropped on success."""
+        path = str(tmp_path / "dead.sqlite")
+        DeadLetterStore(path).add("prefix", "N_1:10.0.0.0/24", {"prefix": "10.0.0.0/24"}, "error")
+
+        store = DeadLetterStore(path)
+        store.discard("prefix", "N_1:10.0.0.0/24")
+
+        assert len(DeadLetterStore(path)) == 0
+
+    def test_failed_ip_write_is_stored(self, tmp_path):
+        """Test that the IP synchronizer keeps failed writes with their payload."""
+        store = DeadLetterStore(str(tmp_path / "dead.sqlite"))
+        netbox = MagicMock()
+        netbox.create_or_update_ip_address.side_effect = Exception("HTTP 503")
+        synchronizer = IPSynchronizer(MagicMock(), netbox, dead_letters=store)
+
+        synchronizer._create_ip_with_subnet("10.0.0.5", "10.0.0.0/24", "Printer",
+                                            network_id="N_1", network_name="Office")
+
+        entry = store.entries("ip_address")[0]
+        assert entry["key"] == "N_1:10.0.0.5"
+        assert entry["payload"]["address"] == "10.0.0.5/24"
+        assert entry["payload"]["parent"] == "10.0.0.0/24"
+
+
+class TestReplay:
+    """Test suite for replaying dead letters."""
+
+    def test_replay_applies_and_keeps_failures(self, tmp_path):
+        """Test that replay writes stored objects in bulk and keeps only those failing again."""
+        store = DeadLetterStore(str(tmp_path / "dead.sqlite"))
+        store.add("prefix", "N_1:10.0.0.0/24", {
+            "prefix": "10.0.0.0/24", "description": "Data", "vlan_id": 10, "vlan_name": "Data",
+            "network_id": "N_1", "network_name": "Office",
+        }, "error")
+        for host in (5, 6):
+            store.add("ip_address", f"N_1:10.0.0.{host}", {
+                "address": f"10.0.0.{host}/24", "description": "Client", "dns_name": None,
+                "status": "active", "parent": "10.0.0.0/24", "network_id": "N_1", "network_name": "Office",
+            }, "error")
+        meraki = MagicMock()
+        meraki.get_dhcp_reservations.return_value = {"aa:bb:cc:dd:ee:01": {"ip": "10.0.0.9", "name": "Printer"}}
+        store.add("dhcp_reservations", "N_1:10", {
+            "network_id": "N_1", "network_name": "Office",
+            "vlan": {"id": 10, "name": "Data", "subnet": "10.0.0.0/24"},
+        }, "error")
+        netbox = FakeAsyncNetBox(reject={"10.0.0.6/24"})
+
+        counts = asyncio.run(replay_dead_letters(store, netbox, meraki))
+
+        assert counts == {"replayed": 4, "failed": 1}
+        assert netbox.prefixes[0]["vrf"] == {"id": 7}
+        assert len(netbox.ip_batches[0]) == 3
+        assert [entry["key"] for entry in store.entries()] == ["N_1:10.0.0.6"]
@@ -0,0 +1,42 @@
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sync.dns_names import sanitize_dns_name, sanitize_dns_names, MAX_LABEL_LENGTH, MAX_NAME_LENGTH
+
+
+class TestDnsNames:
+    """Test suite for DNS name sanitization."""
+
+    def test_sanitize_replaces_invalid_characters(self):
+        """Test that invalid characters collapse into single hyphens."""
+        assert sanitize_dns_name("John's  iPhone!") == "John-s-iPhone"
+
+    def test_placeholder_names_rejected(self):
+        """Test that Meraki placeholder names produce no DNS name."""
+        assert sanitize_dns_name("Unknown Device") is None
+        assert sanitize_dns_name("NONE") is None
+        assert sanitize_dns_name("") is None
+        assert sanitize_dns_name("!!!") is None
+
+    def test_label_and_name_length_limits(self):
+        """Test that DNS label and total name lengths are enforced."""
+        assert len(sanitize_dns_name("a" * 100)) == MAX_LABEL_LENGTH
+
+        long_name = ".".join(["b" * 60] * 6)
+        sanitized = sanitize_dns_name(long_name)
+        assert len(sanitized) <= MAX_NAME_LENGTH
+        assert all(len(label) <= MAX_LABEL_LENGTH for label in sanitized.split("."))
+
+    def test_empty_labels_and_wildcards(self):
+        """Test that empty labels are dropped and '*' only survives as a whole label."""
+        assert sanitize_dns_name("printer..office.") == "printer.office"
+        assert sanitize_dns_name("*.lab") == "*.lab"
+        assert sanitize_dns_name("ab*cd") == "ab-cd"
+
+    def test_batch_preserves_order(self):
+        """Test that the batch API matches the single-name API in order."""
+        names = ["iPhone", None, "Unknown Device", "iPhone", "Lab PC"]
+        assert sanitize_dns_names(names) == ["iPhone", None, None, "iPhone", "Lab-PC"]
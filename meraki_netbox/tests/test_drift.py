@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sync.drift import CURSOR_NAME, DriftDetector
+from utils.cursors import CursorStore
+from utils.plan_cache import PlanCache
+
+# 2024-01-01T00:00:00Z
+T0 = 1704067200
+
+
+class FakeChangeLog:
+    """Stands in for AsyncNetBoxClient's change log methods."""
+
+    def __init__(self, changes):
+        self.changes = changes
+        self.reads = []
+
+    async def latest_object_change_id(self):
+        return self.changes[-1]["id"] if self.changes else 0
+
+    async def fetch_object_changes(self, after_id, object_types, exclude_user=None):
+        self.reads.append(after_id)
+        return [change for change in self.changes if change["id"] > after_id
+                and change["changed_object_type"] in object_types]
+
+
+def change(change_id, object_type, object_id, minute):
+    return {"id": change_id, "time": f"2024-01-01T00:{minute:02d}:00.000000Z",
+            "changed_object_type": object_type, "changed_object_id": object_id}
+
+
+class TestDriftDetector:
+    """Test suite for change-log based drift detection."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.changes = []
+
+    def make_detector(self, tmp_path):
+        self.plan_cache = PlanCache(str(tmp_path / "plans.sqlite"), drift_check_hours=1)
+        self.cursors = CursorStore(str(tmp_path / "cursors.json"))
+        self.netbox = FakeChangeLog(self.changes)
+        return DriftDetector(self.netbox, self.cursors, self.plan_cache, clock_skew=0)
+
+    def test_first_check_starts_following(self, tmp_path):
+        """Test that without a cursor the log is followed from its newest entry, invalidating nothing."""
+        self.changes.append(change(41, "ipam.prefix", 1, 0))
+        detector = self.make_detector(tmp_path)
+        self.plan_cache.put("N_1", "hash", {"prefixes": [1], "ip_addresses": []}, now=T0 - 600)
+
+        assert asyncio.run(detector.check(now=T0)) is None
+        assert self.cursors.get(CURSOR_NAME)["id"] == 41
+        assert self.plan_cache.get("N_1") is not None
+        assert self.netbox.reads == []
+
+    def test_edited_networks_are_invalidated(self, tmp_path):
+        """Test that only networks with objects changed after their write lose their plan."""
+        detector = self.make_detector(tmp_path)
+        asyncio.run(detector.check(now=T0))
+        self.plan_cache.put("N_1", "hash", {"prefixes": [1], "ip_addresses": [10, 11]}, now=T0 + 60)
+        self.plan_cache.put("N_2", "hash", {"prefixes": [2], "ip_addresses": [20]}, now=T0 + 60)
+        self.plan_cache.put("N_3", "hash", {"prefixes": [3], "ip_addresses": []}, now=T0 + 300)
+        self.changes.extend([
+            # The sync's own write of N_3, before its plan was recorded
+            change(1, "ipam.prefix", 3, 4),
+            # A manual edit of an IP address of N_1
+            change(2, "ipam.ipaddress", 11, 10),
+            change(3, "dcim.device", 20, 11),
+        ])
+
+        stale = asyncio.run(detector.check(now=T0 + 3 * 3600))
+
+        assert stale == ["N_1"]
+        assert self.plan_cache.get("N_1") is None
+        # The others are vouched for by the change log, so no drift check is due
+        for network_id in ("N_2", "N_3"):
+            record = self.plan_cache.get(network_id)
+            assert not self.plan_cache.needs_drift_check(record, now=T0 + 3 * 3600)
+        assert self.cursors.get(CURSOR_NAME)["id"] == 2
@@ -0,0 +1,72 @@
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clients.meraki_client import MerakiClient
+from utils.inventory_cache import InventoryCache
+
+
+class TestInventoryCache:
+    """Test suite for the on-disk Meraki inventory cache."""
+
+    def test_entries_expire_after_ttl(self, tmp_path):
+        """Test that entries are served until their kind's TTL runs out."""
+        cache = InventoryCache(str(tmp_path / "cache.sqlite"), ttls={"vlans": 60})
+        cache.put("vlans", "N_1", [{"id": 10}], now=1000.0)
+
+        assert cache.get("vlans", "N_1", now=1030.0) == [{"id": 10}]
+        assert cache.get("vlans", "N_1", now=1061.0) is None
+
+    def test_put_reports_content_changes(self, tmp_path):
+        """Test that storing identical content is not reported as a change."""
+        cache = InventoryCache(str(tmp_path / "cache.sqlite"))
+
+        assert cache.put("networks", "org_1", [{"id": "N_1", "name": "A"}]) is True
+        assert cache.put("networks", "org_1", [{"name": "A", "id": "N_1"}]) is False
+        assert cache.put("networks", "org_1", [{"id": "N_1", "name": "B"}]) is True
+
+    def test_invalidate_network(self, tmp_path):
+        """Test that a webhook invalidation drops the network's VLANs and org network list."""
+        cache = InventoryCache(str(tmp_path / "cache.sqlite"))
+        cache.put("vlans", "N_1", [])
+        cache.put("vlans", "N_2", [])
+        cache.put("networks", "org_1", [])
+
+        cache.invalidate_network("N_1", "org_1")
+
+        assert cache.get("vlans", "N_1") is None
+        assert cache.get("vlans", "N_2") == []
+        assert cache.get("networks", "org_1") is None
+
+    def test_meraki_client_uses_cache(self, tmp_path):
+        """Test that a cached MerakiClient only calls the API once per fresh entry."""
+        client = MerakiClient(api_key="test_api_key", cache=InventoryCache(str(tmp_path / "cache.sqlite")))
+        client.dashboard = MagicMock()
+        client.dashboard.appliance.getNetworkApplianceVlans.return_value = [{"id": 10}]
+
+        assert client.get_vlans("N_1") == [{"id": 10}]
+        assert client.get_vlans("N_1") == [{"id": 10}]
+        client.dashboard.appliance.getNetworkApplianceVlans.assert_called_once_with("N_1")
+
+    def test_vlan_details_refetched_only_when_vlans_change(self, tmp_path):
+        """Test that cached VLAN details are dropped when a refreshed VLAN list differs."""
+        cache = InventoryCache(str(tmp_path / "cache.sqlite"), ttls={"vlans": 0})
+        client = MerakiClient(api_key="test_api_key", cache=cache)
+        client.dashboard = MagicMock()
+        appliance = client.dashboard.appliance
+        appliance.getNetworkApplianceVlans.return_value = [{"id": 10, "fixedIpAssignments": {}}]
+        appliance.getNetworkApplianceVlan.return_value = {"id": 10, "fixedIpAssignments": {}}
+
+        client.get_vlans("L_1")
+        client.get_dhcp_reservations("L_1", 10)
+        client.get_vlans("L_1")
+        client.get_dhcp_reservations("L_1", 10)
+        assert appliance.getNetworkApplianceVlan.call_count == 1
+
+        appliance.getNetworkApplianceVlans.return_value = [{"id": 10, "fixedIpAssignments": {"aa": {}}}]
+        client.get_vlans("L_1")
+        client.get_dhcp_reservations("L_1", 10)
+        assert appliance.getNetworkApplianceVlan.call_count == 2
@@ -0,0 +1,47 @@
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clients.key_pool import ApiKeyPool
+
+
+class TestApiKeyPool:
+    """Test suite for spreading organizations over API keys."""
+
+    def test_organizations_spread_and_stick(self):
+        """Test that new organizations go to the least loaded key and then stay on it."""
+        pool = ApiKeyPool(["key-a", "key-b"])
+        first = pool.acquire("org_1")
+        second = pool.acquire("org_2")
+        assert {first, second} == {"key-a", "key-b"}
+
+        # org_1's key is busier now, but within the slack, so org_1 keeps it
+        pool.use(first)
+        assert pool.acquire("org_1") == first
+        assert [stats["organizations"] for stats in pool.stats()] == [1, 1]
+
+    def test_rate_limited_key_loses_organizations(self):
+        """Test that a key drawing 429s hands its organizations to a quieter key."""
+        pool = ApiKeyPool(["key-a", "key-b"])
+        pool.release(pool.acquire("org_1"))
+        for _ in range(3):
+            pool.record_rate_limit("key-a")
+
+        assert pool.acquire("org_1") == "key-b"
+        assert pool.stats()[0]["rate_limited"] == 3
+
+    def test_refused_keys(self):
+        """Test that 401 benches a key and 403 only drops it for the organization."""
+        pool = ApiKeyPool(["key-a", "key-b"], cooldown=600)
+        pool.grant("key-a", ["org_1", "org_2"])
+        pool.grant("key-b", ["org_1", "org_2"])
+
+        pool.record_auth_failure("key-a", "org_1", status=403)
+        assert pool.acquire("org_1") == "key-b"
+        assert pool.acquire("org_2") == "key-a"
+
+        pool.record_auth_failure("key-b", status=401)
+        assert pool.acquire("org_3") == "key-a"
+        assert [stats["healthy"] for stats in pool.stats()] == [True, False]
@@ -113,3 +113,70 @@ class TestMerakiClient:
         # Verify results
         assert vlans == []
         mock_instance.appliance.getNetworkApplianceVlans.assert_called_once_with("N_123")
+
+    @patch('meraki.DashboardAPI')
+    def test_get_network_client_table(self, mock_dashboard):
+        """Test that clients are projected into a ClientTable."""
+        # Setup mock
+        mock_instance = MagicMock()
+        mock_dashboard.return_value = mock_instance
+        mock_instance.networks.getNetworkClients.return_value = [
+            {"ip": "192.168.10.5", "mac": "aa:bb:cc:dd:ee:ff", "description": "iPhone", "os": "iOS"}
+        ]
+
+        # Test the method
+        client = MerakiClient(api_key="test_api_key")
+        table = client.get_network_client_table("N_123")
+
+        # Verify results
+        assert len(table) == 1
+        assert table.row(0) == ("N_123", "192.168.10.5", "aa:bb:cc:dd:ee:ff", "iPhone")
+        mock_instance.networks.getNetworkClients.assert_called_once_with("N_123")
+
+    @patch('meraki.DashboardAPI')
+    def test_tuned_profile_settings(self, mock_dashboard):
+        """Test that the tuned profile is passed to the SDK and explicit settings win."""
+        with patch.dict(os.environ, {"MERAKI_MAXIMUM_RETRIES": "7"}, clear=True):
+            client = MerakiClient(api_key="test_api_key", profile="tuned", single_request_timeout=5)
+            client.get_organizations()
+
+        kwargs = mock_dashboard.call_args[1]
+        assert kwargs["output_log"] is False
+        assert kwargs["suppress_logging"] is True
+        assert kwargs["maximum_retries"] == 7
+        assert kwargs["single_request_timeout"] == 5
+        assert "log_path" not in kwargs
+
+    def test_unknown_profile(self):
+        """Test that an unknown SDK profile is rejected."""
+        with pytest.raises(ValueError):
+            MerakiClient(api_key="test_api_key", profile="turbo")
+
+    @patch('meraki.DashboardAPI')
+    def test_key_pool_retries_refused_key(self, mock_dashboard):
+        """Test that organizations are learned per key and a refused key's call moves to another key."""
+        class Refused(Exception):
+            status = 401
+
+        dashboards = {}
+
+        def build(api_key, **kwargs):
+            dashboards[api_key] = MagicMock()
+            dashboards[api_key].organizations.getOrganizations.return_value = [{"id": "1", "name": "Org 1"}]
+            dashboards[api_key].organizations.getOrganizationNetworks.return_value = [{"id": "N_1", "name": "Site"}]
+            return dashboards[api_key]
+
+        mock_dashboard.side_effect = build
+        client = MerakiClient(api_key="key-a", api_keys=["key-b"], output_log=False)
+        assert client.get_organizations() == [{"id": "1", "name": "Org 1"}]
+
+        client.get_networks("1")
+        used = next(key for key, dashboard in dashboards.items()
+                    if dashboard.organizations.getOrganizationNetworks.called)
+        other = "key-b" if used == "key-a" else "key-a"
+        dashboards[used].appliance.getNetworkApplianceVlans.side_effect = Refused()
+        dashboards[other].appliance.getNetworkApplianceVlans.return_value = [{"id": 10}]
+
+        assert client.get_vlans("N_1") == [{"id": 10}]
+        assert [stats["auth_failures"] for stats in client.key_pool.stats()] == \
+            [1 if key == used else 0 for key in ("key-a", "key-b")]
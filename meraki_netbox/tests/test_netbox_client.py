@@ -143,3 +143,110 @@ class TestNetBoxClient:
         assert existing_prefix.description == "Updated Description"
         assert existing_prefix.vlan == 10
         existing_prefix.save.assert_called_once()
+
+    @patch('pynetbox.api')
+    def test_create_or_update_vlan_scoped_by_group(self, mock_api):
+        """Test that the same VLAN ID in two VLAN groups maps to two NetBox VLANs."""
+        # Setup mock with no existing VLANs
+        mock_instance = MagicMock()
+        mock_api.return_value = mock_instance
+        mock_vlans = mock_instance.ipam.vlans
+        mock_vlans.create.side_effect = lambda data: MagicMock(id=data["group"], vid=data["vid"])
+
+        group_a = MagicMock(id=1)
+        group_b = MagicMock(id=2)
+
+        # Test the method
+        client = NetBoxClient(url="https://netbox.example.com", token="test_token_123")
+        client._fetch_all = MagicMock(return_value=[])
+        vlan_a = client.create_or_update_vlan(vlan_id=10, name="Data", vlan_group=group_a)
+        vlan_b = client.create_or_update_vlan(vlan_id=10, name="Data", vlan_group=group_b)
+        vlan_a_again = client.create_or_update_vlan(vlan_id=10, name="Data", vlan_group=group_a)
+
+        # Verify results: one index load per group, the repeat lookup hits the index
+        assert vlan_a is not vlan_b
+        assert vlan_a_again is vlan_a
+        assert mock_vlans.create.call_count == 2
+        assert client._fetch_all.call_count == 2
+        vlan_a.save.assert_called_once()
+
+    @patch('pynetbox.api')
+    def test_network_scope_gets_own_vrf_when_enabled(self, mock_api):
+        """Test that each network gets its own VRF only when NETBOX_VRF_PER_NETWORK turns it on."""
+        mock_instance = MagicMock()
+        mock_api.return_value = mock_instance
+        mock_instance.ipam.vrfs.get.return_value = None
+        mock_instance.ipam.vrfs.create.side_effect = lambda data: MagicMock(name=data["name"])
+
+        with patch.dict(os.environ, {"NETBOX_VRF_PER_NETWORK": "true"}):
+            client = NetBoxClient(url="https://netbox.example.com", token="test_token_123")
+            scope_a = client.get_network_scope("N_1", "Office")
+            scope_b = client.get_network_scope("N_2", "Lab")
+
+        assert scope_a["vrf"] is not None and scope_a["vrf"] is not scope_b["vrf"]
+        created = [call.args[0]["name"] for call in mock_instance.ipam.vrfs.create.call_args_list]
+        assert created == ["meraki-n_1", "meraki-n_2"]
+
+        # Off by default, so objects of earlier runs in the global table are updated in place
+        with patch.dict(os.environ, {}, clear=True):
+            client = NetBoxClient(url="https://netbox.example.com", token="test_token_123")
+            assert client.get_network_scope("N_3", "Depot")["vrf"] is None
+
+    @patch('pynetbox.api')
+    def test_create_or_update_prefix_uses_vrf_index(self, mock_api):
+        """Test that prefixes are looked up by (VRF, prefix) from a single index load."""
+        # Setup mock with one existing prefix in VRF 5
+        mock_instance = MagicMock()
+        mock_api.return_value = mock_instance
+        mock_prefixes = mock_instance.ipam.prefixes
+        existing_prefix = MagicMock(id=7, prefix="192.168.10.0/24")
+
+        # Test the method
+        client = NetBoxClient(url="https://netbox.example.com", token="test_token_123")
+        client._fetch_all = MagicMock(return_value=[existing_prefix])
+        prefix = client.create_or_update_prefix(
+            prefix="192.168.10.0/24",
+            description="Updated Description",
+            vrf=MagicMock(id=5)
+        )
+
+        # Verify results
+        assert prefix is existing_prefix
+        client._fetch_all.assert_called_once_with("prefixes", vrf_id=5)
+        mock_prefixes.create.assert_not_called()
+        assert 7 in client.seen_ids["prefixes"]
+
+    @patch('pynetbox.api')
+    def test_fetch_all_pages_in_parallel_with_projection(self, mock_api):
+        """Test that preloading requests projected fields and fetches every page by offset."""
+        # Setup mock: 5 objects, the server caps pages at 2 objects
+        mock_instance = MagicMock()
+        mock_api.return_value = mock_instance
+        endpoint = mock_instance.ipam.ip_addresses
+        endpoint.url = "https://netbox.example.com/api/ipam/ip-addresses"
+        endpoint.return_obj.side_effect = lambda values, api, ep: values
+
+        def get_page(url, params, headers):
+            offset = params["offset"]
+            response = MagicMock()
+            response.json.return_value = {
+                "count": 5,
+                "next": "more" if offset + 2 < 5 else None,
+                "results": [{"id": i} for i in range(offset, min(offset + 2, 5))],
+            }
+            return response
+
+        mock_instance.http_session.get.side_effect = get_page
+
+        # Test the method
+        client = NetBoxClient(url="https://netbox.example.com", token="test_token_123", page_size=1000)
+        records = client._fetch_all("ip_addresses", vrf_id="null")
+
+        # Verify results
+        assert sorted(record["id"] for record in records) == [0, 1, 2, 3, 4]
+        calls = mock_instance.http_session.get.call_args_list
+        assert sorted(call[1]["params"]["offset"] for call in calls) == [0, 2, 4]
+        assert calls[0][1]["params"]["limit"] == 1000
+        assert calls[1][1]["params"]["limit"] == 2
+        assert "dns_name" in calls[0][1]["params"]["fields"]
+        assert calls[0][1]["headers"]["Authorization"] == "Token test_token_123"
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clients.client_table import ClientTable
+from sync.pipeline import SyncPipeline
+from sync.plan import build_network_plan
+
+
+VLANS = [
+    {"id": 10, "name": "Data", "subnet": "192.168.10.0/24", "applianceIp": "192.168.10.1"},
+    {"id": 20, "name": "No subnet"},
+]
+
+
+def make_clients(network_id, rows):
+    clients = ClientTable()
+    for ip, mac, description in rows:
+        clients.append(network_id, ip, mac, description)
+    return clients
+
+
+class FakeAsyncNetBox:
+    """Records the writes the pipeline makes."""
+
+    def __init__(self):
+        self.prefixes = []
+        self.ip_batches = []
+        self.seen_ids = {"prefixes": set(), "ip_addresses": set()}
+
+    async def get_network_scope(self, network_id, network_name):
+        return {"vlan_group": {"id": 1}, "vrf": {"id": 7}}
+
+    async def create_or_update_prefix(self, **kwargs):
+        self.prefixes.append(kwargs)
+
+    async def bulk_apply_ip_addresses(self, items):
+        self.ip_batches.append(items)
+
+
+class TestBuildNetworkPlan:
+    """Test suite for the transform step."""
+
+    def test_plan_contents(self):
+        """Test that prefixes, reservations and clients are planned with their descriptions."""
+        reservations = {"10": {"aa:bb:cc:dd:ee:01": {"ip": "192.168.10.5", "name": "Printer 1"}}}
+        clients = make_clients("N_1", [
+            ("192.168.10.50", "aa:bb:cc:dd:ee:02", "Laptop"),
+            ("10.9.9.9", "aa:bb:cc:dd:ee:03", "Elsewhere"),
+        ])
+
+        plan = build_network_plan("N_1", "Office", VLANS, reservations, clients)
+
+        assert plan["prefixes"] == [{
+            "prefix": "192.168.10.0/24",
+            "description": "Meraki VLAN 10 - Data\nNetwork: Office\nGateway: 192.168.10.1",
+            "vlan_id": 10,
+            "vlan_name": "Data",
+        }]
+        assert [item["address"] for item in plan["ip_addresses"]] == ["192.168.10.5/24", "192.168.10.50/24"]
+        assert plan["ip_addresses"][0]["dns_name"] == "Printer-1"
+        assert plan["ip_addresses"][1]["parent"] == "192.168.10.0/24"
+        assert (plan["dhcp_reservations"], plan["client_ips"]) == (1, 1)
+
+    def test_client_overrides_reservation(self):
+        """Test that an address both reserved and active is planned once, as a client."""
+        reservations = {"10": {"aa:bb:cc:dd:ee:01": {"ip": "192.168.10.5", "name": "Printer"}}}
+        clients = make_clients("N_1", [("192.168.10.5", "aa:bb:cc:dd:ee:01", "Printer")])
+
+        plan = build_network_plan("N_1", "Office", VLANS, reservations, clients)
+
+        assert len(plan["ip_addresses"]) == 1
+        assert plan["ip_addresses"][0]["description"].startswith("Active Client")
+
+
+class TestSyncPipeline:
+    """Test suite for the staged sync pipeline."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.meraki = MagicMock()
+        self.meraki.get_networks.return_value = [{"id": "N_1", "name": "Office"}, {"id": "N_2", "name": "Lab"}]
+        self.meraki.get_vlans.return_value = VLANS
+        self.meraki.get_dhcp_reservations.return_value = {
+            "aa:bb:cc:dd:ee:01": {"ip": "192.168.10.5", "name": "Printer"}
+        }
+        self.meraki.get_network_client_table.side_effect = lambda network_id, limit=None: make_clients(
+            network_id, [("192.168.10.50", "aa:bb:cc:dd:ee:02", "Laptop")]
+        )
+        self.netbox = FakeAsyncNetBox()
+
+    def test_run_organization(self):
+        """Test that every network of an organization flows through all stages."""
+        pipeline = SyncPipeline(self.meraki, self.netbox, fetch_workers=2, write_workers=2, queue_size=1)
+
+        results = asyncio.run(pipeline.run(org_ids=["org_1"]))
+
+        assert results == {"networks": 2, "vlans": 2, "dhcp_reservations": 2, "client_ips": 2, "errors": 0,
+                           "failed": 0, "unchanged": 0}
+        assert all(prefix["vrf"] == {"id": 7} for prefix in self.netbox.prefixes)
+        assert all(item["vrf"] == 7 for batch in self.netbox.ip_batches for item in batch)
+
+    def test_network_without_vlans_is_skipped(self):
+        """Test that a network whose VLANs can't be fetched is skipped without stopping the run."""
+        self.meraki.get_vlans.side_effect = [Exception("VLANs are not enabled for this network"), VLANS]
+        pipeline = SyncPipeline(self.meraki, self.netbox, sync_clients=False, fetch_workers=1)
+
+        results = asyncio.run(pipeline.run(org_ids=["org_1"]))
+
+        assert results["networks"] == 1
+        assert results["client_ips"] == 0
+        self.meraki.get_network_client_table.assert_not_called()
+
+    def test_incomplete_networks_are_tracked(self):
+        """Test that failed and truncated networks are recorded for reconciliation."""
+        self.meraki.get_networks.return_value = [
+            {"id": "N_1", "name": "Office"}, {"id": "N_2", "name": "Lab"}, {"id": "N_3", "name": "Depot"}
+        ]
+        def get_vlans(network_id):
+            if network_id == "N_2":
+                raise Exception("Internal Server Error")
+            return VLANS
+
+        self.meraki.get_vlans.side_effect = get_vlans
+        pipeline = SyncPipeline(self.meraki, self.netbox, client_limit=1, fetch_workers=1)
+
+        asyncio.run(pipeline.run(org_ids=["org_1"]))
+
+        # N_2 failed outright; every network's client list hit the limit of 1
+        assert pipeline.incomplete == {"prefixes": {"N_2"}, "ip_addresses": {"N_1", "N_2", "N_3"}}
+
+    def test_batches_ip_writes(self):
+        """Test that IP addresses are written in batches of the configured size."""
+        self.meraki.get_network_client_table.side_effect = lambda network_id, limit=None: make_clients(
+            network_id, [(f"192.168.10.{host}", f"aa:bb:cc:dd:ee:{host:02x}", "Client") for host in range(60, 65)]
+        )
+        pipeline = SyncPipeline(self.meraki, self.netbox, sync_reservations=False, batch_size=2)
+
+        asyncio.run(pipeline.run(networks=[{"id": "N_1", "name": "Office"}]))
+
+        assert [len(batch) for batch in self.netbox.ip_batches] == [2, 2, 1]
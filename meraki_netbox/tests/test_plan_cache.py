@@ -0,0 +1,97 @@
+import asyncio
+import itertools
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sync.pipeline import SyncPipeline
+from utils.plan_cache import PlanCache
+
+
+VLANS = [{"id": 10, "name": "Data", "subnet": "192.168.10.0/24", "applianceIp": "192.168.10.1"}]
+
+
+class FakeAsyncNetBox:
+    """Async NetBox stand-in that hands out object IDs and counts the objects it still holds."""
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.existing = set()
+        self.writes = 0
+        self.seen_ids = {"prefixes": set(), "ip_addresses": set()}
+
+    async def get_network_scope(self, network_id, network_name):
+        return {"vlan_group": {"id": 1}, "vrf": {"id": 7}}
+
+    def _create(self):
+        object_id = next(self.ids)
+        self.existing.add(object_id)
+        return {"id": object_id}
+
+    async def create_or_update_prefix(self, **kwargs):
+        self.writes += 1
+        return self._create()
+
+    async def bulk_apply_ip_addresses(self, items):
+        self.writes += len(items)
+        return {"objects": [self._create() for _ in items]}
+
+    async def count_existing(self, kind, object_ids):
+        return len(self.existing & set(object_ids))
+
+
+class TestPlanCache:
+    """Test suite for the cross-run plan cache."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.meraki = MagicMock()
+        self.meraki.get_vlans.return_value = VLANS
+        self.meraki.get_dhcp_reservations.return_value = {
+            "aa:bb:cc:dd:ee:01": {"ip": "192.168.10.5", "name": "Printer"}
+        }
+        self.networks = [{"id": "N_1", "name": "Office"}]
+
+    def run_pipeline(self, netbox, cache):
+        pipeline = SyncPipeline(self.meraki, netbox, sync_clients=False, plan_cache=cache)
+        return asyncio.run(pipeline.run(networks=self.networks))
+
+    def test_plan_hash_ignores_key_order(self):
+        """Test that equal plans hash the same and settings change the hash."""
+        assert PlanCache.plan_hash({"a": 1, "b": [2]}) == PlanCache.plan_hash({"b": [2], "a": 1})
+        assert PlanCache.plan_hash({"a": 1}) != PlanCache.plan_hash({"a": 1}, {"vrf_per_network": True})
+
+    def test_unchanged_network_is_skipped(self, tmp_path):
+        """Test that a network with an unchanged plan is not written again but still counts as seen."""
+        cache = PlanCache(str(tmp_path / "plans.sqlite"), drift_check_hours=24)
+        netbox = FakeAsyncNetBox()
+
+        first = self.run_pipeline(netbox, cache)
+        assert (first["unchanged"], netbox.writes) == (0, 2)
+        assert cache.get("N_1")["object_ids"] == {"prefixes": [1], "ip_addresses": [2]}
+
+        netbox.seen_ids = {"prefixes": set(), "ip_addresses": set()}
+        second = self.run_pipeline(netbox, cache)
+        assert (second["unchanged"], second["vlans"], netbox.writes) == (1, 1, 2)
+        assert netbox.seen_ids == {"prefixes": {1}, "ip_addresses": {2}}
+
+        # A changed plan is written again
+        self.meraki.get_dhcp_reservations.return_value = {}
+        third = self.run_pipeline(netbox, cache)
+        assert (third["unchanged"], netbox.writes) == (0, 3)
+
+    def test_drift_check_rewrites_missing_objects(self, tmp_path):
+        """Test that a due drift check finds deleted objects and writes the network in full."""
+        cache = PlanCache(str(tmp_path / "plans.sqlite"), drift_check_hours=0)
+        netbox = FakeAsyncNetBox()
+
+        self.run_pipeline(netbox, cache)
+        assert self.run_pipeline(netbox, cache)["unchanged"] == 1
+
+        netbox.existing.discard(2)
+        results = self.run_pipeline(netbox, cache)
+        assert (results["unchanged"], netbox.writes) == (0, 4)
+        assert cache.get("N_1")["object_ids"] == {"prefixes": [3], "ip_addresses": [4]}
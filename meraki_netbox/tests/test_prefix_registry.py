@@ -0,0 +1,55 @@
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sync.prefix_registry import PrefixRegistry
+
+
+class TestPrefixRegistry:
+    """Test suite for the org-wide prefix registry."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.registry = PrefixRegistry()
+
+    def test_duplicate_subnets_resolve_per_network(self):
+        """Test that the same subnet in two networks resolves to each network's entry."""
+        vlans = [{"id": "10", "name": "Data", "subnet": "192.168.10.0/24"}]
+        self.registry.register_network("N_1", vlans, vrf="vrf-1")
+        self.registry.register_network("N_2", vlans, vrf="vrf-2")
+
+        assert self.registry.lookup("N_1", "192.168.10.5")["vrf"] == "vrf-1"
+        assert self.registry.lookup("N_2", "192.168.10.5")["vrf"] == "vrf-2"
+        assert len(self.registry) == 2
+
+    def test_longest_prefix_match(self):
+        """Test that the most specific overlapping subnet wins."""
+        self.registry.register_network("N_1", [
+            {"id": "1", "name": "Wide", "subnet": "10.0.0.0/16"},
+            {"id": "2", "name": "Narrow", "subnet": "10.0.5.0/24"},
+        ])
+
+        assert self.registry.lookup("N_1", "10.0.5.20")["subnet"] == "10.0.5.0/24"
+        assert self.registry.lookup("N_1", "10.0.6.20")["subnet"] == "10.0.0.0/16"
+
+    def test_lookup_misses(self):
+        """Test lookups for unknown networks, unmatched and invalid addresses."""
+        self.registry.register_network("N_1", [
+            {"id": "1", "name": "Data", "subnet": "10.0.0.0/24"},
+            {"id": "2", "name": "No subnet"},
+        ])
+
+        assert self.registry.lookup("N_2", "10.0.0.1") is None
+        assert self.registry.lookup("N_1", "172.16.0.1") is None
+        assert self.registry.lookup("N_1", "not-an-ip") is None
+
+    def test_reregister_replaces_subnets(self):
+        """Test that registering a network again drops its old subnets."""
+        self.registry.register_network("N_1", [{"id": "1", "name": "Old", "subnet": "10.0.0.0/24"}])
+        self.registry.register_network("N_1", [{"id": "1", "name": "New", "subnet": "10.1.0.0/24"}])
+
+        assert self.registry.get("N_1", "10.0.0.0/24") is None
+        assert self.registry.lookup("N_1", "10.1.0.9")["vlan"]["name"] == "New"
+        assert len(self.registry) == 1
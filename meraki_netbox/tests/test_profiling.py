@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.profiling import MemoryTracker, PhaseProfiler
+
+
+def busy(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+class FakeClient:
+    def fetch(self):
+        busy(0.02)
+        return self.write()
+
+    def write(self):
+        busy(0.01)
+        return "written"
+
+
+class TestPhaseProfiler:
+    """Test suite for per-phase profiling."""
+
+    def test_time_is_split_by_phase(self, tmp_path):
+        """Test that nested instrumented methods get their own phase and files are written per phase."""
+        client = FakeClient()
+        profiler = PhaseProfiler()
+        profiler.instrument(client, ["fetch"], "fetch")
+        profiler.instrument(client, ["write"], "netbox_write")
+
+        profiler.start("transform")
+        busy(0.01)
+        assert client.fetch() == "written"
+        profiler.stop()
+        report = profiler.write(str(tmp_path), "profile-test")
+
+        assert set(report) == {"transform", "fetch", "netbox_write"}
+        assert report["fetch"]["cpu"] > report["netbox_write"]["cpu"] > 0.005
+        with open(report["fetch"]["collapsed"]) as collapsed_file:
+            lines = collapsed_file.read().splitlines()
+        assert any("test_profiling.py:fetch" in line and "busy" in line for line in lines)
+        assert not any("test_profiling.py:write" in line for line in lines)
+        assert os.path.getsize(report["netbox_write"]["pstats"]) > 0
+
+    def test_restore_removes_wrappers(self):
+        """Test that instrumented methods are the class's own again after stopping."""
+        client = FakeClient()
+        profiler = PhaseProfiler()
+        profiler.instrument(client, ["fetch", "write"], "fetch")
+        profiler.stop()
+
+        assert "fetch" not in vars(client)
+        assert client.fetch() == "written"
+
+
+class Hoarder:
+    def __init__(self):
+        self.kept = []
+
+    def fetch(self):
+        self.kept.append(bytearray(2_000_000))
+
+    def write(self):
+        bytearray(500_000)
+
+
+class TestMemoryTracker:
+    """Test suite for per-phase memory tracking."""
+
+    def test_peaks_are_split_by_phase(self):
+        """Test that each phase gets its own peak and the largest allocation site is reported."""
+        client = Hoarder()
+        tracker = MemoryTracker(top_sites=3)
+        tracker.instrument(client, ["fetch"], "fetch")
+        tracker.instrument(client, ["write"], "netbox_write")
+
+        tracker.start("transform")
+        client.fetch()
+        client.write()
+        tracker.stop()
+        report = tracker.report(objects=1000)
+
+        assert report["phases"]["fetch"]["peak"] >= 2_000_000
+        # Peaks are of all traced memory, so the write phase's includes what fetch kept
+        assert report["phases"]["netbox_write"]["peak"] >= 2_500_000
+        assert report["bytes_per_object"] == report["peak"] / 1000
+        site, size, _ = report["top_sites"][0]
+        assert "test_profiling.py" in site and size >= 2_000_000
+
+    def test_missing_methods_are_skipped(self):
+        """Test that instrumenting a method the object lacks leaves the object alone."""
+        client = Hoarder()
+        tracker = MemoryTracker()
+        tracker.instrument(client, ["fetch", "get_organizations"], "fetch")
+        assert "get_organizations" not in vars(client)
+        tracker.stop()
+        assert tracker.report()["bytes_per_object"] is None
@@ -0,0 +1,106 @@
+import pytest
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sync.reconcile import Reconciler
+
+
+def make_record(object_id, address=None, status="active", network_id=None):
+    """Build a mock NetBox record."""
+    record = MagicMock()
+    record.id = object_id
+    record.vrf.name = f"meraki-{network_id.lower()}" if network_id else None
+    record.address = address or f"10.0.0.{object_id}/24"
+    record.prefix = f"10.{object_id}.0.0/24"
+    record.status.value = status
+    return record
+
+
+class TestReconciler:
+    """Test suite for the stale object reconciler."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.mock_netbox = MagicMock()
+        self.mock_netbox.seen_ids = {"prefixes": set(), "ip_addresses": {1}}
+        self.owned = {
+            "ip_addresses": [make_record(1), make_record(2)],
+            "prefixes": [],
+        }
+        self.mock_netbox.get_owned_objects.side_effect = lambda kind: self.owned[kind]
+
+    def test_missing_object_waits_for_grace_period(self, tmp_path):
+        """Test that a newly missing object is only reported as pending."""
+        reconciler = Reconciler(self.mock_netbox, str(tmp_path / "state.json"), grace_hours=1)
+
+        results = reconciler.reconcile(now=1000.0)
+
+        assert results["ip_addresses"] == {"stale": 0, "pending": 1, "protected": 0, "removed": 0}
+        self.mock_netbox.bulk_delete.assert_not_called()
+
+    def test_stale_object_deleted_after_grace_period(self, tmp_path):
+        """Test that an object missing longer than the grace period is bulk deleted."""
+        self.mock_netbox.bulk_delete.return_value = 1
+        reconciler = Reconciler(self.mock_netbox, str(tmp_path / "state.json"), grace_hours=1)
+
+        reconciler.reconcile(now=1000.0)
+        results = reconciler.reconcile(now=1000.0 + 3600)
+
+        assert results["ip_addresses"]["removed"] == 1
+        self.mock_netbox.bulk_delete.assert_called_once_with("ip_addresses", [2])
+
+    def test_dry_run_changes_nothing(self, tmp_path):
+        """Test that a dry run neither writes state nor touches NetBox."""
+        state_path = tmp_path / "state.json"
+        reconciler = Reconciler(self.mock_netbox, str(state_path), grace_hours=0)
+
+        results = reconciler.reconcile(dry_run=True)
+
+        assert results["ip_addresses"]["stale"] == 1
+        assert not state_path.exists()
+        self.mock_netbox.bulk_delete.assert_not_called()
+
+    def test_deprecate_action_patches_status(self, tmp_path):
+        """Test that the deprecate action patches status instead of deleting."""
+        reconciler = Reconciler(self.mock_netbox, str(tmp_path / "state.json"),
+                                grace_hours=0, action="deprecate")
+
+        reconciler.reconcile()
+
+        self.mock_netbox.bulk_update.assert_called_once_with(
+            "ip_addresses", [{"id": 2, "status": "deprecated"}]
+        )
+        self.mock_netbox.bulk_delete.assert_not_called()
+
+    def test_invalid_action(self, tmp_path):
+        """Test that an unknown action is rejected."""
+        with pytest.raises(ValueError):
+            Reconciler(self.mock_netbox, str(tmp_path / "state.json"), action="archive")
+
+    def test_incomplete_networks_are_protected(self, tmp_path):
+        """Test that objects of networks that were not fully synced are neither aged nor removed."""
+        self.owned["ip_addresses"] = [
+            make_record(2, network_id="N_1"),
+            make_record(3, network_id="N_2"),
+            make_record(4),
+        ]
+        reconciler = Reconciler(self.mock_netbox, str(tmp_path / "state.json"), grace_hours=0)
+
+        results = reconciler.reconcile(incomplete={"ip_addresses": {"N_1"}})
+
+        # N_2 was fully synced; N_1 was not, and the VRF-less record can't be attributed
+        self.mock_netbox.bulk_delete.assert_called_once_with("ip_addresses", [3])
+        assert results["ip_addresses"]["protected"] == 2
+
+    def test_unlisted_networks_protect_everything(self, tmp_path):
+        """Test that a failure to list an organization's networks protects every object."""
+        self.owned["ip_addresses"] = [make_record(2, network_id="N_1")]
+        reconciler = Reconciler(self.mock_netbox, str(tmp_path / "state.json"), grace_hours=0)
+
+        reconciler.reconcile(incomplete={"ip_addresses": {None}})
+
+        self.mock_netbox.bulk_delete.assert_not_called()
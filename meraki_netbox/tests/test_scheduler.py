@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sync.priorities import PRIORITY_INTERACTIVE, PRIORITY_SCHEDULED, PRIORITY_TARGETED, wait_for_turn
+from sync.scheduler import SyncScheduler
+from utils.sync_registry import SyncRegistry
+
+
+class TestSyncScheduler:
+    """Test suite for the priority sync scheduler."""
+
+    def test_runs_jobs_in_priority_order(self):
+        """Test that waiting jobs run by priority class, then in submission order."""
+        order = []
+
+        def job(name):
+            async def run():
+                order.append(name)
+            return run
+
+        async def run():
+            scheduler = SyncScheduler(workers=1)
+            scheduler.submit("full-1", PRIORITY_SCHEDULED, job("full-1"))
+            scheduler.submit("org", PRIORITY_TARGETED, job("org"))
+            scheduler.submit("full-2", PRIORITY_SCHEDULED, job("full-2"))
+            scheduler.submit("webhook", PRIORITY_INTERACTIVE, job("webhook"))
+            # A trigger for a waiting key raises its priority instead of queueing it again
+            assert scheduler.submit("full-2", PRIORITY_INTERACTIVE, job("again")) == "pending"
+            await scheduler.join()
+            await scheduler.stop()
+
+        asyncio.run(run())
+        assert order == ["webhook", "full-2", "org", "full-1"]
+
+    def test_full_sync_yields_between_networks(self):
+        """Test that a webhook job runs before the next network of a full sync, even with one worker."""
+        events = []
+
+        async def run():
+            scheduler = SyncScheduler(workers=1, poll_interval=0.01)
+
+            async def full_sync():
+                for network in ("N_1", "N_2", "N_3"):
+                    await scheduler.yield_point(PRIORITY_SCHEDULED)
+                    events.append(network)
+                    if network == "N_1":
+                        scheduler.submit("webhook", PRIORITY_INTERACTIVE, webhook)
+                    await asyncio.sleep(0)
+
+            async def webhook():
+                events.append("webhook")
+
+            scheduler.submit("full", PRIORITY_SCHEDULED, full_sync)
+            await scheduler.join()
+            await scheduler.stop()
+
+        asyncio.run(run())
+        assert events == ["N_1", "webhook", "N_2", "N_3"]
+
+    def test_blocking_yield_waits_for_other_processes(self, tmp_path):
+        """Test that the blocking yield point waits until the registry has no more urgent syncs."""
+        registry = SyncRegistry(str(tmp_path / "syncs.sqlite"))
+        registry.request("network:N_1", PRIORITY_INTERACTIVE)
+        checks = []
+
+        def heartbeat():
+            checks.append(len(checks))
+            if len(checks) == 3:
+                registry.forget("network:N_1")
+
+        assert registry.busy(PRIORITY_SCHEDULED)
+        assert not registry.busy(PRIORITY_INTERACTIVE)
+        wait_for_turn(registry.busy, PRIORITY_SCHEDULED, poll_interval=0.001, heartbeat=heartbeat)
+        assert len(checks) == 3
@@ -0,0 +1,53 @@
+import pytest
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from clients.client_table import ClientTable
+from sync.prefix_registry import PrefixRegistry
+from sync.subnet_assign import assign_subnets, get_numpy
+
+ASSIGNMENT_PATHS = [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(get_numpy() is None, reason="NumPy is not installed")),
+]
+
+
+class TestAssignSubnets:
+    """Test suite for bulk subnet assignment."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.registry = PrefixRegistry()
+        self.registry.register_network("N_1", [
+            {"id": "1", "name": "Wide", "subnet": "10.0.0.0/16"},
+            {"id": "2", "name": "Narrow", "subnet": "10.0.5.0/24"},
+        ], vrf="vrf-1")
+        self.registry.register_network("N_2", [
+            {"id": "1", "name": "Same subnet", "subnet": "10.0.5.0/24"},
+        ], vrf="vrf-2")
+
+        self.table = ClientTable()
+        self.table.append("N_1", "10.0.5.9", "00:00:00:00:00:01")
+        self.table.append("N_1", "10.0.7.9", "00:00:00:00:00:02")
+        self.table.append("N_2", "10.0.5.9", "00:00:00:00:00:03")
+        self.table.append("N_2", "10.0.7.9", "00:00:00:00:00:04")
+
+    @pytest.mark.parametrize("use_numpy", ASSIGNMENT_PATHS)
+    def test_assigns_longest_prefix_per_network(self, use_numpy):
+        """Test that rows match the most specific subnet of their own network."""
+        assignments, entries = assign_subnets(self.table, self.registry, use_numpy=use_numpy)
+
+        matched = [entries[index] if index >= 0 else None for index in assignments]
+        assert (matched[0]["subnet"], matched[0]["vrf"]) == ("10.0.5.0/24", "vrf-1")
+        assert matched[1]["subnet"] == "10.0.0.0/16"
+        assert (matched[2]["subnet"], matched[2]["vrf"]) == ("10.0.5.0/24", "vrf-2")
+        assert matched[3] is None
+
+    @pytest.mark.parametrize("use_numpy", ASSIGNMENT_PATHS)
+    def test_empty_table(self, use_numpy):
+        """Test that an empty table assigns nothing."""
+        assignments, _ = assign_subnets(ClientTable(), self.registry, use_numpy=use_numpy)
+        assert len(assignments) == 0
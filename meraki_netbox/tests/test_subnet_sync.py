@@ -56,4 +56,23 @@ class TestSubnetSynchronizer:
         self.synchronizer.sync_vlan(vlan_data, network_name)
         
         # Verify the results - should not call create_or_update_prefix
-        self.mock_netbox.create_or_update_prefix.assert_not_called()
\ No newline at end of file
+        self.mock_netbox.create_or_update_prefix.assert_not_called()
+
+    def test_sync_vlan_scoped_to_network(self):
+        """Test that a VLAN synced with a network ID is scoped to that network."""
+        scope = {"vlan_group": MagicMock(id=3), "vrf": MagicMock(id=4)}
+        self.mock_netbox.get_network_scope.return_value = scope
+        vlan_data = {
+            "id": "10",
+            "name": "Data VLAN",
+            "subnet": "192.168.10.0/24"
+        }
+
+        # Call the method
+        self.synchronizer.sync_vlan(vlan_data, "Test Network", "N_123")
+
+        # Verify the results
+        self.mock_netbox.get_network_scope.assert_called_once_with("N_123", "Test Network")
+        call_args = self.mock_netbox.create_or_update_prefix.call_args[1]
+        assert call_args["vlan_group"] is scope["vlan_group"]
+        assert call_args["vrf"] is scope["vrf"]
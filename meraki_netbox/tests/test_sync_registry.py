@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from automation.webhook_ingest import SyncQueue
+from utils.sync_registry import SyncRegistry
+
+
+def request_sync(path):
+    return SyncRegistry(path).request("network:N_1")
+
+
+class TestSyncRegistry:
+    """Test suite for the cross-process sync registry."""
+
+    def test_triggers_attach_to_pending_and_running_syncs(self, tmp_path):
+        """Test that a sync is queued once and triggers during its run ask for one follow-up."""
+        registry = SyncRegistry(str(tmp_path / "syncs.sqlite"))
+
+        assert registry.request("network:N_1", now=0) == "queued"
+        assert registry.request("network:N_1", now=1) == "pending"
+        assert registry.acquire("network:N_1", "worker-a", now=2)
+        assert not registry.acquire("network:N_1", "worker-b", now=3)
+        assert registry.request("network:N_1", now=4) == "running"
+        assert registry.request("network:N_1", now=5) == "running"
+
+        assert registry.release("network:N_1", "worker-a", now=6) is True
+        assert registry.release("network:N_1", "worker-a", now=7) is False
+        assert registry.request("network:N_1", now=8) == "queued"
+
+    def test_abandoned_entries_are_taken_over(self, tmp_path):
+        """Test that a lock older than the lease no longer blocks the sync."""
+        registry = SyncRegistry(str(tmp_path / "syncs.sqlite"), lease_seconds=60)
+        registry.request("org:1", now=0)
+        registry.acquire("org:1", "dead-worker", now=0)
+
+        assert registry.request("org:1", now=61) == "queued"
+        assert registry.acquire("org:1", "worker-b", now=62)
+
+    def test_processes_queue_one_sync(self, tmp_path):
+        """Test that concurrent requests from several processes queue the sync exactly once."""
+        path = str(tmp_path / "syncs.sqlite")
+        SyncRegistry(path)
+
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            statuses = list(pool.map(request_sync, [path] * 8))
+
+        assert statuses.count("queued") == 1
+        assert statuses.count("pending") == 7
+
+    def test_queues_share_the_registry(self, tmp_path):
+        """Test that two workers' queues run a network once and a trigger during the run reruns it."""
+        registry = SyncRegistry(str(tmp_path / "syncs.sqlite"))
+        runs = []
+
+        async def run():
+            started = asyncio.Event()
+            finish = asyncio.Event()
+
+            async def runner(network_id=None, org_id=None, priority=None):
+                runs.append(network_id)
+                started.set()
+                await finish.wait()
+
+            first = SyncQueue(runner, registry=registry)
+            second = SyncQueue(runner, registry=registry)
+            statuses = [first.submit(network_id="N_1"), second.submit(network_id="N_1")]
+            await started.wait()
+            statuses.append(second.submit(network_id="N_1"))
+            finish.set()
+            await first.join()
+            await first.stop()
+            await second.stop()
+            return statuses
+
+        assert asyncio.run(run()) == ["queued", "pending", "running"]
+        assert runs == ["N_1", "N_1"]
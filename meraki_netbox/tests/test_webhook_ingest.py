@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import sys
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from automation.webhook_ingest import SyncQueue, WebhookApp, compile_alert_matcher
+
+SECRET = "test-secret"
+
+
+def sign(body):
+    return "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+async def call(app, method, path, body=b"", headers=()):
+    """Send one HTTP request through an ASGI app and collect the response."""
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": list(headers), "query_string": b""}
+    await app(scope, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"]), sent[1]["body"]
+
+
+class TestWebhookApp:
+    """Test suite for the ASGI webhook front end."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.runs = []
+
+        async def runner(network_id=None, org_id=None, priority=None):
+            self.runs.append((network_id, org_id))
+
+        self.app = WebhookApp(secret=SECRET, queue=SyncQueue(runner))
+
+    def post_alert(self, data, signature=None):
+        body = json.dumps(data).encode()
+        headers = [(b"x-meraki-signature", (signature or sign(body)).encode())]
+        return call(self.app, "POST", "/webhook/meraki", body, headers)
+
+    def test_matcher_is_case_insensitive(self):
+        """Test that alert types match regardless of case and position."""
+        matches = compile_alert_matcher()
+        assert matches("Settings: vlan configuration CHANGED")
+        assert not matches("Motion detected")
+
+    def test_rejects_bad_signature(self):
+        """Test that an alert with a wrong signature is refused and not queued."""
+        status, _, _ = asyncio.run(self.post_alert({"alertType": "Subnet changed"}, signature="sha256=00"))
+        assert status == 401
+
+    def test_queues_matching_alerts_once(self):
+        """Test that matching alerts are accepted and a waiting network sync is not queued twice."""
+        alert = {"alertType": "VLAN configuration changed", "networkId": "N_1"}
+
+        async def run():
+            first = await self.post_alert(alert)
+            second = await self.post_alert(alert)
+            ignored = await self.post_alert({"alertType": "Motion detected", "networkId": "N_1"})
+            await self.app.queue.join()
+            await self.app.queue.stop()
+            return first, second, ignored
+
+        first, second, ignored = asyncio.run(run())
+
+        assert (first[0], json.loads(first[2])["status"]) == (202, "queued")
+        assert (second[0], json.loads(second[2])["status"]) == (202, "pending")
+        assert json.loads(ignored[2])["status"] == "ignored"
+        assert self.runs == [("N_1", None)]
+
+    def test_other_paths_go_to_flask(self):
+        """Test that requests outside the webhook path are served by the WSGI fallback."""
+        def wsgi_app(environ, start_response):
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            return [environ["REQUEST_METHOD"].encode(), environ["PATH_INFO"].encode()]
+
+        self.app.fallback = wsgi_app
+        status, headers, body = asyncio.run(call(self.app, "GET", "/health"))
+
+        assert (status, headers[b"content-type"], body) == (200, b"text/plain", b"GET/health")